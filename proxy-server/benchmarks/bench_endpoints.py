@@ -0,0 +1,257 @@
+"""Benchmark the API endpoints end to end, in process, against recorded market data.
+
+Drives each endpoint through the ASGI app with httpx at a fixed concurrency
+and reports p50/p95/p99 latency, throughput and RSS per endpoint. Endpoints run
+one after another in one process, so the RSS figure is the growth over the
+endpoint's own run (peak minus the RSS at its start), not the process peak.
+
+Usage:
+  # once, online: record upstream responses for the requests below
+  python benchmarks/bench_endpoints.py --record
+  # offline runs; compare against an earlier result (exit status 1 on regression)
+  python benchmarks/bench_endpoints.py --output results.json
+  python benchmarks/bench_endpoints.py --compare results.json [--threshold 0.1]
+
+Options: [--endpoints stock,market] [--requests 200] [--concurrency 8] [--warmup 5]
+         [--symbols TCS,INFY,...] [--latency "download=0.2,news=0.3"] [--clear-cache]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_SYMBOLS = "TCS,INFY,RELIANCE,HDFCBANK,ITC"
+
+
+def endpoint_requests(symbols: list) -> dict:
+    """Request factories per endpoint: i -> (method, path, JSON body)"""
+    def pick(i, count=1):
+        return [symbols[(i + k) % len(symbols)] for k in range(count)]
+
+    return {
+        "process": lambda i: ("POST", "/process", {"query": f"What is the current price of {pick(i)[0]}?"}),
+        "stock": lambda i: ("GET", f"/stock/{pick(i)[0]}", None),
+        "market": lambda i: ("GET", "/market", None),
+        "portfolio": lambda i: ("POST", "/portfolio", {"symbols": pick(i, 3)}),
+        "watchlist": lambda i: ("POST", "/watchlist", {"symbols": pick(i, 5)}),
+        "market_indices": lambda i: ("GET", f"/market-indices/{pick(i)[0]}", None),
+        "sentiment_market": lambda i: ("GET", f"/sentiment/market/{pick(i)[0]}", None),
+    }
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # No procfs (macOS): fall back to the process high-water mark
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RSSSampler:
+    """Resident set size at entry and the highest seen while active, sampled from a background thread"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.start = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start = self.peak = current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+async def run_endpoint(client, make_request, total: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        method, path, body = make_request(i)
+        await client.request(method, path, json=body)
+
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            i = next_index
+            next_index += 1
+            method, path, body = make_request(warmup + i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    # Sampled from after the warm-up, so one-off imports and model loads are not charged to the endpoint
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "rss_start_mb": rss.start / 2 ** 20,
+        "peak_rss_mb": rss.peak / 2 ** 20,
+        "rss_growth_mb": (rss.peak - rss.start) / 2 ** 20,
+    }
+
+
+async def run_benchmark(args, endpoints: list) -> dict:
+    import httpx
+
+    from fastapi_chatbot_server import app
+    from market_cache import market_cache
+
+    requests = endpoint_requests(args.symbols)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    # The lifespan runs the startup hooks (market snapshot refresher, model warm-up)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in endpoints:
+                if args.clear_cache:
+                    market_cache.clear()
+                results[name] = await run_endpoint(
+                    client, requests[name], args.requests, args.concurrency, args.warmup
+                )
+                print(format_row(name, results[name]), flush=True)
+    return results
+
+
+def format_row(name: str, result: dict) -> str:
+    return (f"{name:18} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+            f"p99 {result['p99_ms']:9.2f} ms  {result['throughput_rps']:8.1f} req/s  "
+            f"rss +{result['rss_growth_mb']:6.1f} MB  errors {result['errors']}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """Print per-endpoint changes; True when any p95 or throughput regressed beyond threshold"""
+    regressed = False
+    print(f"\nvs {baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0%})")
+    for name, result in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            print(f"{name:18} (no baseline)")
+            continue
+        p95_change = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps_change = result["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        flag = p95_change > threshold or rps_change < -threshold
+        regressed |= flag
+        print(f"{name:18} p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}  "
+              f"rss growth {result['rss_growth_mb'] - before.get('rss_growth_mb', 0.0):+7.1f} MB{'  REGRESSION' if flag else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", default=",".join(endpoint_requests(["X"])),
+                        help="comma-separated endpoint names")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per endpoint first")
+    parser.add_argument("--symbols", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--latency", default=None, help="injected replay latency (DATA_REPLAY_LATENCY)")
+    parser.add_argument("--replay-dir", default=None, help="recordings directory (DATA_REPLAY_DIR)")
+    parser.add_argument("--record", action="store_true", help="call live upstreams and record their responses")
+    parser.add_argument("--clear-cache", action="store_true", help="empty the market data cache before each endpoint")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed p95/throughput regression")
+    args = parser.parse_args()
+    args.symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(endpoint_requests(args.symbols))
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    # Configure the data provider before the server (and market_data) is imported
+    os.environ["DATA_PROVIDER"] = "record" if args.record else "replay"
+    if args.latency is not None:
+        os.environ["DATA_REPLAY_LATENCY"] = args.latency
+    if args.replay_dir:
+        os.environ["DATA_REPLAY_DIR"] = args.replay_dir
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        raise SystemExit("bench_endpoints needs httpx (pip install httpx)")
+
+    # One INFO line per request from the client would bury the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = asyncio.run(run_benchmark(args, endpoints))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "provider": os.environ["DATA_PROVIDER"],
+            "latency": os.environ.get("DATA_REPLAY_LATENCY", "0"),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "symbols": args.symbols,
+        },
+        "endpoints": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
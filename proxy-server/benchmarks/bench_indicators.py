@@ -0,0 +1,95 @@
+"""Benchmark the indicator engine against the per-symbol ``ta`` path it replaced.
+
+Runs the batch case (--symbols at once) and the single-symbol case every
+production caller uses (one 1-D close series).
+
+Usage: python benchmarks/bench_indicators.py [--symbols 50] [--bars 250] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import compute_indicators  # noqa: E402
+
+
+def synthetic_prices(bars: int, symbols: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.015, size=(bars, symbols))
+    return 1000 * np.exp(np.cumsum(returns, axis=0))
+
+
+def ta_path(prices: np.ndarray) -> dict:
+    """What get_trading_signals did per symbol: one RSI, two MACD and two Bollinger objects"""
+    import ta
+
+    results = {}
+    for j in range(prices.shape[1]):
+        close = pd.Series(prices[:, j])
+        results[j] = {
+            "rsi": ta.momentum.RSIIndicator(close).rsi(),
+            "macd": ta.trend.MACD(close).macd(),
+            "macd_signal": ta.trend.MACD(close).macd_signal(),
+            "bb_upper": ta.volatility.BollingerBands(close).bollinger_hband(),
+            "bb_lower": ta.volatility.BollingerBands(close).bollinger_lband(),
+        }
+    return results
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--bars", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        import ta  # noqa: F401
+    except ImportError:
+        ta = None
+        print("ta is not installed; skipping the comparison")
+
+    for symbols in dict.fromkeys((args.symbols, 1)):
+        prices = synthetic_prices(args.bars, symbols)
+        # One symbol goes in as a 1-D series, like indicator_frame passes it
+        engine_input = prices[:, 0] if symbols == 1 else prices
+        print(f"\n{symbols} symbol{'s' if symbols > 1 else ''} x {args.bars} bars")
+        engine_seconds = best_of(lambda: compute_indicators(engine_input), args.repeat)
+        print(f"engine: {engine_seconds * 1000:.2f} ms")
+        if ta is None:
+            continue
+
+        ta_seconds = best_of(lambda: ta_path(prices), args.repeat)
+        print(f"ta:     {ta_seconds * 1000:.2f} ms")
+        print(f"speedup: {ta_seconds / engine_seconds:.1f}x")
+        compare_with_ta(compute_indicators(engine_input), ta_path(prices), symbols)
+
+
+def compare_with_ta(engine: dict, reference: dict, symbols: int):
+    """Both paths must agree, including the warm-up NaNs"""
+    worst = 0.0
+    for j, series in reference.items():
+        for name, values in series.items():
+            expected = values.to_numpy()
+            actual = engine[name] if symbols == 1 else engine[name][:, j]
+            if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+                raise SystemExit(f"NaN mismatch for {name} (symbol {j})")
+            worst = max(worst, float(np.nanmax(np.abs(expected - actual))))
+    print(f"max abs difference vs ta: {worst:.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Benchmark article scoring: the per-article strptime loop vs the current scoring stage.
+
+Runs a request-sized batch (10 articles, the plain-Python path) and a large one
+(--articles, the columnar path).
+
+Usage: python benchmarks/bench_sentiment_scoring.py [--articles 10000] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sentiment_analysis  # noqa: E402
+
+LEGACY_DATE_FORMATS = [
+    '%a, %d %b %Y %H:%M:%S %z',
+    '%Y-%m-%d %H:%M:%S',
+    '%a, %d %b %Y %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%a %b %d, %Y',
+    '%d %b %Y'
+]
+
+
+def legacy_time_weight(article_date_str):
+    """The previous calculate_time_weight, kept here as the baseline"""
+    parsed_date = None
+    for format_str in LEGACY_DATE_FORMATS:
+        try:
+            parsed_date = datetime.strptime(article_date_str, format_str)
+            break
+        except ValueError:
+            continue
+    if parsed_date is None:
+        return 0.01
+    now = datetime.now()
+    if parsed_date.tzinfo is not None:
+        now = now.replace(tzinfo=parsed_date.tzinfo)
+    hours_diff = (now - parsed_date).total_seconds() / 3600
+    if hours_diff < 1:
+        return 0.24
+    elif hours_diff < 24:
+        return max(0.01, 0.24 - ((hours_diff - 1) * 0.01))
+    return 0.01
+
+
+def legacy_pipeline(articles):
+    """Per-article scoring, counts computed twice and row-wise table formatting, as before"""
+    for article in articles:
+        time_weight = legacy_time_weight(article["date"])
+        article["time_weight"] = time_weight
+        base_score = {'positive': 3, 'neutral': 0, 'negative': -3}.get(article["sentiment"]["label"], 0)
+        article["base_score"] = base_score
+        article["weighted_addition"] = base_score * time_weight
+        article["total_score"] = base_score + base_score * time_weight
+    summaries = []
+    for _ in range(2):  # once for the summary text, again in create_sentiment_summary
+        total = len(articles)
+        counts = {label: sum(1 for a in articles if a["sentiment"]["label"] == label)
+                  for label in ("positive", "neutral", "negative")}
+        summaries.append((total, counts, sum(a["total_score"] for a in articles) / total))
+    top = pd.DataFrame(sorted(articles, key=lambda x: x.get("date", ""), reverse=True)[:10])
+    top["Base Score"] = top["base_score"].apply(lambda x: f"{x:+.2f}")
+    top["Weight"] = top["time_weight"].apply(lambda x: f"{x*10:.1f}x")
+    return summaries[0]
+
+
+def columnar_pipeline(articles):
+    articles, summary = sentiment_analysis.score_and_summarize(articles)
+    sentiment_analysis.convert_to_dataframe(articles)
+    return summary
+
+
+def synthetic_articles(count: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    styles = [
+        lambda d: d.strftime('%a, %d %b %Y %H:%M:%S') + " +0530",
+        lambda d: d.strftime('%Y-%m-%d %H:%M:%S'),
+        lambda d: d.strftime('%a, %d %b %Y %H:%M:%S'),
+        lambda d: d.strftime('%Y-%m-%dT%H:%M:%S') + "+0000",
+        lambda d: d.strftime('%a %b %d, %Y'),
+        lambda d: d.strftime('%d %b %Y'),
+        lambda d: f"{d.hour % 23 + 1} hours ago",  # relative dates are not parsed
+    ]
+    labels = np.array(["positive", "neutral", "negative"])
+    articles = []
+    for i in range(count):
+        published = now - timedelta(minutes=float(rng.uniform(0, 3 * 24 * 60)))
+        articles.append({
+            "title": f"Headline {i}",
+            "desc": f"Description {i}",
+            "date": styles[int(rng.integers(len(styles)))](published),
+            "sentiment": {"label": str(rng.choice(labels)), "score": float(rng.random())},
+        })
+    return articles
+
+
+def best_of(func, make_input, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        data = make_input()
+        started = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    for count in dict.fromkeys((10, args.articles)):
+        compare(count, args.repeat)
+
+
+def compare(count: int, repeat: int):
+    source = synthetic_articles(count)
+    # Small batches finish in microseconds; take more samples so the minimum is stable
+    repeat = max(repeat, 20000 // count)
+
+    def fresh():
+        return [dict(article) for article in source]
+
+    path = "columnar" if count >= sentiment_analysis.COLUMNAR_MIN_ARTICLES else "plain-Python"
+    baseline = best_of(legacy_pipeline, fresh, repeat)
+    current = best_of(columnar_pipeline, fresh, repeat)
+    print(f"{count} articles ({path} path)")
+    print(f"  per-article loop: {baseline * 1000:.3f} ms")
+    print(f"  scoring stage:    {current * 1000:.3f} ms, {baseline / current:.1f}x faster")
+
+    legacy, scored = fresh(), fresh()
+    legacy_pipeline(legacy)
+    columnar_pipeline(scored)
+    # Each implementation reads "now" itself, a moment apart; weights drift by ~3e-6 per second
+    worst = max(max(abs(a["time_weight"] - b["time_weight"]), abs(a["total_score"] - b["total_score"]))
+                for a, b in zip(legacy, scored))
+    if worst > 1e-4:
+        raise SystemExit(f"Scores differ from the previous implementation (max difference {worst:g})")
+    print("  scores match the previous implementation")
+
+if __name__ == "__main__":
+    main()
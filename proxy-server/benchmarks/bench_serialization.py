@@ -0,0 +1,133 @@
+"""Benchmark response encoding of a /stock-sized payload: to_serializable + jsonable_encoder vs response_encoder.
+
+Usage: python benchmarks/bench_serialization.py [--rows 80] [--periods 5] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import response_encoder  # noqa: E402
+
+
+def to_serializable(val):
+    """The server's previous recursive converter, kept here as the baseline"""
+    if isinstance(val, dict):
+        return {k: to_serializable(v) for k, v in val.items()}
+    elif isinstance(val, list):
+        return [to_serializable(v) for v in val]
+    elif isinstance(val, (np.integer, np.int64, np.int32)):
+        return int(val)
+    elif isinstance(val, (np.floating, np.float64, np.float32)):
+        if np.isnan(val) or np.isinf(val):
+            return None
+        return float(val)
+    elif isinstance(val, (np.ndarray,)):
+        return to_serializable(val.tolist())
+    elif isinstance(val, pd.DataFrame):
+        return to_serializable(val.to_dict())
+    elif isinstance(val, pd.Series):
+        return to_serializable(val.to_dict())
+    elif isinstance(val, float):
+        if np.isnan(val) or np.isinf(val):
+            return None
+        return val
+    else:
+        return val
+
+
+def _jsonable(val):
+    """Stand-in for FastAPI's jsonable_encoder when FastAPI is not installed"""
+    if isinstance(val, dict):
+        return {(k.isoformat() if hasattr(k, "isoformat") else k): _jsonable(v) for k, v in val.items()}
+    if isinstance(val, list):
+        return [_jsonable(v) for v in val]
+    if hasattr(val, "isoformat"):
+        return val.isoformat()
+    return val
+
+
+def statement(rows: int, periods: int, rng) -> pd.DataFrame:
+    frame = pd.DataFrame(
+        rng.normal(1e9, 1e8, size=(rows, periods)),
+        index=[f"Line Item {i}" for i in range(rows)],
+        columns=pd.date_range("2025-03-31", periods=periods, freq="-1QE"),
+    )
+    frame[frame > 1.1e9] = np.nan  # statements are sparse
+    return frame
+
+
+def stock_payload(rows: int, periods: int) -> dict:
+    rng = np.random.default_rng(0)
+    info = {f"field_{i}": float(rng.normal()) for i in range(30)}
+    info["dividend_yield"] = float("nan")
+    earnings = pd.DataFrame(
+        {"EPS Estimate": rng.normal(20, 2, 24), "Reported EPS": rng.normal(20, 2, 24),
+         "Surprise(%)": rng.normal(0, 5, 24)},
+        index=pd.date_range("2019-01-15", periods=24, freq="QS"),
+    )
+    holders = pd.DataFrame({"Holder": [f"Fund {i}" for i in range(10)], "Shares": rng.integers(1e6, 1e8, 10),
+                            "pctHeld": rng.random(10), "Value": rng.integers(1e8, 1e10, 10)})
+    return dict(info, **{
+        "financial_data": {
+            "balance_sheet": statement(rows, periods, rng),
+            "income_statement": statement(rows, periods, rng),
+            "cash_flow": statement(rows, periods, rng),
+        },
+        "recommendations": statement(4, 6, rng),
+        "earnings_dates": earnings,
+        "sustainability": statement(30, 1, rng),
+        "institutional_holders": holders,
+        "major_holders": holders.head(4),
+    })
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=80, help="line items per financial statement")
+    parser.add_argument("--periods", type=int, default=5, help="reporting periods per statement")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        from fastapi.encoders import jsonable_encoder
+    except ImportError:
+        jsonable_encoder = _jsonable
+        print("FastAPI not installed; approximating jsonable_encoder")
+
+    payload = stock_payload(args.rows, args.periods)
+
+    def legacy():
+        return json.dumps(jsonable_encoder(to_serializable(payload))).encode("utf-8")
+
+    baseline = best_of(legacy, args.repeat)
+    backend = "orjson" if response_encoder.orjson is not None else "json"
+    print(f"to_serializable + jsonable_encoder: {baseline * 1000:.2f} ms ({len(legacy())} bytes)")
+    for layout in response_encoder.FRAME_LAYOUTS:
+        seconds = best_of(lambda: response_encoder.encode(payload, layout), args.repeat)
+        size = len(response_encoder.encode(payload, layout))
+        print(f"encode ({backend}, {layout}): {seconds * 1000:.2f} ms ({size} bytes), "
+              f"{baseline / seconds:.1f}x faster")
+
+    if json.loads(legacy()) != json.loads(response_encoder.encode(payload)):
+        raise SystemExit("The dict layout does not match the previous output")
+    print("dict layout output matches the previous path")
+
+
+if __name__ == "__main__":
+    main()
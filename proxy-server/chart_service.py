@@ -0,0 +1,315 @@
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+import numpy as np
+
+# Rendered PNGs kept in memory, by total size
+CHART_CACHE_MAX_BYTES = int(os.environ.get("CHART_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Worker processes drawing charts; 0 draws in the calling thread (serialized, matplotlib is not thread-safe)
+CHART_RENDER_PROCESSES = int(os.environ.get("CHART_RENDER_PROCESSES", "2"))
+
+# Part of every chart key: bump it when a renderer's output changes so stale images are not served
+RENDER_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ChartImage:
+    key: str
+    data: bytes
+    created_at: float
+    content_type: str = "image/png"
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.key}"'
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _draw_stock_chart(plt, ticker, dates, close, volume=None):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # Plot closing price
+    ax.plot(dates, close, label='Close Price', color='blue')
+
+    # Add 20-day moving average if enough data
+    if len(close) > 20:
+        ma20 = np.convolve(close, np.ones(20) / 20, mode='valid')
+        ax.plot(dates[19:], ma20, label='20-day MA', color='orange')
+
+    # Add volume subplot if available
+    if volume is not None and not np.isnan(volume).all():
+        ax2 = ax.twinx()
+        ax2.bar(dates, volume, alpha=0.3, color='gray', label='Volume')
+        ax2.set_ylabel('Volume')
+
+        # Add legend for both plots
+        lines, labels = ax.get_legend_handles_labels()
+        lines2, labels2 = ax2.get_legend_handles_labels()
+        ax.legend(lines + lines2, labels + labels2, loc='upper left')
+    else:
+        ax.legend(loc='upper left')
+
+    # Style the plot
+    ax.set_title(f"{ticker} Stock Price")
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Price')
+    ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    return fig, {}
+
+
+def _draw_sentiment_bar(plt, positive, neutral, negative):
+    fig, ax = plt.subplots(figsize=(5, 0.5))
+    ax.barh([0], positive, color='#28a745', label='Positive')
+    ax.barh([0], neutral, left=positive, color='#6c757d', label='Neutral')
+    ax.barh([0], negative, left=positive + neutral, color='#dc3545', label='Negative')
+    ax.set_xlim(0, 100)
+    ax.axis('off')
+    plt.tight_layout()
+    return fig, {"bbox_inches": "tight", "pad_inches": 0}
+
+
+def _draw_sentiment_summary(plt, total_articles, positive_count, neutral_count, negative_count,
+                            positive_pct, neutral_pct, negative_pct, avg_sentiment_score):
+    fig = plt.figure(figsize=(15, 6))
+    gs = fig.add_gridspec(1, 2, width_ratios=[1, 1])
+
+    # 1. Market Sentiment Card (Pie Chart)
+    ax1 = fig.add_subplot(gs[0, 0])
+    labels = ['Positive', 'Neutral', 'Negative']
+    sizes = [positive_pct, neutral_pct, negative_pct]
+    colors = ['green', 'gray', 'red']
+
+    ax1.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+    ax1.axis('equal')
+    ax1.set_title('Market Sentiment Distribution')
+
+    # Add summary text
+    summary_text = f"""
+    Total Articles: {total_articles}
+    Positive: {positive_count} ({positive_pct:.1f}%)
+    Neutral: {neutral_count} ({neutral_pct:.1f}%)
+    Negative: {negative_count} ({negative_pct:.1f}%)
+    """
+    fig.text(0.25, 0.01, summary_text, ha='center', fontsize=10,
+             bbox={"facecolor": "lightgray", "alpha": 0.3, "pad": 5})
+
+    # 2. Sentiment Gauge
+    ax2 = fig.add_subplot(gs[0, 1])
+    gauge_min = -3  # Most negative
+    gauge_max = 3   # Most positive
+    gauge_value = avg_sentiment_score
+
+    # Normalize value to 0-1 range for gauge
+    normalized_value = (gauge_value - gauge_min) / (gauge_max - gauge_min)
+
+    gauge = plt.Circle((0.5, 0.5), 0.4, transform=ax2.transAxes, fill=False)
+    ax2.add_patch(gauge)
+
+    # Add gauge needle
+    angle = normalized_value * 180  # Convert to degrees
+    rad = np.radians(angle)
+    x = 0.5 + 0.35 * np.cos(rad)
+    y = 0.5 + 0.35 * np.sin(rad)
+    ax2.plot([0.5, x], [0.5, y], 'r-', linewidth=2)
+
+    # Add gauge labels
+    ax2.text(0.5, 0.9, 'Bullish', ha='center', va='center')
+    ax2.text(0.1, 0.5, 'Bearish', ha='center', va='center')
+    ax2.text(0.5, 0.1, 'Neutral', ha='center', va='center')
+
+    # Add current value
+    sentiment_label = "Bullish" if gauge_value > 1 else "Bearish" if gauge_value < -1 else "Neutral"
+    ax2.text(0.5, 0.5, f'{gauge_value:.2f}\n({sentiment_label})',
+             ha='center', va='center', fontsize=12)
+
+    ax2.set_xlim(0, 1)
+    ax2.set_ylim(0, 1)
+    ax2.axis('off')
+    ax2.set_title('Sentiment Gauge')
+
+    plt.tight_layout()
+    return fig, {}
+
+
+RENDERERS = {
+    "stock": _draw_stock_chart,
+    "sentiment_bar": _draw_sentiment_bar,
+    "sentiment_summary": _draw_sentiment_summary,
+}
+
+
+def render_png(kind: str, params: dict) -> bytes:
+    """Draw one chart and return it as PNG bytes (runs in a render worker process)"""
+    plt = _pyplot()
+    fig, save_kwargs = RENDERERS[kind](plt, **params)
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', **save_kwargs)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def _hash_value(digest, value):
+    if isinstance(value, np.ndarray) and value.dtype.hasobject:
+        # The raw bytes of an object array are pointers, different for every equal input
+        digest.update(f"object{value.shape}".encode())
+        digest.update(json.dumps(value.tolist(), default=str).encode("utf-8"))
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+
+
+def chart_key(kind: str, params: dict) -> str:
+    """Content address of a chart: a hash of its kind, renderer version and input data"""
+    digest = hashlib.sha256(f"{kind}:{RENDER_VERSION}".encode())
+    for name in sorted(params):
+        digest.update(f"|{name}=".encode())
+        _hash_value(digest, params[name])
+    return digest.hexdigest()[:32]
+
+
+class ChartService:
+    """Renders charts to in-memory PNGs, keyed by a hash of their inputs.
+
+    Identical inputs map to the same key, so a chart is drawn once and served
+    from an LRU of encoded images until evicted; concurrent requests for a
+    chart being drawn wait for that render instead of starting another.
+    Drawing happens in a small process pool so matplotlib's global state and
+    the GIL never hold up request threads.
+    """
+
+    def __init__(self, max_bytes: int = CHART_CACHE_MAX_BYTES, processes: int = CHART_RENDER_PROCESSES):
+        self.max_bytes = max_bytes
+        self.processes = processes
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._executor = None
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.evictions = 0
+        self.total_render_seconds = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs threads (the server's pools) is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _draw(self, kind: str, params: dict) -> bytes:
+        if self.processes <= 0:
+            with self._render_lock:
+                return render_png(kind, params)
+        try:
+            return self._pool().submit(render_png, kind, params).result()
+        except BrokenProcessPool:
+            # A crashed worker takes the pool with it; start a fresh one next time
+            logging.error("Chart render process died; restarting the render pool")
+            with self._lock:
+                self._executor = None
+            raise
+
+    def render(self, kind: str, **params) -> ChartImage:
+        """The chart for these inputs, drawn now only if it is not already cached"""
+        if kind not in RENDERERS:
+            raise ValueError(f"Unknown chart kind: {kind}")
+        key = chart_key(kind, params)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+
+        started = time.perf_counter()
+        try:
+            image = ChartImage(key=key, data=self._draw(kind, params), created_at=time.time())
+        except Exception as e:
+            logging.error(f"Error rendering {kind} chart: {str(e)}")
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._pending[key]
+            self._store(image)
+            self.renders += 1
+            self.total_render_seconds += time.perf_counter() - started
+        pending.set_result(image)
+        return image
+
+    def _store(self, image: ChartImage):
+        self._images[image.key] = image
+        self._bytes += len(image.data)
+        while self._bytes > self.max_bytes and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            self._bytes -= len(evicted.data)
+            self.evictions += 1
+
+    def get(self, key: str):
+        """A previously rendered chart by key, or None once it has been evicted"""
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "images": len(self._images),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "processes": self.processes,
+            "rendering": len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "renders": self.renders,
+            "evictions": self.evictions,
+            "avg_render_ms": self.total_render_seconds / self.renders * 1000 if self.renders else 0.0,
+        }
+
+
+# Process-wide chart service shared by the API and the Streamlit app
+chart_service = ChartService()
@@ -1,106 +1,181 @@
 import warnings
-import yfinance as yf
 from datetime import datetime, timedelta
 import logging
-from GoogleNews import GoogleNews
 import re
-from transformers import (
-    pipeline,
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
-    AutoModelForQuestionAnswering,
-    AutoModelForCausalLM,
-    AutoModelForSeq2SeqLM
-)
-import torch
 import numpy as np
-from fuzzywuzzy import process
 import os
 import pandas as pd
-import ta
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
 import json
+from functools import partial
+from model_registry import PredictionModelRegistry, SHARED_MODEL_KEY, AUTO_REFRESH
+from market_data import (
+    normalize_symbols,
+    display_symbol,
+    download_history,
+    quotes_from_history,
+    get_quotes,
+    get_info,
+    cached_fundamentals,
+    get_fundamentals,
+    get_history,
+    get_ticker_data,
+    get_sector,
+    get_industry,
+    get_breadth,
+    get_index_constituents
+)
+from market_cache import market_cache
+from symbol_resolver import symbol_resolver
+from indicators import indicator_frame
+from indicator_state import indicator_store
+from market_snapshot import MarketSnapshotService
+from model_manager import get_pipeline
+from news_sources import get_news_source
+from instrumentation import span, timed
+from worker_pools import run_all
 
 warnings.filterwarnings("ignore")
 
+# Heavy libraries (TensorFlow, transformers, sklearn, GoogleNews)
+# are imported where they are first needed so the chatbot constructs instantly.
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# get_stock_details sections built from the info dict: section -> {field: (info key, default)}
+INFO_SECTIONS = {
+    "quote": {
+        "current_price": ("currentPrice", 0),
+        "day_high": ("dayHigh", 0),
+        "day_low": ("dayLow", 0),
+        "volume": ("volume", 0),
+        "previous_close": ("previousClose", 0),
+        "market_cap": ("marketCap", 0),
+        "fifty_two_week_high": ("fiftyTwoWeekHigh", 0),
+        "fifty_two_week_low": ("fiftyTwoWeekLow", 0),
+    },
+    "profile": {
+        "company_name": ("longName", None),
+        "sector": ("sector", ""),
+        "industry": ("industry", ""),
+        "currency": ("currency", "INR"),
+        "exchange": ("exchange", "NSE"),
+        "short_name": ("shortName", ""),
+        "long_name": ("longName", ""),
+        "website": ("website", ""),
+        "business_summary": ("longBusinessSummary", ""),
+    },
+    "valuation": {
+        "pe_ratio": ("trailingPE", 0),
+        "dividend_yield": ("dividendYield", 0),
+        "beta": ("beta", 0),
+        "forward_pe": ("forwardPE", 0),
+        "peg_ratio": ("pegRatio", 0),
+        "profit_margins": ("profitMargins", 0),
+        "operating_margins": ("operatingMargins", 0),
+        "revenue_growth": ("revenueGrowth", 0),
+        "earnings_growth": ("earningsGrowth", 0),
+    },
+    "analysts": {
+        "recommendation": ("recommendationKey", "neutral"),
+        "target_price": ("targetMeanPrice", 0),
+        "number_of_analysts": ("numberOfAnalystOpinions", 0),
+    },
+}
+
+# Sections backed by Ticker attributes: section -> (cache class, attribute or {field: attribute})
+TICKER_SECTIONS = {
+    "financial_data": ("financials", {
+        "balance_sheet": "balance_sheet",
+        "income_statement": "income_stmt",
+        "cash_flow": "cashflow",
+    }),
+    "recommendations": ("fundamentals", "recommendations"),
+    "earnings_dates": ("fundamentals", "earnings_dates"),
+    "sustainability": ("financials", "sustainability"),
+    "institutional_holders": ("financials", "institutional_holders"),
+    "major_holders": ("financials", "major_holders"),
+}
+
+STOCK_DETAIL_SECTIONS = tuple(INFO_SECTIONS) + tuple(TICKER_SECTIONS)
+
+
+def select_detail_sections(sections=None, fields=None) -> tuple:
+    """Resolve /stock ``sections=`` and ``fields=`` into (sections, fields).
+
+    ``fields`` may name info fields (current_price, pe_ratio, ...) or whole
+    Ticker sections; the sections that provide them are added. Returns
+    fields=None when every field of the selected sections is wanted. Raises
+    ValueError for unknown names.
+    """
+    selected = list(sections) if sections else []
+    unknown = [name for name in selected if name not in STOCK_DETAIL_SECTIONS]
+    wanted = None
+    if fields:
+        wanted = set()
+        field_sections = {field: section for section, mapping in INFO_SECTIONS.items() for field in mapping}
+        for field in fields:
+            if field in field_sections:
+                wanted.add(field)
+                section = field_sections[field]
+            elif field in TICKER_SECTIONS:
+                wanted.add(field)
+                section = field
+            else:
+                unknown.append(field)
+                continue
+            if section not in selected:
+                selected.append(section)
+        if sections:
+            # Whole sections asked for explicitly keep all of their fields
+            for section in sections:
+                wanted.update(INFO_SECTIONS.get(section, {section: None}))
+    if unknown:
+        raise ValueError(f"Unknown stock detail sections or fields: {', '.join(unknown)}")
+    return tuple(selected or STOCK_DETAIL_SECTIONS), wanted
+
+
+def format_ratio(value) -> str:
+    """A ratio such as P/E to two decimals; "N/A" while fundamentals are not fetched yet"""
+    if value is None or pd.isna(value):
+        return "N/A"
+    return f"{value:.2f}"
+
+
+def format_volume(value) -> str:
+    """Share volume with thousands separators (bulk quotes carry it as a float)"""
+    if value is None or pd.isna(value):
+        return "N/A"
+    return f"{int(value):,}"
+
+
 class IndianStockChatbot:
     def __init__(self):
         try:
             print("Initializing chatbot...")
             
-            # Initialize models
+            # Initialize models; shared per process and micro-batched per pipeline.
+            # 'intent' and 'sentiment' resolve to the same checkpoint and pipeline,
+            # and their results are cached on disk by text.
             self.models = {
-                'intent': pipeline("text-classification", model="distilbert-base-uncased-finetuned-sst-2-english"),
-                'sentiment': pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english"),
-                'text_qa': pipeline("question-answering", model="distilbert-base-cased-distilled-squad")
+                'intent': get_pipeline("text-classification", "distilbert-base-uncased-finetuned-sst-2-english",
+                                       cache_results=True),
+                'sentiment': get_pipeline("sentiment-analysis", "distilbert-base-uncased-finetuned-sst-2-english",
+                                          cache_results=True),
+                'text_qa': get_pipeline("question-answering", "distilbert-base-cased-distilled-squad")
             }
             
-            # Initialize prediction model
-            self.prediction_model = self._initialize_prediction_model()
+            # Prediction models are trained offline and loaded from the registry
+            self.model_registry = PredictionModelRegistry()
+            
+            # Market overview, rebuilt in the background (see market_snapshot)
+            self.market_snapshot = MarketSnapshotService(self.get_market_activity, self.is_market_open)
             
             # Initialize history
             self.history = []
             
-            # Common stock symbols mapping with aliases
-            self.stock_symbols = {
-                "reliance": "RELIANCE",
-                "reliance industries": "RELIANCE",
-                "ril": "RELIANCE",
-                "tcs": "TCS",
-                "tata consultancy": "TCS",
-                "tata consultancy services": "TCS",
-                "infosys": "INFY",
-                "infy": "INFY",
-                "hdfc bank": "HDFCBANK",
-                "hdfc": "HDFCBANK",
-                "icici bank": "ICICIBANK",
-                "icici": "ICICIBANK",
-                "wipro": "WIPRO",
-                "tata motors": "TATAMOTORS",
-                "tatamotors": "TATAMOTORS",
-                "tata steel": "TATASTEEL",
-                "tatasteel": "TATASTEEL",
-                "bharti airtel": "BHARTIARTL",
-                "airtel": "BHARTIARTL",
-                "sbi": "SBIN",
-                "state bank": "SBIN",
-                "state bank of india": "SBIN",
-                "axis bank": "AXISBANK",
-                "axis": "AXISBANK",
-                "kotak bank": "KOTAKBANK",
-                "kotak": "KOTAKBANK",
-                "asian paints": "ASIANPAINT",
-                "asian": "ASIANPAINT",
-                "bajaj auto": "BAJAJ-AUTO",
-                "bajaj": "BAJAJ-AUTO",
-                "hindalco": "HINDALCO",
-                "itc": "ITC",
-                "larsen": "LT",
-                "l&t": "LT",
-                "larsen and toubro": "LT",
-                "m&m": "M&M",
-                "mahindra": "M&M",
-                "maruti": "MARUTI",
-                "maruti suzuki": "MARUTI",
-                "nestle": "NESTLEIND",
-                "nestle india": "NESTLEIND",
-                "ongc": "ONGC",
-                "oil and natural gas": "ONGC",
-                "power grid": "POWERGRID",
-                "sun pharma": "SUNPHARMA",
-                "sun": "SUNPHARMA",
-                "titan": "TITAN",
-                "ultracemco": "ULTRACEMCO",
-                "ultra cement": "ULTRACEMCO"
-            }
-
             # Common market terms and their explanations
             self.market_terms = {
                 'nifty': 'Nifty is the benchmark stock market index of the National Stock Exchange (NSE) of India. It represents the weighted average of 50 of the largest Indian companies listed on the NSE.',
@@ -155,15 +230,18 @@ class IndianStockChatbot:
                 'sentiment': lambda x: [{'label': 'neutral', 'score': 1.0}],
                 'text_qa': lambda x: x[:200] + "..."
             }
-            self.prediction_model = None
+            self.model_registry = None
+            self.market_snapshot = MarketSnapshotService(self.get_market_activity, self.is_market_open)
             self.history = []
-            self.stock_symbols = {}
             self.market_terms = {}
             self.intent_patterns = {}
 
     def _initialize_prediction_model(self):
-        """Initialize the LSTM prediction model"""
+        """Build a fresh, untrained LSTM prediction model"""
         try:
+            from tensorflow.keras.models import Sequential
+            from tensorflow.keras.layers import LSTM, Dense, Dropout
+            
             model = Sequential([
                 LSTM(units=50, return_sequences=True, input_shape=(60, 5)),
                 Dropout(0.2),
@@ -177,82 +255,139 @@ class IndianStockChatbot:
             logging.error(f"Error initializing prediction model: {str(e)}")
             return None
 
-    def _prepare_prediction_data(self, symbol: str) -> tuple:
-        """Prepare data for prediction"""
+    def _prepare_prediction_data(self, symbol: str, scaler=None, latest_only: bool = False) -> tuple:
+        """Prepare data for prediction.
+
+        Returns (X, y, scaler, training_window). A fitted scaler is reused as-is;
+        otherwise a new one is fitted on the data. With latest_only only the most
+        recent sequence is built, which is all a forward pass needs.
+        """
         try:
+            from sklearn.preprocessing import MinMaxScaler
+            
+            symbol = symbol.replace('.NS', '')
+            
             # Get historical data
-            ticker = yf.Ticker(f"{symbol}.NS")
-            hist = ticker.history(period="1y")
+            hist = get_history(f"{symbol}.NS", period="1y")
             
-            # Calculate technical indicators
-            df = pd.DataFrame(hist)
-            df['RSI'] = ta.momentum.RSIIndicator(df['Close']).rsi()
-            df['MACD'] = ta.trend.MACD(df['Close']).macd()
-            df['MACD_Signal'] = ta.trend.MACD(df['Close']).macd_signal()
-            df['BB_Upper'] = ta.volatility.BollingerBands(df['Close']).bollinger_hband()
-            df['BB_Lower'] = ta.volatility.BollingerBands(df['Close']).bollinger_lband()
+            # Calculate technical indicators in one pass
+            df = pd.DataFrame(hist).join(indicator_frame(hist['Close']))
             
             # Prepare features
             features = ['Close', 'Volume', 'RSI', 'MACD', 'MACD_Signal']
+            df = df.dropna(subset=features)
             data = df[features].values
             
             # Normalize data
-            scaler = MinMaxScaler()
-            scaled_data = scaler.fit_transform(data)
+            if scaler is None:
+                scaler = MinMaxScaler()
+                scaled_data = scaler.fit_transform(data)
+            else:
+                scaled_data = scaler.transform(data)
             
             # Create sequences
             X, y = [], []
-            for i in range(60, len(scaled_data)):
-                X.append(scaled_data[i-60:i])
-                y.append(scaled_data[i, 0])
+            if latest_only:
+                if len(scaled_data) >= 60:
+                    X.append(scaled_data[-60:])
+            else:
+                for i in range(60, len(scaled_data)):
+                    X.append(scaled_data[i-60:i])
+                    y.append(scaled_data[i, 0])
+            
+            training_window = {
+                "start": df.index[0].strftime("%Y-%m-%d") if len(df) else None,
+                "end": df.index[-1].strftime("%Y-%m-%d") if len(df) else None,
+                "rows": int(len(df))
+            }
             
-            return np.array(X), np.array(y), scaler
+            return np.array(X), np.array(y), scaler, training_window
         except Exception as e:
             logging.error(f"Error preparing prediction data: {str(e)}")
-            return None, None, None
+            return None, None, None, None
+
+    def train_prediction_model(self, symbol: str) -> dict:
+        """Train and save a per-symbol prediction model (batch job / background refresh)"""
+        symbol = symbol.replace('.NS', '')
+        X, y, scaler, training_window = self._prepare_prediction_data(symbol)
+        if X is None or len(X) == 0:
+            raise ValueError(f"Not enough history to train a model for {symbol}")
+        return self.model_registry.train(
+            symbol, X, y, scaler, self._initialize_prediction_model, training_window
+        )
 
+    def train_shared_prediction_model(self, symbols: list) -> dict:
+        """Train one model on sequences from several symbols, each scaled on its own data"""
+        X_parts, y_parts, windows = [], [], {}
+        for symbol in symbols:
+            symbol = symbol.replace('.NS', '')
+            X, y, _, training_window = self._prepare_prediction_data(symbol)
+            if X is None or len(X) == 0:
+                logging.warning(f"Skipping {symbol}: not enough history")
+                continue
+            X_parts.append(X)
+            y_parts.append(y)
+            windows[symbol] = training_window
+        if not X_parts:
+            raise ValueError("No training data for the shared prediction model")
+        return self.model_registry.train(
+            SHARED_MODEL_KEY, np.concatenate(X_parts), np.concatenate(y_parts), None,
+            self._initialize_prediction_model, windows
+        )
+
+    def _predict_price(self, symbol: str):
+        """Forward pass through the registry model for a symbol; None if no model is available"""
+        if self.model_registry is None:
+            return None
+        symbol = symbol.replace('.NS', '')
+        entry = self.model_registry.load(symbol)
+        if entry is None:
+            # First-time training belongs to the offline job (python chatbot.py train SYMBOL)
+            return None
+        
+        model, scaler, metadata = entry
+        # Only a symbol's own model that has gone stale is refreshed here, never a missing one
+        if AUTO_REFRESH and metadata.get("key") == symbol and self.model_registry.is_stale(metadata):
+            self.model_registry.schedule_refresh(symbol, self.train_prediction_model)
+        
+        # Shared models carry no scaler; scale on the symbol's own data instead
+        X, _, scaler, _ = self._prepare_prediction_data(symbol, scaler=scaler, latest_only=True)
+        if X is None or len(X) == 0:
+            return None
+        
+        predicted = model(X[-1:], training=False).numpy()[0][0]
+        return scaler.inverse_transform([[predicted, 0, 0, 0, 0]])[0][0]
+
+    @timed("stage")
     def get_trading_signals(self, symbol: str) -> dict:
         """Generate trading signals using technical analysis and prediction"""
         try:
             if not symbol.endswith('.NS'):
                 symbol = f"{symbol}.NS"
             
-            # Get historical data
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="1y")
-            
-            # Calculate technical indicators
-            df = pd.DataFrame(hist)
-            df['RSI'] = ta.momentum.RSIIndicator(df['Close']).rsi()
-            df['MACD'] = ta.trend.MACD(df['Close']).macd()
-            df['MACD_Signal'] = ta.trend.MACD(df['Close']).macd_signal()
-            df['BB_Upper'] = ta.volatility.BollingerBands(df['Close']).bollinger_hband()
-            df['BB_Lower'] = ta.volatility.BollingerBands(df['Close']).bollinger_lband()
-            
-            # Get current values
-            current_price = df['Close'].iloc[-1]
-            current_rsi = df['RSI'].iloc[-1]
-            current_macd = df['MACD'].iloc[-1]
-            current_macd_signal = df['MACD_Signal'].iloc[-1]
+            # Latest indicator values from the per-symbol incremental state
+            latest = indicator_store.latest(symbol)
+            if latest is None:
+                return None
+            current_price = latest['price']
+            current_rsi = latest['rsi']
+            current_macd = latest['macd']
+            current_macd_signal = latest['macd_signal']
             
             # Generate signals
             signals = {
                 'RSI_Signal': 'Buy' if current_rsi < 30 else 'Sell' if current_rsi > 70 else 'Neutral',
                 'MACD_Signal': 'Buy' if current_macd > current_macd_signal else 'Sell',
-                'BB_Signal': 'Buy' if current_price < df['BB_Lower'].iloc[-1] else 'Sell' if current_price > df['BB_Upper'].iloc[-1] else 'Neutral'
+                'BB_Signal': 'Buy' if current_price < latest['bb_lower'] else 'Sell' if current_price > latest['bb_upper'] else 'Neutral'
             }
             
-            # Prepare prediction data
-            X, y, scaler = self._prepare_prediction_data(symbol)
-            if X is not None and self.prediction_model is not None:
-                # Train model on recent data
-                self.prediction_model.fit(X, y, epochs=10, batch_size=32, verbose=0)
-                
-                # Make prediction
-                last_sequence = X[-1:]
-                predicted_price = self.prediction_model.predict(last_sequence, verbose=0)
-                predicted_price = scaler.inverse_transform([[predicted_price[0][0], 0, 0, 0, 0]])[0][0]
-                
+            # Predict with the pre-trained model (forward pass only, no training here)
+            try:
+                predicted_price = self._predict_price(symbol)
+            except Exception as e:
+                logging.error(f"Error predicting price for {symbol}: {str(e)}")
+                predicted_price = None
+            if predicted_price is not None:
                 # Calculate predicted change
                 price_change = ((predicted_price - current_price) / current_price) * 100
                 
@@ -275,8 +410,8 @@ class IndianStockChatbot:
                     'RSI': current_rsi,
                     'MACD': current_macd,
                     'MACD_Signal': current_macd_signal,
-                    'BB_Upper': df['BB_Upper'].iloc[-1],
-                    'BB_Lower': df['BB_Lower'].iloc[-1]
+                    'BB_Upper': latest['bb_upper'],
+                    'BB_Lower': latest['bb_lower']
                 },
                 'last_updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
@@ -284,6 +419,7 @@ class IndianStockChatbot:
             logging.error(f"Error generating trading signals: {str(e)}")
             return None
 
+    @timed("stage")
     def clean_query(self, text):
         """Clean and normalize the query text"""
         text = text.lower()
@@ -291,6 +427,7 @@ class IndianStockChatbot:
         text = ' '.join(text.split())
         return text
 
+    @timed("stage")
     def classify_intent(self, query: str) -> tuple:
         """Enhanced intent classification with confidence scores"""
         try:
@@ -299,8 +436,11 @@ class IndianStockChatbot:
             base_intent = intent_result['label'].lower()
             confidence = intent_result['score']
             
-            # Get sentiment
-            sentiment_result = self.models['sentiment'](query)[0]
+            # Get sentiment; reuse the intent pass when both tasks share one model
+            if self.models['sentiment'] is self.models['intent']:
+                sentiment_result = intent_result
+            else:
+                sentiment_result = self.models['sentiment'](query)[0]
             sentiment = sentiment_result['label']
             
             # Pattern-based intent refinement
@@ -329,146 +469,115 @@ class IndianStockChatbot:
             logging.error(f"Error in intent classification: {str(e)}")
             return "general_query", 0.5, "neutral"
 
+    @timed("stage")
     def get_stock_symbol(self, user_input: str) -> str:
-        """Enhanced stock symbol detection with dynamic lookup"""
+        """Stock symbol named in a query, from the offline symbol index (see symbol_resolver)"""
         try:
-            # First try exact match from predefined symbols
-            for key, symbol in self.stock_symbols.items():
-                if key in user_input.lower():
-                    return symbol
-            
-            # Try fuzzy matching with predefined symbols
-            match, score = process.extractOne(user_input.lower(), self.stock_symbols.keys())
-            if score > 80:
-                return self.stock_symbols[match]
-            
-            # Try dynamic lookup using yfinance
-            try:
-                # Remove common words and clean the input
-                clean_input = re.sub(r'\b(stock|share|price|value|current|latest)\b', '', user_input.lower())
-                clean_input = clean_input.strip()
-                
-                # Try to get the stock info
-                ticker = yf.Ticker(f"{clean_input}.NS")
-                info = ticker.info
-                
-                if info and 'symbol' in info:
-                    # Add to stock_symbols for future use
-                    self.stock_symbols[clean_input] = info['symbol']
-                    return info['symbol']
-            except:
-                pass
-            
-            return None
+            ticker = symbol_resolver.resolve(user_input)
+            return display_symbol(ticker) if ticker else None
         except Exception as e:
             logging.error(f"Error in stock symbol detection: {str(e)}")
             return None
 
-    def get_stock_details(self, symbol: str) -> dict:
-        """Get comprehensive stock details using enhanced yfinance features"""
+    @timed("stage")
+    def get_stock_details(self, symbol: str, sections=STOCK_DETAIL_SECTIONS, fields=None,
+                          frames: bool = False) -> dict:
+        """Get stock details, fetching only the requested sections.
+
+        Sections (see INFO_SECTIONS and TICKER_SECTIONS) are fetched in
+        parallel, each cached for as long as its data stays current: the live
+        quote for seconds, ratios for hours, quarterly statements for a day.
+        ``fields`` optionally limits the result to those top-level keys.
+        With ``frames`` the Ticker tables are returned as DataFrames instead
+        of dicts, for callers that serialize them directly.
+        """
         try:
             if not symbol.endswith('.NS'):
                 symbol = f"{symbol}.NS"
             
-            ticker = yf.Ticker(symbol)
-            
-            # Get basic info
-            info = ticker.info
-            
-            # Get financial data
-            balance_sheet = ticker.balance_sheet
-            income_stmt = ticker.income_stmt
-            cash_flow = ticker.cashflow
-            
-            # Get recommendations
-            recommendations = ticker.recommendations
-            
-            # Get earnings dates
-            earnings_dates = ticker.earnings_dates
-            
-            # Get sustainability data
-            sustainability = ticker.sustainability
-            
-            # Get institutional holders
-            institutional_holders = ticker.institutional_holders
-            
-            # Get major holders
-            major_holders = ticker.major_holders
+            # The quote section needs the live info dict; the others accept slower-moving fundamentals
+            info_sections = [section for section in sections if section in INFO_SECTIONS]
+            ticker_sections = [section for section in sections if section in TICKER_SECTIONS]
+            loaders = {}
+            if info_sections:
+                loaders["info"] = (get_info if "quote" in info_sections else get_fundamentals, symbol)
+            for section in ticker_sections:
+                data_class, attributes = TICKER_SECTIONS[section]
+                if isinstance(attributes, dict):
+                    for attribute in attributes.values():
+                        loaders[attribute] = (get_ticker_data, symbol, attribute, data_class)
+                else:
+                    loaders[attributes] = (get_ticker_data, symbol, attributes, data_class)
+            
+            # Fetch every needed upstream resource at once on the shared network pool
+            calls = [partial(loader[0], *loader[1:]) for loader in loaders.values()]
+            fetched = dict(zip(loaders, run_all("io", calls)))
+            
+            def to_dict(data):
+                if data is None:
+                    return {}
+                return data if frames else data.to_dict()
+            
+            details = {}
+            info = fetched.get("info", {})
+            for section in info_sections:
+                for field, (key, default) in INFO_SECTIONS[section].items():
+                    details[field] = info.get(key, default)
+            if "company_name" in details and details["company_name"] is None:
+                details["company_name"] = symbol.replace('.NS', '')
+            for section in ticker_sections:
+                _, attributes = TICKER_SECTIONS[section]
+                if isinstance(attributes, dict):
+                    details[section] = {field: to_dict(fetched[attribute]) for field, attribute in attributes.items()}
+                else:
+                    details[section] = to_dict(fetched[attributes])
             
-            return {
-                "company_name": info.get("longName", symbol.replace('.NS', '')),
-                "current_price": info.get("currentPrice", 0),
-                "day_high": info.get("dayHigh", 0),
-                "day_low": info.get("dayLow", 0),
-                "volume": info.get("volume", 0),
-                "pe_ratio": info.get("trailingPE", 0),
-                "market_cap": info.get("marketCap", 0),
-                "previous_close": info.get("previousClose", 0),
-                "fifty_two_week_high": info.get("fiftyTwoWeekHigh", 0),
-                "fifty_two_week_low": info.get("fiftyTwoWeekLow", 0),
-                "dividend_yield": info.get("dividendYield", 0),
-                "beta": info.get("beta", 0),
-                "forward_pe": info.get("forwardPE", 0),
-                "peg_ratio": info.get("pegRatio", 0),
-                "profit_margins": info.get("profitMargins", 0),
-                "operating_margins": info.get("operatingMargins", 0),
-                "revenue_growth": info.get("revenueGrowth", 0),
-                "earnings_growth": info.get("earningsGrowth", 0),
-                "recommendation": info.get("recommendationKey", "neutral"),
-                "target_price": info.get("targetMeanPrice", 0),
-                "number_of_analysts": info.get("numberOfAnalystOpinions", 0),
-                "sector": info.get("sector", ""),
-                "industry": info.get("industry", ""),
-                "currency": info.get("currency", "INR"),
-                "exchange": info.get("exchange", "NSE"),
-                "short_name": info.get("shortName", ""),
-                "long_name": info.get("longName", ""),
-                "website": info.get("website", ""),
-                "business_summary": info.get("longBusinessSummary", ""),
-                "financial_data": {
-                    "balance_sheet": balance_sheet.to_dict() if balance_sheet is not None else {},
-                    "income_statement": income_stmt.to_dict() if income_stmt is not None else {},
-                    "cash_flow": cash_flow.to_dict() if cash_flow is not None else {}
-                },
-                "recommendations": recommendations.to_dict() if recommendations is not None else {},
-                "earnings_dates": earnings_dates.to_dict() if earnings_dates is not None else {},
-                "sustainability": sustainability.to_dict() if sustainability is not None else {},
-                "institutional_holders": institutional_holders.to_dict() if institutional_holders is not None else {},
-                "major_holders": major_holders.to_dict() if major_holders is not None else {}
-            }
+            if fields is not None:
+                details = {key: value for key, value in details.items() if key in fields}
+            return details
         except Exception as e:
             logging.error(f"Error fetching stock details: {str(e)}")
             return None
 
+    def _search_company_news(self, stock_name: str) -> list:
+        """Search today's news results for a company (Google News unless a replay provider is set)"""
+        search = get_news_source().search(stock_name, region='IN', today_only=True)
+        return search.page(1)[:5]  # Get latest 5 news items
+
+    @timed("stage")
     def fetch_company_news(self, stock_name: str) -> list:
         """Fetch and filter relevant company news"""
         try:
-            # Initialize GoogleNews with proper settings
-            googlenews = GoogleNews(lang='en', region='IN')
-            googlenews.set_time_range('1d', '1d')  # Only today's news
-            googlenews.search(stock_name)
-            news = googlenews.result()[:5]  # Get latest 5 news items
+            news = market_cache.get_or_load(
+                "news", ("company_news", stock_name), lambda: self._search_company_news(stock_name)
+            )
             
-            filtered_news = []
+            # Build the texts first so every article is classified in one batch
+            texts = []
             for article in news:
-                # Get full text for better analysis
                 title = article['title']
                 desc = article.get('desc', '')
-                text = f"{title}. {desc}"
-                
                 # Clean and normalize the text
-                text = re.sub(r'\s+', ' ', text).strip()
+                texts.append(re.sub(r'\s+', ' ', f"{title}. {desc}").strip())
+            
+            try:
+                sentiment_results = self.models['sentiment'](texts) if texts else []
+            except Exception as e:
+                logging.error(f"Error in sentiment analysis: {str(e)}")
+                sentiment_results = None
+            
+            # Additional context-based analysis
+            positive_words = ['up', 'rise', 'gain', 'positive', 'growth', 'profit', 'beat', 'surge', 'jump', 'higher']
+            negative_words = ['down', 'fall', 'loss', 'negative', 'decline', 'drop', 'miss', 'plunge', 'lower', 'worse']
+            
+            filtered_news = []
+            for i, article in enumerate(news):
+                title = article['title']
+                text = texts[i]
                 
-                # Analyze sentiment with proper error handling
-                try:
-                    # Use a more comprehensive analysis
-                    sentiment_result = self.models['sentiment'](text)[0]
-                    sentiment = sentiment_result['label']
-                    confidence = sentiment_result['score']
-                    
-                    # Additional context-based analysis
-                    positive_words = ['up', 'rise', 'gain', 'positive', 'growth', 'profit', 'beat', 'surge', 'jump', 'higher']
-                    negative_words = ['down', 'fall', 'loss', 'negative', 'decline', 'drop', 'miss', 'plunge', 'lower', 'worse']
+                if sentiment_results is not None:
+                    sentiment = sentiment_results[i]['label']
+                    confidence = sentiment_results[i]['score']
                     
                     # Count positive and negative words
                     pos_count = sum(1 for word in positive_words if word in text.lower())
@@ -484,9 +593,7 @@ class IndianStockChatbot:
                     else:
                         # Keep the model's sentiment if word counts are equal
                         confidence = max(confidence, 0.6)
-                        
-                except Exception as e:
-                    logging.error(f"Error in sentiment analysis: {str(e)}")
+                else:
                     sentiment = 'neutral'
                     confidence = 0.5
                 
@@ -522,9 +629,8 @@ class IndianStockChatbot:
             if not symbol.endswith('.NS'):
                 symbol = f"{symbol}.NS"
             
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            hist = ticker.history(period="1mo")
+            info = get_info(symbol)
+            hist = get_history(symbol, period="1mo")
             
             # Calculate basic trends
             current_price = info.get("currentPrice", 0)
@@ -558,23 +664,14 @@ class IndianStockChatbot:
             logging.error(f"Error fetching stock analysis: {str(e)}")
             return None
 
+    @timed("stage")
     def get_market_activity(self) -> dict:
         """Get overall market activity and indices using enhanced yfinance features"""
         try:
-            # Get Nifty 50 data
-            nifty = yf.Ticker("^NSEI")
-            nifty_data = nifty.history(period="1d")
-            nifty_info = nifty.info
-            
-            # Get Sensex data
-            sensex = yf.Ticker("^BSESN")
-            sensex_data = sensex.history(period="1d")
-            sensex_info = sensex.info
-            
             # Get market status
             market_status = "Open" if self.is_market_open() else "Closed"
             
-            # Get sector performance
+            # Sector indices to track
             sectors = {
                 "IT": "^CNXIT",
                 "Bank": "^NSEBANK",
@@ -583,51 +680,46 @@ class IndianStockChatbot:
                 "FMCG": "^CNXFMCG"
             }
             
+            # One bulk download for Nifty, Sensex and every sector index
+            history = download_history(["^NSEI", "^BSESN"] + list(sectors.values()), period="5d")
+            quotes = quotes_from_history(history)
+            nifty = quotes["^NSEI"]
+            sensex = quotes["^BSESN"]
+            
             sector_performance = {}
             for sector_name, sector_symbol in sectors.items():
-                try:
-                    sector_ticker = yf.Ticker(sector_symbol)
-                    sector_data = sector_ticker.history(period="1d")
-                    if not sector_data.empty:
-                        change_pct = ((sector_data['Close'].iloc[-1] - sector_data['Open'].iloc[0]) / 
-                                    sector_data['Open'].iloc[0]) * 100
-                        sector_performance[sector_name] = {
-                            "current": sector_data['Close'].iloc[-1],
-                            "change_pct": change_pct
-                        }
-                except Exception as e:
-                    logging.error(f"Error fetching {sector_name} sector data: {str(e)}")
-            
-            # Calculate changes
-            nifty_change = nifty_data['Close'].iloc[-1] - nifty_data['Open'].iloc[0]
-            nifty_change_pct = (nifty_change / nifty_data['Open'].iloc[0]) * 100
-            
-            sensex_change = sensex_data['Close'].iloc[-1] - sensex_data['Open'].iloc[0]
-            sensex_change_pct = (sensex_change / sensex_data['Open'].iloc[0]) * 100
+                quote = quotes.get(sector_symbol)
+                if quote is None:
+                    logging.error(f"Error fetching {sector_name} sector data: no data for {sector_symbol}")
+                    continue
+                sector_performance[sector_name] = {
+                    "current": quote["price"],
+                    "change_pct": quote["day_change_pct"]
+                }
             
             # Get advance-decline ratio
             advance_decline = self.get_advance_decline_ratio()
             
             return {
                 "nifty": {
-                    "current": nifty_data['Close'].iloc[-1],
-                    "change": nifty_change,
-                    "change_pct": nifty_change_pct,
-                    "high": nifty_data['High'].iloc[-1],
-                    "low": nifty_data['Low'].iloc[-1],
-                    "volume": nifty_data['Volume'].iloc[-1],
-                    "open": nifty_data['Open'].iloc[0],
-                    "prev_close": nifty_info.get("previousClose", 0)
+                    "current": nifty["price"],
+                    "change": nifty["day_change"],
+                    "change_pct": nifty["day_change_pct"],
+                    "high": nifty["high"],
+                    "low": nifty["low"],
+                    "volume": nifty["volume"],
+                    "open": nifty["open"],
+                    "prev_close": nifty["previous_close"]
                 },
                 "sensex": {
-                    "current": sensex_data['Close'].iloc[-1],
-                    "change": sensex_change,
-                    "change_pct": sensex_change_pct,
-                    "high": sensex_data['High'].iloc[-1],
-                    "low": sensex_data['Low'].iloc[-1],
-                    "volume": sensex_data['Volume'].iloc[-1],
-                    "open": sensex_data['Open'].iloc[0],
-                    "prev_close": sensex_info.get("previousClose", 0)
+                    "current": sensex["price"],
+                    "change": sensex["day_change"],
+                    "change_pct": sensex["day_change_pct"],
+                    "high": sensex["high"],
+                    "low": sensex["low"],
+                    "volume": sensex["volume"],
+                    "open": sensex["open"],
+                    "prev_close": sensex["previous_close"]
                 },
                 "market_status": market_status,
                 "advance_decline": advance_decline,
@@ -642,14 +734,14 @@ class IndianStockChatbot:
         """Get detailed data for a specific index"""
         try:
             if index_symbol.upper() == "NIFTY":
-                ticker = yf.Ticker("^NSEI")
+                ticker_symbol = "^NSEI"
             elif index_symbol.upper() == "SENSEX":
-                ticker = yf.Ticker("^BSESN")
+                ticker_symbol = "^BSESN"
             else:
                 return None
             
             # Get historical data
-            hist = ticker.history(period="1d")
+            hist = get_history(ticker_symbol, period="1d")
             
             # Calculate changes
             current = hist['Close'].iloc[-1]
@@ -676,30 +768,37 @@ class IndianStockChatbot:
             logging.error(f"Error fetching index data: {str(e)}")
             return None
 
+    @timed("stage")
     def get_portfolio_analysis(self, symbols: list) -> dict:
         """Analyze a portfolio of stocks"""
         try:
+            symbols = normalize_symbols(symbols)
+            quotes = get_quotes(symbols)
+            # P/E and market cap need one .info call per symbol: use what is cached, fill the rest later
+            fundamentals = cached_fundamentals(symbols)
+            
             portfolio = {}
             total_value = 0
             total_change = 0
             
             for symbol in symbols:
-                if not symbol.endswith('.NS'):
-                    symbol = f"{symbol}.NS"
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
+                quote = quotes.get(symbol)
+                if quote is None:
+                    logging.warning(f"No price data for {symbol}")
+                    continue
+                # None until the symbol's fundamentals have been fetched
+                info = fundamentals.get(symbol)
                 
-                current_price = info.get("currentPrice", 0)
-                prev_close = info.get("previousClose", 0)
-                change = current_price - prev_close
-                change_pct = (change / prev_close) * 100
+                current_price = quote["price"]
+                change = quote["change"]
+                change_pct = quote["change_pct"]
                 
-                portfolio[symbol.replace('.NS', '')] = {
+                portfolio[display_symbol(symbol)] = {
                     "price": current_price,
                     "change": change,
                     "change_pct": change_pct,
-                    "pe_ratio": info.get("trailingPE", 0),
-                    "market_cap": info.get("marketCap", 0)
+                    "pe_ratio": info.get("trailingPE", 0) if info is not None else None,
+                    "market_cap": info.get("marketCap", 0) if info is not None else None
                 }
                 
                 total_value += current_price
@@ -722,9 +821,7 @@ class IndianStockChatbot:
                 symbol = f"{symbol}.NS"
             
             # Get stock data
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="1d")
-            info = ticker.info
+            hist = get_history(symbol, period="1d")
             
             if hist.empty:
                 return {
@@ -733,24 +830,24 @@ class IndianStockChatbot:
                 }
             
             # Get analyst recommendations
-            recommendations = ticker.recommendations
-            recommendation_summary = ticker.recommendations_summary
+            recommendations = get_ticker_data(symbol, "recommendations")
+            recommendation_summary = get_ticker_data(symbol, "recommendations_summary")
             
             # Get earnings estimates
-            earnings_estimate = ticker.earnings_estimate
-            revenue_estimate = ticker.revenue_estimate
+            earnings_estimate = get_ticker_data(symbol, "earnings_estimate")
+            revenue_estimate = get_ticker_data(symbol, "revenue_estimate")
             
             # Get earnings history
-            earnings_history = ticker.earnings_history
+            earnings_history = get_ticker_data(symbol, "earnings_history")
             
             # Get EPS trend
-            eps_trend = ticker.eps_trend
+            eps_trend = get_ticker_data(symbol, "eps_trend")
             
             # Get EPS revisions
-            eps_revisions = ticker.eps_revisions
+            eps_revisions = get_ticker_data(symbol, "eps_revisions")
             
             # Get growth estimates
-            growth_estimates = ticker.growth_estimates
+            growth_estimates = get_ticker_data(symbol, "growth_estimates")
             
             # Calculate price change
             current_price = hist['Close'].iloc[-1]
@@ -827,33 +924,40 @@ class IndianStockChatbot:
             logging.error(f"Error in sentiment analysis: {str(e)}")
             return None
 
+    @timed("stage")
     def get_watchlist_analysis(self, symbols: list) -> dict:
         """Analyze stocks in watchlist"""
         try:
+            symbols = normalize_symbols(symbols)
+            quotes = get_quotes(symbols)
+            # P/E and market cap need one .info call per symbol: use what is cached, fill the rest later
+            fundamentals = cached_fundamentals(symbols)
+            
             watchlist = {}
             alerts = []
             
             for symbol in symbols:
-                if not symbol.endswith('.NS'):
-                    symbol = f"{symbol}.NS"
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
+                quote = quotes.get(symbol)
+                if quote is None:
+                    logging.warning(f"No price data for {symbol}")
+                    continue
+                # None until the symbol's fundamentals have been fetched
+                info = fundamentals.get(symbol)
                 
-                current_price = info.get("currentPrice", 0)
-                prev_close = info.get("previousClose", 0)
-                change = current_price - prev_close
-                change_pct = (change / prev_close) * 100
+                current_price = quote["price"]
+                change = quote["change"]
+                change_pct = quote["change_pct"]
                 
                 # Check for significant changes
                 if abs(change_pct) > 5:
-                    alerts.append(f"{symbol.replace('.NS', '')}: {change_pct:.2f}% change")
+                    alerts.append(f"{display_symbol(symbol)}: {change_pct:.2f}% change")
                 
-                watchlist[symbol.replace('.NS', '')] = {
+                watchlist[display_symbol(symbol)] = {
                     "price": current_price,
                     "change": change,
                     "change_pct": change_pct,
-                    "volume": info.get("volume", 0),
-                    "pe_ratio": info.get("trailingPE", 0)
+                    "volume": quote["volume"],
+                    "pe_ratio": info.get("trailingPE", 0) if info is not None else None
                 }
             
             return {
@@ -882,58 +986,40 @@ class IndianStockChatbot:
     def get_advance_decline_ratio(self) -> dict:
         """Get advance-decline ratio for the market"""
         try:
-            nifty = yf.Ticker("^NSEI")
-            components = nifty.info.get("components", [])
-            
-            advances = 0
-            declines = 0
-            
-            for symbol in components[:50]:  # Check top 50 stocks
-                if not symbol.endswith('.NS'):
-                    symbol = f"{symbol}.NS"
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                
-                if info.get("currentPrice", 0) > info.get("previousClose", 0):
-                    advances += 1
-                else:
-                    declines += 1
-            
-            return {
-                "advances": advances,
-                "declines": declines,
-                "ratio": advances / declines if declines > 0 else float('inf')
-            }
+            # Top 50 stocks in concurrent bulk chunks; a slow chunk only lowers coverage
+            components = get_index_constituents("^NSEI")
+            return get_breadth(components[:50])
         except Exception as e:
             logging.error(f"Error calculating advance-decline ratio: {str(e)}")
             return {"advances": 0, "declines": 0, "ratio": 0}
 
+    @timed("stage")
     def get_sector_analysis(self, sector_key: str) -> dict:
         """Get detailed analysis for a specific sector"""
         try:
-            sector = yf.Sector(sector_key)
+            sector = get_sector(sector_key)
             
             # Get sector overview
-            overview = sector.overview
+            overview = sector["overview"]
             
             # Get top companies
-            top_companies = sector.top_companies
+            top_companies = sector["top_companies"]
             
             # Get top ETFs
-            top_etfs = sector.top_etfs
+            top_etfs = sector["top_etfs"]
             
             # Get top mutual funds
-            top_mutual_funds = sector.top_mutual_funds
+            top_mutual_funds = sector["top_mutual_funds"]
             
             # Get industries in the sector
-            industries = sector.industries
+            industries = sector["industries"]
             
             # Get research reports
-            research_reports = sector.research_reports
+            research_reports = sector["research_reports"]
             
             return {
-                "name": sector.name,
-                "key": sector.key,
+                "name": sector["name"],
+                "key": sector["key"],
                 "overview": overview,
                 "top_companies": top_companies.to_dict() if top_companies is not None else {},
                 "top_etfs": top_etfs,
@@ -946,31 +1032,32 @@ class IndianStockChatbot:
             logging.error(f"Error in sector analysis: {str(e)}")
             return None
 
+    @timed("stage")
     def get_industry_analysis(self, industry_key: str) -> dict:
         """Get detailed analysis for a specific industry"""
         try:
-            industry = yf.Industry(industry_key)
+            industry = get_industry(industry_key)
             
             # Get industry overview
-            overview = industry.overview
+            overview = industry["overview"]
             
             # Get top companies
-            top_companies = industry.top_companies
+            top_companies = industry["top_companies"]
             
             # Get top performing companies
-            top_performing = industry.top_performing_companies
+            top_performing = industry["top_performing_companies"]
             
             # Get top growth companies
-            top_growth = industry.top_growth_companies
+            top_growth = industry["top_growth_companies"]
             
             # Get research reports
-            research_reports = industry.research_reports
+            research_reports = industry["research_reports"]
             
             return {
-                "name": industry.name,
-                "key": industry.key,
-                "sector_key": industry.sector_key,
-                "sector_name": industry.sector_name,
+                "name": industry["name"],
+                "key": industry["key"],
+                "sector_key": industry["sector_key"],
+                "sector_name": industry["sector_name"],
                 "overview": overview,
                 "top_companies": top_companies.to_dict() if top_companies is not None else {},
                 "top_performing_companies": top_performing.to_dict() if top_performing is not None else {},
@@ -982,6 +1069,7 @@ class IndianStockChatbot:
             logging.error(f"Error in industry analysis: {str(e)}")
             return None
 
+    @timed("stage")
     def generate_detailed_response(self, intent: str, data: dict, sentiment: str) -> str:
         """Generate detailed and natural responses with enhanced data"""
         try:
@@ -1051,7 +1139,7 @@ class IndianStockChatbot:
                 response = (
                     f"The current price of {data['company_name']} is ₹{data['current_price']:.2f}. "
                     f"Today's high is ₹{data['day_high']:.2f} and low is ₹{data['day_low']:.2f}. "
-                    f"Volume traded: {data['volume']:,}, P/E ratio: {data['pe_ratio']:.2f}, "
+                    f"Volume traded: {format_volume(data['volume'])}, P/E ratio: {format_ratio(data['pe_ratio'])}, "
                     f"Market Cap: ₹{data['market_cap']/10000000:.2f} Cr.\n\n"
                 )
                 
@@ -1165,7 +1253,7 @@ class IndianStockChatbot:
                         f"showing a {trend} trend with {abs(analysis['price_change_pct']):.2f}% change. "
                         f"The stock is trading {ma_trend} its 20-day moving average. "
                         f"Market cap: ₹{analysis['market_cap']/10000000:.2f} Cr, "
-                        f"P/E ratio: {analysis['pe_ratio']:.2f}. "
+                        f"P/E ratio: {format_ratio(analysis['pe_ratio'])}. "
                         f"Analyst recommendation: {analysis['recommendation']}.\n\n"
                     )
                     
@@ -1200,6 +1288,7 @@ class IndianStockChatbot:
             logging.error(f"Error generating response: {str(e)}")
             return "I'm having trouble understanding. Could you please rephrase your question?"
 
+    @timed("stage")
     def process_query(self, user_input: str) -> str:
         """Process user query with enhanced functionality"""
         try:
@@ -1216,7 +1305,8 @@ class IndianStockChatbot:
             
             # Check for sector performance queries
             if any(word in cleaned_query.lower() for word in ['sector performance', 'sector', 'sectors']):
-                data = self.get_market_activity()
+                snapshot = self.market_snapshot.latest()
+                data = snapshot.data if snapshot else None
                 if data and 'sector_performance' in data:
                     response = "Sector Performance:\n"
                     for sector, perf in data['sector_performance'].items():
@@ -1230,7 +1320,7 @@ class IndianStockChatbot:
             
             # Check for trading signal queries
             if any(phrase in cleaned_query.lower() for phrase in ['trading signal', 'buy signal', 'sell signal', 'when to buy', 'when to sell']):
-                symbol = self.get_stock_symbol(cleaned_query)
+                symbol = self.get_stock_symbol(user_input)
                 if symbol:
                     data = self.get_trading_signals(symbol)
                     if data:
@@ -1255,7 +1345,7 @@ class IndianStockChatbot:
                         response += f"\n{symbol}:\n"
                         response += f"Price: ₹{details['price']:.2f}\n"
                         response += f"Change: {details['change_pct']:+.2f}%\n"
-                        response += f"P/E Ratio: {details['pe_ratio']:.2f}\n"
+                        response += f"P/E Ratio: {format_ratio(details['pe_ratio'])}\n"
                     response += f"\nTotal Value: ₹{data['total_value']:.2f}"
                     response += f"\nTotal Change: {data['total_change_pct']:+.2f}%"
                     return response
@@ -1271,8 +1361,8 @@ class IndianStockChatbot:
                         response += f"\n{symbol}:\n"
                         response += f"Price: ₹{details['price']:.2f}\n"
                         response += f"Change: {details['change_pct']:+.2f}%\n"
-                        response += f"Volume: {details['volume']:,}\n"
-                        response += f"P/E Ratio: {details['pe_ratio']:.2f}\n"
+                        response += f"Volume: {format_volume(details['volume'])}\n"
+                        response += f"P/E Ratio: {format_ratio(details['pe_ratio'])}\n"
                     if data['alerts']:
                         response += "\nAlerts:\n"
                         for alert in data['alerts']:
@@ -1283,22 +1373,23 @@ class IndianStockChatbot:
             # Get intent and sentiment
             intent, confidence, sentiment = self.classify_intent(cleaned_query)
             
-            # Extract stock symbol
-            symbol = self.get_stock_symbol(cleaned_query)
+            # Extract stock symbol; from the original text, since master-file symbols match only in capitals
+            symbol = self.get_stock_symbol(user_input)
             
             # Get relevant data based on intent
             data = None
-            if intent == 'price_query' and symbol:
-                data = self.get_stock_details(symbol)
-            elif intent == 'news_query' and symbol:
-                data = self.fetch_company_news(symbol)
-            elif intent == 'term_query':
-                for term, explanation in self.market_terms.items():
-                    if term in cleaned_query:
-                        data = {'term': term, 'explanation': explanation}
-                        break
-            elif intent in ['analysis_query', 'summary_query'] and symbol:
-                data = {'symbol': symbol}
+            with span("stage", "fetch_data"):
+                if intent == 'price_query' and symbol:
+                    data = self.get_stock_details(symbol)
+                elif intent == 'news_query' and symbol:
+                    data = self.fetch_company_news(symbol)
+                elif intent == 'term_query':
+                    for term, explanation in self.market_terms.items():
+                        if term in cleaned_query:
+                            data = {'term': term, 'explanation': explanation}
+                            break
+                elif intent in ['analysis_query', 'summary_query'] and symbol:
+                    data = {'symbol': symbol}
             
             # Generate response
             if not symbol and intent in ['price_query', 'news_query', 'analysis_query', 'summary_query', 'sentiment_analysis']:
@@ -1331,6 +1422,29 @@ def main():
                 response_str = str(response)
             print(json.dumps({"text": response_str, "type": "text"}))
             sys.exit(0)
+        elif len(sys.argv) > 1 and sys.argv[1] == 'train':
+            # Batch training mode: python chatbot.py train [--shared] SYMBOL [SYMBOL ...]
+            args = sys.argv[2:]
+            shared = '--shared' in args
+            symbols = [arg.upper() for arg in args if arg != '--shared']
+            if not symbols:
+                print(json.dumps({"error": "At least one symbol is required"}))
+                sys.exit(1)
+            
+            chatbot = IndianStockChatbot()
+            results = {}
+            if shared:
+                metadata = chatbot.train_shared_prediction_model(symbols)
+                results[SHARED_MODEL_KEY] = metadata
+            else:
+                for symbol in symbols:
+                    try:
+                        results[symbol] = chatbot.train_prediction_model(symbol)
+                    except Exception as e:
+                        logging.error(f"Error training model for {symbol}: {str(e)}")
+                        results[symbol] = {"error": str(e)}
+            print(json.dumps(results, indent=2, default=str))
+            sys.exit(0)
         else:
             # Interactive mode
             print("Initializing chatbot...")
@@ -1367,4 +1481,4 @@ def main():
 if __name__ == "__main__":
     # Suppress TensorFlow warnings
     os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-    main() 
\ No newline at end of file
+    main()
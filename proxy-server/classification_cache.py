@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Persistent store of text-classification results, shared across restarts (and worker processes)
+CACHE_PATH = os.environ.get(
+    "CLASSIFICATION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cache", "classifications.sqlite3"),
+)
+CACHE_MAX_ENTRIES = int(os.environ.get("CLASSIFICATION_CACHE_MAX_ENTRIES", "200000"))
+CACHE_ENABLED = os.environ.get("CLASSIFICATION_CACHE_ENABLED", "1") == "1"
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of a text; case is kept because cased models care about it"""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def text_key(model_id: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model_id}:{digest}"
+
+
+class ClassificationCache:
+    """SQLite-backed cache of classification results keyed by (model id, text hash).
+
+    Entries remember when they were last used; once the cache grows past
+    ``max_entries`` the least recently used tenth is deleted.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._count = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS classifications ("
+                "key TEXT PRIMARY KEY, model_id TEXT NOT NULL, result TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS classifications_last_used ON classifications (last_used)")
+            self._count = conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: list) -> dict:
+        """Cached results for the given keys ({key: result}); missing keys are absent"""
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, result FROM classifications WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update((key, json.loads(result)) for key, result in rows)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE classifications SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model_id: str, results: dict):
+        """Store {key: result} for one model"""
+        if not results:
+            return
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO classifications (key, model_id, result, last_used) VALUES (?, ?, ?, ?)",
+                [(key, model_id, json.dumps(result), now) for key, result in results.items()],
+            )
+            self._count += conn.total_changes - before
+            if self._count > self.max_entries:
+                self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        excess = self._count - self.max_entries + max(1, self.max_entries // 10)
+        conn.execute(
+            "DELETE FROM classifications WHERE key IN "
+            "(SELECT key FROM classifications ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self._count = conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+        self.evictions += excess
+
+    def clear(self, model_id: str = None):
+        with self._lock:
+            conn = self._connection()
+            if model_id is None:
+                conn.execute("DELETE FROM classifications")
+            else:
+                conn.execute("DELETE FROM classifications WHERE model_id = ?", (model_id,))
+            conn.commit()
+            self._count = conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self._count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class CachedClassifier:
+    """Text-classification pipeline front that only sends unseen texts to the model.
+
+    Called like the pipeline it wraps: one text returns ``[result]``, a list
+    returns a list of results. Other attributes (``load``, ``loaded``,
+    ``stats``...) are those of the wrapped pipeline.
+    """
+
+    def __init__(self, pipeline, model_id: str, cache: ClassificationCache = None):
+        self.pipeline = pipeline
+        self.model_id = model_id
+        self.cache = cache or classification_cache
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    def __call__(self, inputs, **kwargs):
+        if kwargs:
+            return self.pipeline(inputs, **kwargs)
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        keys = [text_key(self.model_id, text) for text in texts]
+        try:
+            results = self.cache.get_many(list(dict.fromkeys(keys)))
+        except sqlite3.Error as e:
+            logging.error(f"Error reading classification cache: {str(e)}")
+            return self.pipeline(inputs)
+
+        # Classify each distinct unseen text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in results:
+                missing.setdefault(key, text)
+        if missing:
+            computed = dict(zip(missing, self.pipeline(list(missing.values()))))
+            results.update(computed)
+            try:
+                self.cache.put_many(self.model_id, computed)
+            except sqlite3.Error as e:
+                logging.error(f"Error writing classification cache: {str(e)}")
+        return [results[key] for key in keys]
+
+
+# Process-wide cache used by model_manager.get_pipeline(..., cache_results=True)
+classification_cache = ClassificationCache()
@@ -0,0 +1,330 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from instrumentation import timed
+from news_sources import GoogleNewsSource, NewsSearch, NewsSource
+
+# "live" talks to Yahoo Finance and Google News, "replay" serves recordings from DATA_REPLAY_DIR
+# and "record" does live calls while saving every response there
+DATA_PROVIDER = os.environ.get("DATA_PROVIDER", "live")
+DATA_REPLAY_DIR = os.environ.get(
+    "DATA_REPLAY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "replay"),
+)
+# Injected replay latency in seconds: one value for every call ("0.05"),
+# or per call kind ("download=0.3,info=0.1,news=0.5"; other kinds get none)
+DATA_REPLAY_LATENCY = os.environ.get("DATA_REPLAY_LATENCY", "0")
+
+
+def _yf():
+    """yfinance is imported on first data access, keeping module import cheap"""
+    import yfinance
+    return yfinance
+
+
+def parse_latency(spec: str) -> dict:
+    """Per-kind latency from a DATA_REPLAY_LATENCY string; the "*" entry applies to every kind"""
+    latency = {}
+    for part in (p.strip() for p in spec.split(",")):
+        if not part:
+            continue
+        kind, _, seconds = part.rpartition("=")
+        latency[kind or "*"] = float(seconds)
+    return latency
+
+
+class MarketDataProvider(ABC):
+    """Upstream market data and news, as used by market_data, price_store and news_sources.
+
+    Every method returns plain data (DataFrames, dicts, lists), so
+    responses can be recorded and replayed.
+    """
+    name = "provider"
+    # Whether daily history may be served from the local price store (a live upstream is slow)
+    use_price_store = True
+
+    @abstractmethod
+    def download(self, symbols: list, period: str, interval: str) -> pd.DataFrame:
+        """Bulk OHLCV bars, as yf.download(group_by='column', auto_adjust=True)"""
+        ...
+
+    @abstractmethod
+    def history(self, symbol: str, period: str = None, interval: str = "1d", start: str = None) -> pd.DataFrame:
+        """OHLCV bars of one symbol over a period, or from a start date (ISO string)"""
+        ...
+
+    @abstractmethod
+    def info(self, symbol: str) -> dict:
+        ...
+
+    @abstractmethod
+    def ticker_attribute(self, symbol: str, attribute: str):
+        """A Ticker attribute such as balance_sheet or major_holders"""
+        ...
+
+    @abstractmethod
+    def sector(self, sector_key: str, fields: tuple) -> dict:
+        ...
+
+    @abstractmethod
+    def industry(self, industry_key: str, fields: tuple) -> dict:
+        ...
+
+    @abstractmethod
+    def news_source(self) -> NewsSource:
+        ...
+
+
+class LiveProvider(MarketDataProvider):
+    name = "live"
+
+    @timed("upstream")
+    def download(self, symbols, period, interval):
+        return _yf().download(
+            symbols,
+            period=period,
+            interval=interval,
+            group_by='column',
+            auto_adjust=True,
+            threads=True,
+            progress=False,
+        )
+
+    @timed("upstream")
+    def history(self, symbol, period=None, interval="1d", start=None):
+        if start is not None:
+            return _yf().Ticker(symbol).history(start=start, interval=interval, auto_adjust=True)
+        return _yf().Ticker(symbol).history(period=period, interval=interval)
+
+    @timed("upstream")
+    def info(self, symbol):
+        return _yf().Ticker(symbol).info or {}
+
+    @timed("upstream")
+    def ticker_attribute(self, symbol, attribute):
+        return getattr(_yf().Ticker(symbol), attribute)
+
+    @timed("upstream")
+    def sector(self, sector_key, fields):
+        sector = _yf().Sector(sector_key)
+        return {field: getattr(sector, field) for field in fields}
+
+    @timed("upstream")
+    def industry(self, industry_key, fields):
+        industry = _yf().Industry(industry_key)
+        return {field: getattr(industry, field) for field in fields}
+
+    def news_source(self):
+        return GoogleNewsSource()
+
+
+class _Recordings:
+    """Pickled responses in a directory, one file per call, named by a hash of the call"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, kind: str, args: tuple) -> str:
+        digest = hashlib.sha256(repr(args).encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.directory, kind, f"{digest}.pkl")
+
+    def load(self, kind: str, args: tuple):
+        path = self.path(kind, args)
+        if not os.path.exists(path):
+            raise LookupError(f"No recorded {kind} response for {args!r}")
+        with open(path, "rb") as f:
+            return pickle.load(f)["value"]
+
+    def save(self, kind: str, args: tuple, value):
+        path = self.path(kind, args)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"kind": kind, "args": args, "value": value}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serves responses saved by RecordingProvider, offline and reproducibly.
+
+    Each call sleeps for its kind's injected latency first, so load tests
+    see upstream-like timings. Calls that were never recorded raise
+    LookupError (news pages return no articles), which callers handle like
+    any upstream failure. The price store is bypassed because it derives
+    download dates from today's date.
+    """
+    name = "replay"
+    use_price_store = False
+
+    def __init__(self, directory: str = DATA_REPLAY_DIR, latency=DATA_REPLAY_LATENCY):
+        self.recordings = _Recordings(directory)
+        self.latency = parse_latency(latency) if isinstance(latency, str) else dict(latency)
+        self.calls = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def _replay(self, kind: str, *args):
+        delay = self.latency.get(kind, self.latency.get("*", 0.0))
+        if delay:
+            time.sleep(delay)
+        with self._counter_lock:
+            self.calls += 1
+        try:
+            return self.recordings.load(kind, args)
+        except LookupError:
+            with self._counter_lock:
+                self.misses += 1
+            raise
+
+    @timed("upstream")
+    def download(self, symbols, period, interval):
+        return self._replay("download", tuple(symbols), period, interval)
+
+    @timed("upstream")
+    def history(self, symbol, period=None, interval="1d", start=None):
+        return self._replay("history", symbol, period, interval, start)
+
+    @timed("upstream")
+    def info(self, symbol):
+        return self._replay("info", symbol)
+
+    @timed("upstream")
+    def ticker_attribute(self, symbol, attribute):
+        return self._replay("ticker_attribute", symbol, attribute)
+
+    @timed("upstream")
+    def sector(self, sector_key, fields):
+        return self._replay("sector", sector_key, tuple(fields))
+
+    @timed("upstream")
+    def industry(self, industry_key, fields):
+        return self._replay("industry", industry_key, tuple(fields))
+
+    def news_source(self):
+        return _ReplayNewsSource(self)
+
+
+class RecordingProvider(MarketDataProvider):
+    """Passes calls to another provider (normally live) and saves each response for ReplayProvider.
+
+    The price store is bypassed, as in replay: through it daily history is
+    requested by start date, which replay (by period) would never ask for.
+    """
+    name = "record"
+    use_price_store = False
+
+    def __init__(self, inner: MarketDataProvider = None, directory: str = DATA_REPLAY_DIR):
+        self.inner = inner or LiveProvider()
+        self.recordings = _Recordings(directory)
+
+    def _record(self, kind: str, args: tuple, value):
+        try:
+            self.recordings.save(kind, args, value)
+        except Exception as e:
+            logging.error(f"Error recording {kind} response: {str(e)}")
+        return value
+
+    def download(self, symbols, period, interval):
+        return self._record("download", (tuple(symbols), period, interval),
+                            self.inner.download(symbols, period, interval))
+
+    def history(self, symbol, period=None, interval="1d", start=None):
+        return self._record("history", (symbol, period, interval, start),
+                            self.inner.history(symbol, period, interval, start))
+
+    def info(self, symbol):
+        return self._record("info", (symbol,), self.inner.info(symbol))
+
+    def ticker_attribute(self, symbol, attribute):
+        return self._record("ticker_attribute", (symbol, attribute), self.inner.ticker_attribute(symbol, attribute))
+
+    def sector(self, sector_key, fields):
+        return self._record("sector", (sector_key, tuple(fields)), self.inner.sector(sector_key, fields))
+
+    def industry(self, industry_key, fields):
+        return self._record("industry", (industry_key, tuple(fields)), self.inner.industry(industry_key, fields))
+
+    def news_source(self):
+        return _RecordingNewsSource(self.inner.news_source(), self)
+
+
+class _ReplayNewsSource(NewsSource):
+    name = "replay"
+
+    def __init__(self, provider: ReplayProvider):
+        self.provider = provider
+
+    def search(self, query, **options):
+        return _ReplayNewsSearch(self.provider, query, tuple(sorted(options.items())))
+
+
+class _ReplayNewsSearch(NewsSearch):
+    def __init__(self, provider: ReplayProvider, query: str, options: tuple):
+        self.provider = provider
+        self.query = query
+        self.options = options
+
+    def page(self, number):
+        try:
+            return [dict(article) for article in self.provider._replay("news", self.query, self.options, number)]
+        except LookupError:
+            return []
+
+
+class _RecordingNewsSource(NewsSource):
+    def __init__(self, inner: NewsSource, provider: RecordingProvider):
+        self.inner = inner
+        self.provider = provider
+        self.name = inner.name
+
+    def search(self, query, **options):
+        return _RecordingNewsSearch(self.inner.search(query, **options), self.provider, query,
+                                    tuple(sorted(options.items())))
+
+
+class _RecordingNewsSearch(NewsSearch):
+    def __init__(self, inner: NewsSearch, provider: RecordingProvider, query: str, options: tuple):
+        self.inner = inner
+        self.provider = provider
+        self.query = query
+        self.options = options
+
+    def page(self, number):
+        return self.provider._record("news", (self.query, self.options, number), self.inner.page(number))
+
+
+def _default_provider() -> MarketDataProvider:
+    if DATA_PROVIDER == "replay":
+        return ReplayProvider()
+    if DATA_PROVIDER == "record":
+        return RecordingProvider()
+    if DATA_PROVIDER != "live":
+        logging.error(f"Unknown DATA_PROVIDER {DATA_PROVIDER!r}, using live data")
+    return LiveProvider()
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> MarketDataProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _default_provider()
+    return _provider
+
+
+def set_provider(provider: MarketDataProvider) -> MarketDataProvider:
+    """Swap the process-wide provider (e.g. a ReplayProvider in benchmarks); returns the previous one"""
+    global _provider
+    previous, _provider = _provider, provider
+    return previous
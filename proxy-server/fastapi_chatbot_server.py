@@ -1,14 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-from Actual_Yf_StockRaj.AI_Chat.chatbot import IndianStockChatbot
-from Actual_Yf_StockRaj.SentimentAnalysis.sentiment_analysis import analyze_asset_sentiment
-import numpy as np
-import pandas as pd
-import yfinance as yf
+from Actual_Yf_StockRaj.AI_Chat.chatbot import IndianStockChatbot, select_detail_sections
+from Actual_Yf_StockRaj.SentimentAnalysis.sentiment_analysis import analyze_asset_sentiment_data, analyze_assets_sentiment_batch, stock_chart_image
+import asyncio
+import os
+import json
+import threading
 import time
-from functools import wraps
+from market_cache import market_cache
+from indicator_state import indicator_store
+from worker_pools import endpoint_limiter, pool_stats
+from model_manager import memory_report, model_status, warm_up
+from chart_service import chart_service
+from classification_cache import classification_cache
+from symbol_resolver import symbol_resolver
+from instrumentation import registry, start_trace
+from quote_stream import QuoteHub, parse_command
+from response_encoder import FRAME_LAYOUTS, encode
 
 app = FastAPI()
 
@@ -21,51 +32,90 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-chatbot = IndianStockChatbot()  # Load models ONCE at startup
-
-# Simple cache for yfinance data
-cache_store = {}
-
-def cache_result(ttl_seconds=120):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            key = (func.__name__, str(args), str(kwargs))
-            now = time.time()
-            if key in cache_store:
-                result, timestamp = cache_store[key]
-                if now - timestamp < ttl_seconds:
-                    return result
-            result = func(*args, **kwargs)
-            cache_store[key] = (result, now)
-            return result
-        return wrapper
-    return decorator
-
-# Improved utility function to handle numpy, pandas, NaN, inf, and out-of-range floats
-def to_serializable(val):
-    if isinstance(val, dict):
-        return {k: to_serializable(v) for k, v in val.items()}
-    elif isinstance(val, list):
-        return [to_serializable(v) for v in val]
-    elif isinstance(val, (np.integer, np.int64, np.int32)):
-        return int(val)
-    elif isinstance(val, (np.floating, np.float64, np.float32)):
-        if np.isnan(val) or np.isinf(val):
-            return None
-        return float(val)
-    elif isinstance(val, (np.ndarray,)):
-        return to_serializable(val.tolist())
-    elif isinstance(val, pd.DataFrame):
-        return to_serializable(val.to_dict())
-    elif isinstance(val, pd.Series):
-        return to_serializable(val.to_dict())
-    elif isinstance(val, float):
-        if np.isnan(val) or np.isinf(val):
-            return None
-        return val
-    else:
-        return val
+# Requests sending this header get a Server-Timing response header with their spans
+TRACE_HEADER = "x-trace-timing"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    trace = start_trace() if request.headers.get(TRACE_HEADER) else None
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template (/stock/{symbol}), not by raw path, to keep the label set small
+    route = request.scope.get("route")
+    registry.observe(
+        "http_request_duration_seconds",
+        (("method", request.method), ("route", getattr(route, "path", "unmatched")),
+         ("status", str(response.status_code))),
+        time.perf_counter() - started,
+    )
+    if trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+chatbot = IndianStockChatbot()  # Cheap: models load lazily, once per process
+
+# One shared upstream quote poll for every streaming client
+quote_hub = QuoteHub(is_open=chatbot.is_market_open)
+
+# SSE clients get a comment line at this interval so proxies keep the connection open
+STREAM_HEARTBEAT_SECONDS = 15
+
+# Load models in the background after startup so the server accepts requests immediately
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "1") == "1"
+
+@app.on_event("startup")
+def start_model_warmup():
+    if MODEL_WARMUP:
+        threading.Thread(target=warm_up, name="model-warmup", daemon=True).start()
+
+@app.on_event("startup")
+def start_symbol_index():
+    # Build the symbol index off the request path; the first lookup waits for it if needed
+    threading.Thread(target=symbol_resolver.load, name="symbol-index", daemon=True).start()
+
+@app.on_event("startup")
+def start_market_snapshot():
+    chatbot.market_snapshot.start()
+
+@app.on_event("shutdown")
+def stop_chart_workers():
+    chart_service.shutdown()
+
+# Per-endpoint concurrency limits: model-heavy endpoints share the CPU pool,
+# data-fetching endpoints the network pool, so neither can starve the other.
+limits = {
+    "process": endpoint_limiter("process", "cpu", 8),
+    "stock": endpoint_limiter("stock", "io", 16),
+    "market": endpoint_limiter("market", "io", 8),
+    "analysis": endpoint_limiter("analysis", "io", 16),
+    "sentiment": endpoint_limiter("sentiment", "cpu", 4),
+    "portfolio": endpoint_limiter("portfolio", "io", 8),
+    "watchlist": endpoint_limiter("watchlist", "io", 8),
+    "sector": endpoint_limiter("sector", "io", 8),
+    "industry": endpoint_limiter("industry", "io", 8),
+    "market_indices": endpoint_limiter("market_indices", "io", 16),
+    "sentiment_market": endpoint_limiter("sentiment_market", "cpu", 2),
+    "sentiment_articles": endpoint_limiter("sentiment_articles", "cpu", 2),
+    "sentiment_batch": endpoint_limiter("sentiment_batch", "io", 2),
+    # Chart threads mostly wait on the render processes
+    "charts": endpoint_limiter("charts", "io", 8),
+}
+
+# Largest number of assets accepted by /sentiment/batch
+MAX_BATCH_ASSETS = 100
+
+class FastJSONResponse(Response):
+    """JSON response rendered by response_encoder; returning it skips FastAPI's jsonable_encoder"""
+    media_type = "application/json"
+
+    def __init__(self, content=None, layout: str = "dict", **kwargs):
+        self.layout = layout
+        super().__init__(content, **kwargs)
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return encode(content, self.layout)
 
 class QueryRequest(BaseModel):
     query: str
@@ -76,143 +126,224 @@ class PortfolioRequest(BaseModel):
 class WatchlistRequest(BaseModel):
     symbols: List[str]
 
-@cache_result(ttl_seconds=120)
-def get_stock_history(symbol):
-    stock = yf.Ticker(symbol)
-    return stock.history(period="1mo")
+class SentimentBatchRequest(BaseModel):
+    assets: List[str]
+    max_articles: int = 10
+    include_articles: bool = False
 
 @app.post("/process")
-def process_query(req: QueryRequest):
-    response = chatbot.process_query(req.query)
+async def process_query(req: QueryRequest):
+    response = await limits["process"].run(chatbot.process_query, req.query)
     if isinstance(response, dict):
-        return to_serializable(response)
+        return FastJSONResponse(response)
     return {"text": response, "type": "text"}
 
+def _split_param(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
 @app.get("/stock/{symbol}")
-def get_stock(symbol: str):
-    result = chatbot.get_stock_details(symbol)
+async def get_stock(symbol: str, sections: Optional[str] = None, fields: Optional[str] = None,
+                    layout: str = "dict"):
+    # e.g. /stock/TCS?sections=quote,valuation or /stock/TCS?fields=current_price,pe_ratio
+    # layout=split or layout=records returns financial tables column-wise or row-wise
+    try:
+        selected, wanted = select_detail_sections(_split_param(sections), _split_param(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if layout not in FRAME_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of {', '.join(FRAME_LAYOUTS)}")
+    result = await limits["stock"].run(chatbot.get_stock_details, symbol, selected, wanted, True)
     if not result:
         raise HTTPException(status_code=404, detail=f"No data for symbol {symbol}")
-    return to_serializable(result)
+    return FastJSONResponse(result, layout=layout)
+
+# Serialized form of the latest market snapshot, rebuilt only when a new snapshot is published
+_market_payload = {"version": None, "body": None}
 
 @app.get("/market")
-def get_market():
-    result = chatbot.get_market_activity()
-    if not result:
+async def get_market():
+    snapshot = chatbot.market_snapshot.current if chatbot.market_snapshot.running else None
+    if snapshot is None:
+        # No refresher or no snapshot yet: build one in the worker pool
+        snapshot = await limits["market"].run(chatbot.market_snapshot.latest)
+    if snapshot is None:
         raise HTTPException(status_code=500, detail="Failed to get market data")
-    return to_serializable(result)
+    if _market_payload["version"] != snapshot.version:
+        _market_payload["body"] = encode(snapshot.data)
+        _market_payload["version"] = snapshot.version
+    return FastJSONResponse(_market_payload["body"])
 
 @app.get("/analysis/{symbol}")
-def get_analysis(symbol: str):
-    result = chatbot.get_stock_analysis(symbol)
+async def get_analysis(symbol: str):
+    result = await limits["analysis"].run(chatbot.get_stock_analysis, symbol)
     if not result:
         raise HTTPException(status_code=404, detail=f"No analysis for symbol {symbol}")
-    return to_serializable(result)
+    return FastJSONResponse(result)
 
 @app.get("/sentiment/{symbol}")
-def get_sentiment(symbol: str):
-    result = chatbot.get_sentiment_analysis(symbol)
+async def get_sentiment(symbol: str):
+    result = await limits["sentiment"].run(chatbot.get_sentiment_analysis, symbol)
     if not result:
         raise HTTPException(status_code=404, detail=f"No sentiment data for symbol {symbol}")
-    return to_serializable(result)
+    return FastJSONResponse(result)
 
 @app.post("/portfolio")
-def get_portfolio(req: PortfolioRequest):
-    result = chatbot.get_portfolio_analysis(req.symbols)
+async def get_portfolio(req: PortfolioRequest):
+    result = await limits["portfolio"].run(chatbot.get_portfolio_analysis, req.symbols)
     if not result:
         raise HTTPException(status_code=500, detail="Failed to analyze portfolio")
-    return to_serializable(result)
+    return FastJSONResponse(result)
 
 @app.post("/watchlist")
-def get_watchlist(req: WatchlistRequest):
-    result = chatbot.get_watchlist_analysis(req.symbols)
+async def get_watchlist(req: WatchlistRequest):
+    result = await limits["watchlist"].run(chatbot.get_watchlist_analysis, req.symbols)
     if not result:
         raise HTTPException(status_code=500, detail="Failed to analyze watchlist")
-    return to_serializable(result)
+    return FastJSONResponse(result)
 
 @app.get("/sector/{sector_key}")
-def get_sector(sector_key: str):
-    result = chatbot.get_sector_analysis(sector_key)
+async def get_sector(sector_key: str):
+    result = await limits["sector"].run(chatbot.get_sector_analysis, sector_key)
     if not result:
         raise HTTPException(status_code=404, detail=f"No data for sector {sector_key}")
-    return to_serializable(result)
+    return FastJSONResponse(result)
 
 @app.get("/industry/{industry_key}")
-def get_industry(industry_key: str):
-    result = chatbot.get_industry_analysis(industry_key)
+async def get_industry(industry_key: str):
+    result = await limits["industry"].run(chatbot.get_industry_analysis, industry_key)
     if not result:
         raise HTTPException(status_code=404, detail=f"No data for industry {industry_key}")
-    return to_serializable(result)
+    return FastJSONResponse(result)
+
+@app.get("/ready")
+def get_readiness():
+    models = model_status()
+    ready = all(models.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "models": models,
+            "prediction_models": chatbot.model_registry.status() if chatbot.model_registry else {}
+        }
+    )
+
+def png_response(chart, request: Request) -> Response:
+    """A rendered chart, or 304 when the client already holds this version"""
+    # Keys are content hashes, so a chart under a given key never changes
+    headers = {"ETag": chart.etag, "Cache-Control": "public, max-age=86400, immutable"}
+    if chart.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=chart.data, media_type=chart.content_type, headers=headers)
+
+@app.get("/charts/stock/{symbol}")
+async def get_stock_chart(symbol: str, request: Request, period: str = "1mo"):
+    chart = await limits["charts"].run(stock_chart_image, symbol, period)
+    if chart is None:
+        raise HTTPException(status_code=404, detail=f"No price data for {symbol}")
+    return png_response(chart, request)
+
+@app.get("/charts/{key}")
+def get_chart(key: str, request: Request):
+    # Charts rendered earlier (e.g. for the sentiment views), while they are in the LRU
+    chart = chart_service.get(key)
+    if chart is None:
+        raise HTTPException(status_code=404, detail="Chart not found or expired")
+    return png_response(chart, request)
+
+@app.get("/metrics")
+def get_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/cache")
+def get_cache_stats():
+    return market_cache.stats()
+
+@app.get("/stats/indicators")
+def get_indicator_stats():
+    return indicator_store.stats()
+
+@app.get("/stats/market-snapshot")
+def get_market_snapshot_stats():
+    return chatbot.market_snapshot.stats()
+
+@app.get("/stats/quote-stream")
+def get_quote_stream_stats():
+    return quote_hub.stats()
+
+@app.get("/stats/classification-cache")
+def get_classification_cache_stats():
+    return classification_cache.stats()
+
+@app.get("/stats/symbols")
+def get_symbol_stats():
+    return symbol_resolver.stats()
+
+@app.get("/stats/charts")
+def get_chart_stats():
+    return chart_service.stats()
+
+@app.get("/stats/workers")
+def get_worker_stats():
+    return pool_stats()
+
+@app.get("/stats/models")
+def get_model_stats():
+    return memory_report()
+
+def compute_market_indices(symbol: str) -> dict:
+    # Latest values from the symbol's incremental indicator state (seeded once, then O(1) per bar)
+    latest = indicator_store.latest(symbol)
+    if latest is None:
+        raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
+    
+    return {
+        "rsi": latest["rsi"],
+        "macd": {
+            "macd": latest["macd"],
+            "signal": latest["macd_signal"],
+            "histogram": latest["macd_histogram"]
+        },
+        "bollingerBands": {
+            "upper": latest["bb_upper"],
+            "middle": latest["bb_middle"],
+            "lower": latest["bb_lower"]
+        }
+    }
 
 @app.get("/market-indices/{symbol}")
 async def get_market_indices(symbol: str):
     try:
-        # Get stock data using yfinance (cached)
-        hist = get_stock_history(symbol)
-        if len(hist) == 0:
-            raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
-            
-        # Calculate technical indicators
-        # RSI
-        delta = hist['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        # MACD
-        exp1 = hist['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = hist['Close'].ewm(span=26, adjust=False).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=9, adjust=False).mean()
-        histogram = macd - signal
-        
-        # Bollinger Bands
-        sma = hist['Close'].rolling(window=20).mean()
-        std = hist['Close'].rolling(window=20).std()
-        upper_band = sma + (std * 2)
-        lower_band = sma - (std * 2)
-        
-        # Get the latest values
-        latest_rsi = rsi.iloc[-1]
-        latest_macd = macd.iloc[-1]
-        latest_signal = signal.iloc[-1]
-        latest_histogram = histogram.iloc[-1]
-        latest_upper = upper_band.iloc[-1]
-        latest_middle = sma.iloc[-1]
-        latest_lower = lower_band.iloc[-1]
-        
-        return {
-            "rsi": float(latest_rsi),
-            "macd": {
-                "macd": float(latest_macd),
-                "signal": float(latest_signal),
-                "histogram": float(latest_histogram)
-            },
-            "bollingerBands": {
-                "upper": float(latest_upper),
-                "middle": float(latest_middle),
-                "lower": float(latest_lower)
-            }
-        }
+        return await limits["market_indices"].run(compute_market_indices, symbol)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/sentiment/batch")
+async def get_sentiment_batch(req: SentimentBatchRequest):
+    if len(req.assets) > MAX_BATCH_ASSETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ASSETS} assets per batch")
+    if not 1 <= req.max_articles <= 50:
+        raise HTTPException(status_code=400, detail="max_articles must be between 1 and 50")
+    results = await limits["sentiment_batch"].run(
+        analyze_assets_sentiment_batch, req.assets, req.max_articles, include_articles=req.include_articles
+    )
+    return FastJSONResponse({"results": results})
+
 @app.get("/sentiment/market/{symbol}")
 async def get_market_sentiment(symbol: str):
     try:
-        # Get sentiment analysis data
-        articles_df, sentiment_summary, sentiment_bar_img, sentiment_gauge, stock_chart, ticker = analyze_asset_sentiment(symbol)
-        
-        # Calculate sentiment percentages
-        total_articles = len(articles_df)
-        positive_count = len(articles_df[articles_df['Sentiment'] == '🟢 Positive'])
-        neutral_count = len(articles_df[articles_df['Sentiment'] == '⚪ Neutral'])
-        negative_count = len(articles_df[articles_df['Sentiment'] == '🔴 Negative'])
+        # Headless analysis: scores only, no charts
+        data = await limits["sentiment_market"].run(analyze_asset_sentiment_data, symbol)
+        stats = data["summary"]
         
-        positive_pct = (positive_count / total_articles) * 100 if total_articles > 0 else 0
-        neutral_pct = (neutral_count / total_articles) * 100 if total_articles > 0 else 0
-        negative_pct = (negative_count / total_articles) * 100 if total_articles > 0 else 0
+        # Sentiment percentages
+        total_articles = stats["total_articles"]
+        positive_pct = stats["positive_pct"]
+        neutral_pct = stats["neutral_pct"]
+        negative_pct = stats["negative_pct"]
         
         # Calculate overall sentiment score (0-100)
         sentiment_score = (positive_pct * 1 + neutral_pct * 0.5)  # Weighted score
@@ -251,31 +382,99 @@ async def get_market_sentiment(symbol: str):
             "signalStrength": "Strong Buy" if sentiment_score >= 70 else "Buy" if sentiment_score >= 60 else "Neutral" if sentiment_score >= 40 else "Sell" if sentiment_score >= 30 else "Strong Sell",
             "totalArticles": total_articles
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/sentiment/articles/{symbol}")
 async def get_sentiment_articles(symbol: str):
     try:
-        # Get sentiment analysis data
-        articles_df, sentiment_summary, sentiment_bar_img, sentiment_gauge, stock_chart, ticker = analyze_asset_sentiment(symbol)
+        # Headless analysis: scores only, no charts
+        data = await limits["sentiment_articles"].run(analyze_asset_sentiment_data, symbol)
         
-        # Convert DataFrame to list of articles
+        # Newest ten articles, rounded like the Streamlit table
         articles = []
-        for _, row in articles_df.iterrows():
-            sentiment = row['Sentiment'].split()[1]  # Extract sentiment from emoji + text
+        for article in data["articles"][:10]:
             articles.append({
-                "sentiment": sentiment.lower(),
-                "title": row['Title'],
-                "description": row['Description'],
-                "date": row['Date'],
-                "baseScore": float(row['Base Score']),
-                "weight": float(row['Weight'].replace('x', '')),
-                "totalScore": float(row['Total Score'])
+                "sentiment": article["sentiment"]["label"].lower(),
+                "title": article.get("title", ""),
+                "description": article.get("desc", ""),
+                "date": article.get("date", ""),
+                "baseScore": round(article["base_score"], 2),
+                "weight": round(article["time_weight"] * 10, 1),
+                "totalScore": round(article["total_score"], 2)
             })
             
         return {
             "articles": articles
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@app.websocket("/ws/quotes")
+async def stream_quotes_ws(websocket: WebSocket):
+    """Live quotes over a WebSocket.
+
+    Clients send {"subscribe": [...]} or {"unsubscribe": [...]} messages and
+    receive {"quotes": {symbol: {changed fields}}}; the first message for a
+    symbol carries all of its fields.
+    """
+    await websocket.accept()
+    subscription = quote_hub.open()
+
+    async def receive_commands():
+        while True:
+            text = await websocket.receive_text()
+            try:
+                command = parse_command(json.loads(text))
+                subscription.subscribe(command.get("subscribe", []))
+                subscription.unsubscribe(command.get("unsubscribe", []))
+            except json.JSONDecodeError:
+                await websocket.send_json({"error": "Messages must be JSON"})
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+
+    receiver = asyncio.create_task(receive_commands())
+    try:
+        while True:
+            updater = asyncio.create_task(subscription.next_update(timeout=STREAM_HEARTBEAT_SECONDS))
+            done, _ = await asyncio.wait({receiver, updater}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                # Client went away
+                updater.cancel()
+                break
+            update = updater.result()
+            if update:
+                await websocket.send_json({"quotes": update})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        subscription.close()
+
+@app.get("/stream/quotes")
+async def stream_quotes_sse(symbols: str = Query(..., description="Comma-separated symbols")):
+    """Live quotes as Server-Sent Events, one "quotes" event per batch of changes"""
+    subscription = quote_hub.open()
+    try:
+        subscription.subscribe(symbols.split(","))
+    except ValueError as e:
+        subscription.close()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        try:
+            while True:
+                update = await subscription.next_update(timeout=STREAM_HEARTBEAT_SECONDS)
+                if update:
+                    yield f"event: quotes\ndata: {json.dumps(update, separators=(',', ':'))}\n\n"
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
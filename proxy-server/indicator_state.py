@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from indicators import IncrementalIndicators
+from market_data import download_history, get_history, normalize_symbol
+
+# History used to seed a symbol's state once; later bars come from the live quote download
+SEED_PERIOD = "1y"
+MAX_TRACKED_SYMBOLS = int(os.environ.get("INDICATOR_STATE_MAX_SYMBOLS", "2000"))
+
+
+def _bar_date(timestamp):
+    """Daily bars from Ticker.history (tz-aware) and yf.download (naive) compare by trading date"""
+    return pd.Timestamp(timestamp).date()
+
+
+def _closes(history: pd.DataFrame, symbol: str = None) -> pd.Series:
+    if history is None or history.empty:
+        return pd.Series(dtype=float)
+    closes = history['Close']
+    if isinstance(closes, pd.DataFrame):
+        if symbol not in closes.columns:
+            return pd.Series(dtype=float)
+        closes = closes[symbol]
+    return closes.dropna()
+
+
+class _SymbolState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indicators = None
+        self.last_date = None
+        self.last_price = None
+
+
+class IndicatorStore:
+    """Per-symbol RSI/MACD/Bollinger state, advanced as new daily bars arrive.
+
+    A symbol is seeded once from a year of history; after that each lookup
+    only applies the bars from the recent quote download: today's still-moving
+    bar is revised in place and a new session's bar is appended, both in O(1).
+    If the state has fallen further behind than the recent bars reach, it is
+    rebuilt from history.
+    """
+
+    def __init__(self, seed_period: str = SEED_PERIOD, max_symbols: int = MAX_TRACKED_SYMBOLS):
+        self.seed_period = seed_period
+        self.max_symbols = max_symbols
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"seeds": 0, "updates": 0, "revisions": 0}
+
+    def _state_for(self, symbol: str) -> _SymbolState:
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is None:
+                state = self._states[symbol] = _SymbolState()
+                while len(self._states) > self.max_symbols:
+                    self._states.popitem(last=False)
+            else:
+                self._states.move_to_end(symbol)
+            return state
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _seed(self, state: _SymbolState, symbol: str) -> bool:
+        closes = _closes(get_history(symbol, period=self.seed_period))
+        if closes.empty:
+            return False
+        state.indicators = IncrementalIndicators()
+        state.indicators.seed(closes.to_numpy(dtype=float))
+        state.last_date = _bar_date(closes.index[-1])
+        state.last_price = float(closes.iloc[-1])
+        self._count("seeds")
+        return True
+
+    def _apply(self, state: _SymbolState, closes: pd.Series) -> bool:
+        """Apply recent bars; False when they do not connect to the state"""
+        bars = [(_bar_date(ts), float(price)) for ts, price in closes.items()]
+        if bars and bars[0][0] > state.last_date:
+            return False
+        for date, price in bars:
+            if date < state.last_date:
+                continue
+            if date == state.last_date:
+                if price != state.last_price:
+                    state.indicators.revise(price)
+                    self._count("revisions")
+            else:
+                state.indicators.update(price)
+                self._count("updates")
+            state.last_date = date
+            state.last_price = price
+        return True
+
+    def latest(self, symbol: str) -> dict:
+        """Latest close, its date and indicator values for a symbol, or None without data"""
+        symbol = normalize_symbol(symbol)
+        state = self._state_for(symbol)
+        with state.lock:
+            try:
+                recent = _closes(download_history([symbol], period="5d", interval="1d"), symbol)
+                if state.indicators is None and not self._seed(state, symbol):
+                    return None
+                if not self._apply(state, recent):
+                    logging.info(f"Indicator state for {symbol} is behind the recent bars; reseeding")
+                    if not self._seed(state, symbol) or not self._apply(state, recent):
+                        return None
+                values = {name: float(value) for name, value in state.indicators.values().items()}
+                return dict(values, symbol=symbol, price=state.last_price, date=state.last_date.isoformat())
+            except Exception as e:
+                logging.error(f"Error updating indicator state for {symbol}: {str(e)}")
+                state.indicators = None
+                return None
+
+    def reset(self, symbol: str = None):
+        """Forget one symbol's state (or all), forcing a reseed on next use"""
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop(normalize_symbol(symbol), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, symbols=len(self._states), max_symbols=self.max_symbols)
+
+
+# Process-wide store shared by the chatbot and the API server
+indicator_store = IndicatorStore()
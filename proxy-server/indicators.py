@@ -0,0 +1,402 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_INDICATORS = ("rsi", "macd", "bollinger")
+
+RSI_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BB_WINDOW = 20
+BB_DEV = 2.0
+
+# Column names used by the chatbot and the prediction features
+FRAME_COLUMNS = {
+    "rsi": "RSI",
+    "macd": "MACD",
+    "macd_signal": "MACD_Signal",
+    "macd_histogram": "MACD_Histogram",
+    "bb_upper": "BB_Upper",
+    "bb_middle": "BB_Middle",
+    "bb_lower": "BB_Lower",
+}
+
+
+def _forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Carry the last price over missing bars; leading NaNs (not listed yet) stay NaN"""
+    rows = np.arange(prices.shape[0])[:, None]
+    last_valid = np.where(np.isnan(prices), 0, rows)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    return prices[last_valid, np.arange(prices.shape[1])]
+
+
+def _rolling_mean_std(prices: np.ndarray, counts: np.ndarray, window: int) -> tuple:
+    """Rolling mean and population std (ddof=0) from cumulative sums, NaN until the window is full"""
+    # Centre each column on its first price so the running sums stay well conditioned
+    first = prices[np.argmax(counts == 1, axis=0), np.arange(prices.shape[1])]
+    centred = np.nan_to_num(prices - np.nan_to_num(first))
+    zero = np.zeros((1, prices.shape[1]))
+    sums = np.concatenate([zero, np.cumsum(centred, axis=0)])
+    squares = np.concatenate([zero, np.cumsum(centred * centred, axis=0)])
+
+    window_sum = sums[window:] - sums[:-window]
+    window_squares = squares[window:] - squares[:-window]
+    mean = np.full(prices.shape, np.nan)
+    std = np.full(prices.shape, np.nan)
+    mean[window - 1:] = window_sum / window
+    std[window - 1:] = np.sqrt(np.maximum(window_squares / window - mean[window - 1:] ** 2, 0.0))
+
+    ready = counts >= window
+    mean = np.where(ready, mean + first, np.nan)
+    std = np.where(ready, std, np.nan)
+    return mean, std
+
+
+def compute_indicators(prices, indicators=DEFAULT_INDICATORS, rsi_window: int = RSI_WINDOW,
+                       macd_fast: int = MACD_FAST, macd_slow: int = MACD_SLOW,
+                       macd_signal: int = MACD_SIGNAL, bb_window: int = BB_WINDOW,
+                       bb_dev: float = BB_DEV) -> dict:
+    """Compute technical indicators for many symbols in one pass.
+
+    ``prices`` is a (bars, symbols) array of closes, oldest first (a 1-D array
+    is treated as one symbol). Missing bars may be NaN. All recursive
+    quantities (the MACD EMAs and Wilder's RSI averages) are advanced together
+    in a single loop over time, vectorized across symbols; rolling windows
+    come from cumulative sums. Results match the ``ta`` library defaults
+    (Wilder RSI, adjust=False EMAs, population-std Bollinger Bands), with the
+    same warm-up NaNs.
+
+    A single symbol's 1-D array, where the per-bar loop costs more than it
+    saves, goes through pandas' compiled ewm/rolling instead (same values).
+
+    Returns a dict of arrays shaped like ``prices`` keyed by rsi, macd,
+    macd_signal, macd_histogram, bb_upper, bb_middle and bb_lower, limited to
+    the requested indicators.
+    """
+    prices = np.asarray(prices, dtype=float)
+    squeeze = prices.ndim == 1
+    if squeeze:
+        return _compute_series(prices, set(indicators), rsi_window, macd_fast, macd_slow,
+                               macd_signal, bb_window, bb_dev)
+    indicators = set(indicators)
+    bars, symbols = prices.shape
+
+    prices = _forward_fill(prices)
+    started = ~np.isnan(prices)
+    counts = np.cumsum(started, axis=0)
+
+    want_rsi = "rsi" in indicators
+    want_macd = "macd" in indicators
+    results = {}
+
+    if want_rsi or want_macd:
+        fast_alpha = 2.0 / (macd_fast + 1)
+        slow_alpha = 2.0 / (macd_slow + 1)
+        signal_alpha = 2.0 / (macd_signal + 1)
+        rsi_alpha = 1.0 / rsi_window
+
+        ema_fast = np.full(symbols, np.nan)
+        ema_slow = np.full(symbols, np.nan)
+        signal = np.full(symbols, np.nan)
+        avg_gain = np.zeros(symbols)
+        avg_loss = np.zeros(symbols)
+        previous = np.full(symbols, np.nan)
+
+        macd_out = np.full((bars, symbols), np.nan)
+        signal_out = np.full((bars, symbols), np.nan)
+        gain_out = np.full((bars, symbols), np.nan)
+        loss_out = np.full((bars, symbols), np.nan)
+
+        for t in range(bars):
+            price = prices[t]
+            live = started[t]
+            first = live & (counts[t] == 1)
+
+            if want_macd:
+                ema_fast = np.where(first, price, fast_alpha * price + (1 - fast_alpha) * ema_fast)
+                ema_slow = np.where(first, price, slow_alpha * price + (1 - slow_alpha) * ema_slow)
+                macd = np.where(counts[t] >= macd_slow, ema_fast - ema_slow, np.nan)
+                # The signal EMA starts on the first defined MACD value
+                signal = np.where(counts[t] == macd_slow, macd,
+                                  signal_alpha * macd + (1 - signal_alpha) * signal)
+                macd_out[t] = macd
+                signal_out[t] = signal
+
+            if want_rsi:
+                change = np.where(first | ~live, 0.0, price - previous)
+                gain = np.maximum(change, 0.0)
+                loss = np.maximum(-change, 0.0)
+                avg_gain = np.where(live, rsi_alpha * gain + (1 - rsi_alpha) * avg_gain, avg_gain)
+                avg_loss = np.where(live, rsi_alpha * loss + (1 - rsi_alpha) * avg_loss, avg_loss)
+                gain_out[t] = avg_gain
+                loss_out[t] = avg_loss
+                previous = price
+
+        if want_macd:
+            signal_ready = counts >= macd_slow + macd_signal - 1
+            results["macd"] = np.where(counts >= macd_slow, macd_out, np.nan)
+            results["macd_signal"] = np.where(signal_ready, signal_out, np.nan)
+            results["macd_histogram"] = results["macd"] - results["macd_signal"]
+
+        if want_rsi:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = np.where(loss_out == 0, 100.0, 100.0 - 100.0 / (1.0 + gain_out / loss_out))
+            results["rsi"] = np.where(counts >= rsi_window, rsi, np.nan)
+
+    if "bollinger" in indicators:
+        mean, std = _rolling_mean_std(prices, counts, bb_window)
+        results["bb_middle"] = mean
+        results["bb_upper"] = mean + bb_dev * std
+        results["bb_lower"] = mean - bb_dev * std
+
+    return results
+
+
+def _compute_series(prices: np.ndarray, indicators: set, rsi_window: int, macd_fast: int,
+                    macd_slow: int, macd_signal: int, bb_window: int, bb_dev: float) -> dict:
+    """compute_indicators for one symbol: the recursive averages on pandas' compiled ewm"""
+    prices = _forward_fill(prices[:, None])
+    counts = np.cumsum(~np.isnan(prices), axis=0)
+    # Bars before the first price (not listed yet) stay NaN; after it there are no gaps
+    start = len(prices) - int(counts[-1, 0]) if len(prices) else 0
+    close = prices[start:, 0]
+    count = counts[start:, 0]
+
+    def ewm(values: np.ndarray, **params) -> np.ndarray:
+        return pd.Series(values).ewm(adjust=False, **params).mean().to_numpy(copy=True)
+
+    def padded(values: np.ndarray) -> np.ndarray:
+        out = np.full(len(prices), np.nan)
+        out[start:] = values
+        return out
+
+    results = {}
+    if "macd" in indicators:
+        line = ewm(close, span=macd_fast) - ewm(close, span=macd_slow)
+        line[count < macd_slow] = np.nan
+        # The signal EMA starts on the first defined MACD value
+        signal = np.full(len(close), np.nan)
+        if len(close) >= macd_slow:
+            signal[macd_slow - 1:] = ewm(line[macd_slow - 1:], span=macd_signal)
+        signal[count < macd_slow + macd_signal - 1] = np.nan
+        results["macd"] = padded(line)
+        results["macd_signal"] = padded(signal)
+        results["macd_histogram"] = results["macd"] - results["macd_signal"]
+
+    if "rsi" in indicators:
+        change = np.diff(close, prepend=close[:1])
+        avg_gain = ewm(np.maximum(change, 0.0), alpha=1.0 / rsi_window)
+        avg_loss = ewm(np.maximum(-change, 0.0), alpha=1.0 / rsi_window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        rsi[count < rsi_window] = np.nan
+        results["rsi"] = padded(rsi)
+
+    if "bollinger" in indicators and len(prices):
+        mean, std = _rolling_mean_std(prices, counts, bb_window)
+        results["bb_middle"] = mean[:, 0]
+        results["bb_upper"] = mean[:, 0] + bb_dev * std[:, 0]
+        results["bb_lower"] = mean[:, 0] - bb_dev * std[:, 0]
+    elif "bollinger" in indicators:
+        results["bb_middle"] = results["bb_upper"] = results["bb_lower"] = np.full(0, np.nan)
+    return results
+
+
+def indicator_frame(close: pd.Series, indicators=DEFAULT_INDICATORS) -> pd.DataFrame:
+    """Indicators for one close-price series as a frame (RSI, MACD, MACD_Signal, BB_Upper, ...)"""
+    results = compute_indicators(close.to_numpy(dtype=float), indicators)
+    return pd.DataFrame(
+        {FRAME_COLUMNS[name]: values for name, values in results.items()}, index=close.index
+    )
+
+
+def indicator_frames(closes: pd.DataFrame, indicators=DEFAULT_INDICATORS) -> dict:
+    """Indicators for a (date x symbol) close frame; one date x symbol frame per indicator"""
+    results = compute_indicators(closes.to_numpy(dtype=float), indicators)
+    return {
+        FRAME_COLUMNS[name]: pd.DataFrame(values, index=closes.index, columns=closes.columns)
+        for name, values in results.items()
+    }
+
+
+class _IncrementalIndicator:
+    """Base for indicators advanced one bar at a time.
+
+    ``update(price)`` appends a new bar; ``revise(price)`` replaces the newest
+    bar (a live bar whose price is still moving) by rolling back to the state
+    saved before it. Both are O(1) and return the current values.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._before_last = None
+
+    def update(self, price: float) -> dict:
+        self._before_last = self._save()
+        self._advance(float(price))
+        return self.values()
+
+    def revise(self, price: float) -> dict:
+        if self._before_last is None:
+            return self.update(price)
+        self._load(self._before_last)
+        self._advance(float(price))
+        return self.values()
+
+    def seed(self, prices) -> dict:
+        for price in prices:
+            self.update(price)
+        return self.values()
+
+
+class IncrementalRSI(_IncrementalIndicator):
+    """Wilder RSI (same values as compute_indicators)"""
+
+    def __init__(self, window: int = RSI_WINDOW):
+        super().__init__()
+        self.window = window
+        self.alpha = 1.0 / window
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.previous = None
+
+    def _save(self):
+        return self.count, self.avg_gain, self.avg_loss, self.previous
+
+    def _load(self, state):
+        self.count, self.avg_gain, self.avg_loss, self.previous = state
+
+    def _advance(self, price: float):
+        change = 0.0 if self.previous is None else price - self.previous
+        self.avg_gain = self.alpha * max(change, 0.0) + (1 - self.alpha) * self.avg_gain
+        self.avg_loss = self.alpha * max(-change, 0.0) + (1 - self.alpha) * self.avg_loss
+        self.previous = price
+        self.count += 1
+
+    def values(self) -> dict:
+        if self.count < self.window:
+            return {"rsi": np.nan}
+        if self.avg_loss == 0:
+            return {"rsi": 100.0}
+        return {"rsi": 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)}
+
+
+class IncrementalMACD(_IncrementalIndicator):
+    """MACD line, signal and histogram from adjust=False EMAs"""
+
+    def __init__(self, fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL):
+        super().__init__()
+        self.slow = slow
+        self.signal_window = signal
+        self.fast_alpha = 2.0 / (fast + 1)
+        self.slow_alpha = 2.0 / (slow + 1)
+        self.signal_alpha = 2.0 / (signal + 1)
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+
+    def _save(self):
+        return self.count, self.ema_fast, self.ema_slow, self.signal
+
+    def _load(self, state):
+        self.count, self.ema_fast, self.ema_slow, self.signal = state
+
+    def _advance(self, price: float):
+        self.count += 1
+        if self.ema_fast is None:
+            self.ema_fast = self.ema_slow = price
+        else:
+            self.ema_fast = self.fast_alpha * price + (1 - self.fast_alpha) * self.ema_fast
+            self.ema_slow = self.slow_alpha * price + (1 - self.slow_alpha) * self.ema_slow
+        if self.count >= self.slow:
+            macd = self.ema_fast - self.ema_slow
+            # The signal EMA starts on the first defined MACD value
+            if self.signal is None:
+                self.signal = macd
+            else:
+                self.signal = self.signal_alpha * macd + (1 - self.signal_alpha) * self.signal
+
+    def values(self) -> dict:
+        macd = self.ema_fast - self.ema_slow if self.count >= self.slow else np.nan
+        signal = self.signal if self.count >= self.slow + self.signal_window - 1 else np.nan
+        return {"macd": macd, "macd_signal": signal, "macd_histogram": macd - signal}
+
+
+class IncrementalBollinger(_IncrementalIndicator):
+    """Rolling mean +/- population std over a fixed window of closes"""
+
+    def __init__(self, window: int = BB_WINDOW, dev: float = BB_DEV):
+        super().__init__()
+        self.window = window
+        self.dev = dev
+        self.prices = deque(maxlen=window)
+        self.offset = None  # First price; sums are kept centred on it for precision
+        self.total = 0.0
+        self.squares = 0.0
+
+    def _save(self):
+        # Only the bar that left the window is needed to undo an update
+        dropped = self.prices[0] if len(self.prices) == self.window else None
+        return self.count, self.total, self.squares, dropped
+
+    def _load(self, state):
+        self.count, self.total, self.squares, dropped = state
+        self.prices.pop()
+        if dropped is not None:
+            self.prices.appendleft(dropped)
+
+    def _advance(self, price: float):
+        if self.offset is None:
+            self.offset = price
+        centred = price - self.offset
+        if len(self.prices) == self.window:
+            oldest = self.prices[0] - self.offset
+            self.total -= oldest
+            self.squares -= oldest * oldest
+        self.prices.append(price)
+        self.total += centred
+        self.squares += centred * centred
+        self.count += 1
+
+    def values(self) -> dict:
+        if self.count < self.window:
+            return {"bb_upper": np.nan, "bb_middle": np.nan, "bb_lower": np.nan}
+        mean = self.total / self.window
+        std = np.sqrt(max(self.squares / self.window - mean * mean, 0.0))
+        middle = mean + self.offset
+        return {"bb_upper": middle + self.dev * std, "bb_middle": middle, "bb_lower": middle - self.dev * std}
+
+
+class IncrementalIndicators:
+    """RSI, MACD and Bollinger Bands for one symbol, advanced bar by bar"""
+
+    def __init__(self):
+        self.parts = (IncrementalRSI(), IncrementalMACD(), IncrementalBollinger())
+
+    @property
+    def count(self) -> int:
+        return self.parts[0].count
+
+    def update(self, price: float) -> dict:
+        for part in self.parts:
+            part.update(price)
+        return self.values()
+
+    def revise(self, price: float) -> dict:
+        for part in self.parts:
+            part.revise(price)
+        return self.values()
+
+    def seed(self, prices) -> dict:
+        for price in prices:
+            self.update(price)
+        return self.values()
+
+    def values(self) -> dict:
+        """Latest values keyed like compute_indicators (rsi, macd, ..., bb_lower)"""
+        values = {}
+        for part in self.parts:
+            values.update(part.values())
+        return values
@@ -0,0 +1,133 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from instrumentation import span
+
+# How long the first request of a batch waits for others to join, and the largest batch run at once
+BATCH_WINDOW_MS = float(os.environ.get("INFERENCE_BATCH_WINDOW_MS", "5"))
+MAX_BATCH_SIZE = int(os.environ.get("INFERENCE_MAX_BATCH_SIZE", "32"))
+
+
+class MicroBatcher:
+    """Dynamic request batching in front of a Hugging Face pipeline.
+
+    Inputs submitted from any thread within a short window are stacked into
+    one padded batch, run through the pipeline together and the results are
+    handed back to each caller. Calling the batcher behaves like calling the
+    wrapped pipeline: a single input returns ``[result]`` (or the bare result
+    when ``wrap_single`` is False, as for question answering) and a list of
+    inputs returns a list of results.
+
+    Instead of a pipeline a ``loader`` may be given; it is called once, on
+    first use or from ``load()``, to build the pipeline lazily.
+    """
+
+    def __init__(self, pipeline, name: str, max_batch_size: int = MAX_BATCH_SIZE,
+                 window_ms: float = BATCH_WINDOW_MS, wrap_single: bool = True, loader=None,
+                 **call_kwargs):
+        if pipeline is None and loader is None:
+            raise ValueError("Either a pipeline or a loader is required")
+        self._pipeline = pipeline
+        self._loader = loader
+        self._load_lock = threading.Lock()
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = window_ms / 1000.0
+        self.wrap_single = wrap_single
+        self.call_kwargs = call_kwargs
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            with self._load_lock:
+                if self._pipeline is None:
+                    self._pipeline = self._loader()
+        return self._pipeline
+
+    @property
+    def loaded(self) -> bool:
+        return self._pipeline is not None
+
+    def load(self):
+        """Build the pipeline now (e.g. from a warm-up task) instead of on first use"""
+        return self.pipeline
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._worker, name=f"batcher-{self.name}", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, item) -> Future:
+        """Queue one input and return a future for its result"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, inputs, **kwargs):
+        # Caller-side time: queueing, batching and inference
+        with span("model", self.name):
+            if kwargs:
+                # Per-call options cannot be shared with a batch; run these directly
+                return self.pipeline(inputs, **dict(self.call_kwargs, **kwargs))
+            if isinstance(inputs, list):
+                futures = [self.submit(item) for item in inputs]
+                return [future.result() for future in futures]
+            result = self.submit(inputs).result()
+            return [result] if self.wrap_single else result
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            inputs = [item for item, _ in batch]
+            try:
+                with span("model_batch", self.name):
+                    outputs = self.pipeline(inputs, batch_size=len(inputs), **self.call_kwargs)
+                if not isinstance(outputs, list):
+                    outputs = [outputs]
+                if len(outputs) != len(inputs):
+                    raise RuntimeError(f"Pipeline returned {len(outputs)} results for {len(inputs)} inputs")
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                logging.error(f"Error running {self.name} batch of {len(inputs)}: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self.batches += 1
+            self.items += len(inputs)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "loaded": self.loaded,
+            "pending": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window * 1000,
+        }
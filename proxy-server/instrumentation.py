@@ -0,0 +1,179 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Timing spans are cheap (two clock reads and one short lock), so they are on by default
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+FAMILIES = {
+    "span_duration_seconds": ("histogram", "Time spent in chatbot stages, upstream data calls and model inference"),
+    "span_errors_total": ("counter", "Spans that ended with an exception"),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by route and status"),
+}
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Process-wide histograms and counters, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, family: str, labels: tuple, seconds: float):
+        index = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            histogram = self._histograms.get((family, labels))
+            if histogram is None:
+                histogram = self._histograms[(family, labels)] = Histogram()
+            histogram.counts[index] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    def increment(self, family: str, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._counters[(family, labels)] = self._counters.get((family, labels), 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        for family, (metric_type, help_text) in FAMILIES.items():
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {metric_type}")
+            for (name, labels), value in sorted(counters.items()):
+                if name == family:
+                    lines.append(f"{family}{_labels(labels)} {value}")
+            for (name, labels), (counts, total, count) in sorted(histograms.items()):
+                if name != family:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{family}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{family}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{family}_sum{_labels(labels)} {total}")
+                lines.append(f"{family}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+registry = MetricsRegistry()
+
+
+class Trace:
+    """Spans recorded for one request, reported in a Server-Timing header"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def server_timing(self) -> str:
+        # One entry per span name: total time, with the call count when it ran more than once
+        totals = {}
+        for kind, name, _, seconds in self.spans:
+            key = f"{kind}.{name}"
+            total, count = totals.get(key, (0.0, 0))
+            totals[key] = (total + seconds, count + 1)
+        entries = [
+            f'{key};dur={total * 1000:.1f}' + (f';desc="{count}x"' if count > 1 else "")
+            for key, (total, count) in totals.items()
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+def start_trace() -> Trace:
+    """Record this context's spans (and those of work it hands to threads via in_context)"""
+    trace = Trace()
+    _trace.set(trace)
+    return trace
+
+
+class span:
+    """Time a block: ``with span("stage", "classify_intent"): ...``
+
+    Durations go into the span_duration_seconds histogram labelled by kind
+    and name, exceptions into span_errors_total, and the span into the
+    current request's trace when one is being recorded.
+    """
+    __slots__ = ("kind", "name", "started")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not METRICS_ENABLED:
+            return False
+        elapsed = time.perf_counter() - self.started
+        labels = (("kind", self.kind), ("name", self.name))
+        registry.observe("span_duration_seconds", labels, elapsed)
+        if exc_type is not None:
+            registry.increment("span_errors_total", labels)
+        trace = _trace.get()
+        if trace is not None:
+            trace.spans.append((self.kind, self.name, self.started - trace.started, elapsed))
+        return False
+
+
+def timed(kind: str, name: str = None):
+    """Decorator form of span, named after the function unless a name is given"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(kind, span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def in_context(func):
+    """func bound to the caller's context, so spans it records in a pool thread reach the request trace"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so each call runs in its own copy
+        return context.copy().run(func, *args, **kwargs)
+    return run
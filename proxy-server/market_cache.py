@@ -0,0 +1,205 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Time-to-live in seconds for each class of data
+DEFAULT_TTLS = {
+    "quote": 15,                  # live prices, intraday bars, info dicts
+    "history": 15 * 60,           # daily OHLCV history
+    "news": 10 * 60,              # news search results
+    "fundamentals": 6 * 60 * 60,  # valuation ratios, analyst recommendations, estimates
+    "financials": 24 * 60 * 60,   # quarterly statements, holders, ESG scores
+    "sector": 24 * 60 * 60,       # sector / industry metadata
+}
+
+MAX_CACHE_BYTES = int(float(os.environ.get("MARKET_CACHE_MAX_MB", "256")) * 1024 * 1024)
+MAX_CACHE_ENTRIES = int(os.environ.get("MARKET_CACHE_MAX_ENTRIES", "10000"))
+
+
+def estimate_size(value, _depth: int = 0) -> int:
+    """Rough memory footprint of a cached value in bytes"""
+    if hasattr(value, "memory_usage"):  # pandas DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if hasattr(value, "nbytes"):  # numpy arrays
+        return int(value.nbytes)
+    size = sys.getsizeof(value, 64)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v, _depth + 1) for v in value)
+    return size
+
+
+class _InFlight:
+    """A load in progress that concurrent callers for the same key wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class MarketDataCache:
+    """Thread-safe TTL + LRU cache with a memory cap and single-flight loading.
+
+    Entries are grouped into data classes (see DEFAULT_TTLS) that decide how
+    long they stay fresh. When the cache exceeds its byte or entry budget the
+    least recently used entries are evicted. Concurrent misses for the same
+    key run the loader only once; the other callers wait for its result.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES, max_entries: int = MAX_CACHE_ENTRIES,
+                 ttls: dict = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._stats = {}
+
+    def _count(self, data_class: str, name: str, amount: int = 1):
+        counters = self._stats.setdefault(data_class, {
+            "hits": 0, "misses": 0, "loads": 0, "errors": 0, "waits": 0, "evictions": 0
+        })
+        counters[name] += amount
+
+    def get_or_load(self, data_class: str, key, loader, ttl: float = None):
+        """Return the cached value for key, calling loader() on a miss"""
+        if data_class not in self.ttls and ttl is None:
+            raise ValueError(f"Unknown cache data class: {data_class}")
+        full_key = (data_class, key)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(full_key)
+                    self._count(data_class, "hits")
+                    return entry[0]
+                self._remove(full_key)
+            self._count(data_class, "misses")
+
+            inflight = self._inflight.get(full_key)
+            if inflight is None:
+                inflight = self._inflight[full_key] = _InFlight()
+                leader = True
+            else:
+                self._count(data_class, "waits")
+                leader = False
+
+        if not leader:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.value
+
+        try:
+            value = loader()
+            inflight.value = value
+        except BaseException as e:
+            inflight.error = e
+            with self._lock:
+                self._count(data_class, "errors")
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(full_key, None)
+                if inflight.error is None:
+                    self._store(full_key, inflight.value, ttl if ttl is not None else self.ttls[data_class])
+                    self._count(data_class, "loads")
+            inflight.event.set()
+        return value
+
+    def peek(self, data_class: str, key):
+        """The fresh cached value for key, or None; never loads"""
+        full_key = (data_class, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._count(data_class, "misses")
+                return None
+            self._entries.move_to_end(full_key)
+            self._count(data_class, "hits")
+            return entry[0]
+
+    def _store(self, full_key, value, ttl: float):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logging.warning(f"Not caching {full_key[0]} entry of {size} bytes (over cache budget)")
+            return
+        if full_key in self._entries:
+            self._remove(full_key)
+        self._entries[full_key] = (value, time.monotonic() + ttl, size)
+        self._bytes += size
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._count(oldest_key[0], "evictions")
+
+    def _remove(self, full_key):
+        _, _, size = self._entries.pop(full_key)
+        self._bytes -= size
+
+    def invalidate(self, data_class: str, key=None):
+        """Drop one key, or a whole data class when key is None"""
+        with self._lock:
+            if key is not None:
+                if (data_class, key) in self._entries:
+                    self._remove((data_class, key))
+                return
+            for full_key in [k for k in self._entries if k[0] == data_class]:
+                self._remove(full_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters per data class plus current size"""
+        with self._lock:
+            per_class = {name: dict(counters) for name, counters in self._stats.items()}
+            for counters in per_class.values():
+                lookups = counters["hits"] + counters["misses"]
+                counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "classes": per_class,
+            }
+
+
+# Process-wide cache shared by the chatbot, sentiment analysis and the API server
+market_cache = MarketDataCache()
+
+
+def _freeze(value):
+    """Turn call arguments into a hashable cache key"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def cached(data_class: str, cache: MarketDataCache = None):
+    """Decorator caching a function's results in the shared market cache"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__module__, func.__qualname__, _freeze(args), _freeze(kwargs))
+            return (cache or market_cache).get_or_load(data_class, key, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
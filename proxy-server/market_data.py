@@ -0,0 +1,333 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from data_providers import get_provider
+from market_cache import market_cache
+from price_store import PRICE_STORE_ENABLED, period_start, price_store
+
+NSE_SUFFIX = ".NS"
+
+SECTOR_FIELDS = (
+    "name", "key", "overview", "top_companies", "top_etfs",
+    "top_mutual_funds", "industries", "research_reports"
+)
+INDUSTRY_FIELDS = (
+    "name", "key", "sector_key", "sector_name", "overview", "top_companies",
+    "top_performing_companies", "top_growth_companies", "research_reports"
+)
+
+# Upper bound on parallel background .info lookups; bulk price data never needs more than one request
+MAX_INFO_WORKERS = 8
+
+# Market breadth: symbols per bulk download, parallel downloads and how long a caller waits
+BREADTH_CHUNK_SIZE = int(os.environ.get("BREADTH_CHUNK_SIZE", "25"))
+BREADTH_WORKERS = int(os.environ.get("BREADTH_WORKERS", "4"))
+BREADTH_DEADLINE_SECONDS = float(os.environ.get("BREADTH_DEADLINE_SECONDS", "3"))
+
+# NIFTY 50 constituents, used when the index info does not list its components
+NIFTY50_SYMBOLS = (
+    "ADANIENT", "ADANIPORTS", "APOLLOHOSP", "ASIANPAINT", "AXISBANK", "BAJAJ-AUTO",
+    "BAJFINANCE", "BAJAJFINSV", "BEL", "BHARTIARTL", "CIPLA", "COALINDIA", "DRREDDY",
+    "EICHERMOT", "ETERNAL", "GRASIM", "HCLTECH", "HDFCBANK", "HDFCLIFE", "HEROMOTOCO",
+    "HINDALCO", "HINDUNILVR", "ICICIBANK", "INDUSINDBK", "INFY", "ITC", "JIOFIN",
+    "JSWSTEEL", "KOTAKBANK", "LT", "M&M", "MARUTI", "NESTLEIND", "NTPC", "ONGC",
+    "POWERGRID", "RELIANCE", "SBILIFE", "SBIN", "SHRIRAMFIN", "SUNPHARMA", "TATACONSUM",
+    "TATAMOTORS", "TATASTEEL", "TCS", "TECHM", "TITAN", "TRENT", "ULTRACEMCO", "WIPRO",
+)
+
+# Chunk downloads keep running after a caller's deadline and still fill the cache
+_breadth_executor = ThreadPoolExecutor(max_workers=BREADTH_WORKERS, thread_name_prefix="breadth")
+
+# Background .info lookups for cached_fundamentals, at most one pending per symbol
+_info_executor = ThreadPoolExecutor(max_workers=MAX_INFO_WORKERS, thread_name_prefix="info")
+_prefetching = set()
+_prefetch_lock = threading.Lock()
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Upper-case a symbol and add the NSE suffix (indices and .NS/.BO symbols are kept as-is)"""
+    symbol = symbol.strip().upper()
+    if symbol.startswith('^') or symbol.endswith(NSE_SUFFIX) or symbol.endswith('.BO'):
+        return symbol
+    return f"{symbol}{NSE_SUFFIX}"
+
+
+def display_symbol(symbol: str) -> str:
+    """Symbol as shown to users, without the NSE suffix"""
+    return symbol.replace(NSE_SUFFIX, '')
+
+
+def normalize_symbols(symbols) -> list:
+    """Normalize and deduplicate symbols, keeping their first-seen order"""
+    seen = {}
+    for symbol in symbols:
+        if symbol and symbol.strip():
+            seen.setdefault(normalize_symbol(symbol), None)
+    return list(seen)
+
+
+def _history_class(period: str, interval: str) -> str:
+    """Cache data class for a history request: intraday data goes stale in seconds"""
+    if interval.endswith(("m", "h")) or period in ("1d", "5d"):
+        return "quote"
+    return "history"
+
+
+def download_history(symbols, period: str = "1d", interval: str = "1d") -> pd.DataFrame:
+    """Fetch OHLCV bars for many symbols in one bulk request.
+
+    Returns a single frame aligned on one date index with (field, symbol)
+    MultiIndex columns, e.g. ``frame['Close']['TCS.NS']``. The frame is
+    shared through the cache and must not be modified.
+    """
+    symbols = normalize_symbols(symbols)
+    if not symbols:
+        return pd.DataFrame()
+    return market_cache.get_or_load(
+        _history_class(period, interval),
+        ("download", tuple(symbols), period, interval),
+        lambda: _download_history(symbols, period, interval),
+    )
+
+
+def _download_history(symbols: list, period: str, interval: str) -> pd.DataFrame:
+    try:
+        data = get_provider().download(symbols, period, interval)
+    except Exception as e:
+        logging.error(f"Error downloading history for {len(symbols)} symbols: {str(e)}")
+        return pd.DataFrame()
+
+    if data is None or data.empty:
+        return pd.DataFrame()
+    # Older yfinance versions return flat columns for a single symbol
+    if not isinstance(data.columns, pd.MultiIndex):
+        data.columns = pd.MultiIndex.from_product([data.columns, symbols])
+    return data
+
+
+def quotes_from_history(history: pd.DataFrame) -> dict:
+    """Latest bar per symbol plus the previous bar's close.
+
+    ``change``/``change_pct`` are measured against the previous close, while
+    ``day_change``/``day_change_pct`` are measured against today's open.
+    """
+    quotes = {}
+    if history.empty:
+        return quotes
+    closes = history['Close']
+    for symbol in closes.columns:
+        valid = closes[symbol].dropna()
+        if valid.empty:
+            continue
+        last_ts = valid.index[-1]
+        current = float(valid.iloc[-1])
+        previous_close = float(valid.iloc[-2]) if len(valid) > 1 else np.nan
+        open_price = float(history['Open'][symbol].get(last_ts, np.nan))
+        quotes[symbol] = {
+            "price": current,
+            "previous_close": previous_close,
+            "change": current - previous_close,
+            "change_pct": (current - previous_close) / previous_close * 100 if previous_close else np.nan,
+            "open": open_price,
+            "day_change": current - open_price,
+            "day_change_pct": (current - open_price) / open_price * 100 if open_price else np.nan,
+            "high": float(history['High'][symbol].get(last_ts, np.nan)),
+            "low": float(history['Low'][symbol].get(last_ts, np.nan)),
+            "volume": float(history['Volume'][symbol].get(last_ts, 0) or 0),
+            "timestamp": last_ts,
+        }
+    return quotes
+
+
+def get_quotes(symbols) -> dict:
+    """Latest quote for each symbol from a single bulk download of recent daily bars"""
+    return quotes_from_history(download_history(symbols, period="5d", interval="1d"))
+
+
+def _load_history(symbol: str, period: str, interval: str) -> pd.DataFrame:
+    # Daily bars over a fixed period come from the local store, which only downloads missing bars
+    provider = get_provider()
+    if (PRICE_STORE_ENABLED and provider.use_price_store and interval == "1d"
+            and _history_class(period, interval) == "history" and period_start(period) is not None):
+        try:
+            return price_store.history(symbol, period)
+        except Exception as e:
+            logging.error(f"Error reading {symbol} from the price store: {str(e)}")
+    return provider.history(symbol, period=period, interval=interval)
+
+
+def get_history(symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+    """OHLCV history for one symbol; returns a copy that callers may modify"""
+    hist = market_cache.get_or_load(
+        _history_class(period, interval),
+        ("history", symbol, period, interval),
+        lambda: _load_history(symbol, period, interval),
+    )
+    return hist.copy()
+
+
+# Live .info fields and the quote fields (see quotes_from_history) that replace them
+LIVE_INFO_FIELDS = {
+    "currentPrice": "price",
+    "regularMarketPrice": "price",
+    "previousClose": "previous_close",
+    "open": "open",
+    "dayHigh": "high",
+    "dayLow": "low",
+    "volume": "volume",
+}
+
+
+def get_info(symbol: str) -> dict:
+    """yfinance info dict for one symbol with its price fields kept live.
+
+    The info dict itself is the cached fundamentals entry (fetched once per
+    fundamentals TTL); price, previous close, open, day range and volume
+    are overlaid from the latest bulk quote, which is cached as a quote.
+    """
+    symbol = normalize_symbol(symbol)
+    info = dict(get_fundamentals(symbol))
+    quote = get_quotes([symbol]).get(symbol)
+    if quote is not None:
+        for field, quote_field in LIVE_INFO_FIELDS.items():
+            info[field] = quote[quote_field]
+    return info
+
+
+def get_fundamentals(symbol: str) -> dict:
+    """yfinance info dict for one symbol, cached for slow-moving fields (P/E, market cap, sector)"""
+    symbol = normalize_symbol(symbol)
+    return market_cache.get_or_load(
+        "fundamentals", ("info", symbol), lambda: get_provider().info(symbol)
+    )
+
+
+def get_ticker_data(symbol: str, attribute: str, data_class: str = "fundamentals"):
+    """A fundamentals attribute of a ticker such as balance_sheet or major_holders"""
+    return market_cache.get_or_load(
+        data_class, (attribute, symbol), lambda: get_provider().ticker_attribute(symbol, attribute)
+    )
+
+
+def get_sector(sector_key: str) -> dict:
+    """Sector overview, constituents and research from yf.Sector"""
+    return market_cache.get_or_load(
+        "sector", ("sector", sector_key), lambda: get_provider().sector(sector_key, SECTOR_FIELDS)
+    )
+
+
+def get_industry(industry_key: str) -> dict:
+    """Industry overview, constituents and research from yf.Industry"""
+    return market_cache.get_or_load(
+        "sector", ("industry", industry_key), lambda: get_provider().industry(industry_key, INDUSTRY_FIELDS)
+    )
+
+
+def cached_fundamentals(symbols) -> dict:
+    """Fundamentals info already in the cache, as {symbol: info}, without waiting on upstream.
+
+    yfinance has no bulk source for P/E or market cap, only one .info call
+    per symbol, so multi-symbol views take what is cached and the missing
+    symbols are fetched in the background for later requests.
+    """
+    symbols = normalize_symbols(symbols)
+    found = {}
+    for symbol in symbols:
+        info = market_cache.peek("fundamentals", ("info", symbol))
+        if info is not None:
+            found[symbol] = info
+        else:
+            _prefetch_fundamentals(symbol)
+    return found
+
+
+def _prefetch_fundamentals(symbol: str):
+    with _prefetch_lock:
+        if symbol in _prefetching:
+            return
+        _prefetching.add(symbol)
+
+    def fetch():
+        try:
+            get_fundamentals(symbol)
+        except Exception as e:
+            logging.error(f"Error fetching info for {symbol}: {str(e)}")
+        finally:
+            with _prefetch_lock:
+                _prefetching.discard(symbol)
+
+    _info_executor.submit(fetch)
+
+
+def _count_breadth(quotes: dict, symbols: list) -> dict:
+    advances = declines = unchanged = 0
+    for quote in quotes.values():
+        change = quote["price"] - quote["previous_close"]
+        if change > 0:
+            advances += 1
+        elif change < 0:
+            declines += 1
+        elif change == 0:
+            unchanged += 1
+    covered = advances + declines + unchanged
+    return {
+        "advances": advances,
+        "declines": declines,
+        "unchanged": unchanged,
+        "ratio": advances / declines if declines > 0 else float('inf'),
+        "covered": covered,
+        "total": len(symbols),
+        "coverage": covered / len(symbols) if symbols else 0.0,
+    }
+
+
+def _compute_breadth(symbols: list, deadline: float) -> dict:
+    chunks = [symbols[i:i + BREADTH_CHUNK_SIZE] for i in range(0, len(symbols), BREADTH_CHUNK_SIZE)]
+    futures = [_breadth_executor.submit(get_quotes, chunk) for chunk in chunks]
+    done, pending = wait(futures, timeout=deadline)
+    quotes = {}
+    for future in done:
+        try:
+            quotes.update(future.result())
+        except Exception as e:
+            logging.error(f"Error downloading breadth chunk: {str(e)}")
+    if pending:
+        logging.warning(f"Market breadth: {len(pending)} of {len(chunks)} chunks missed the {deadline}s deadline")
+    result = _count_breadth(quotes, symbols)
+    result["complete"] = not pending
+    return result
+
+
+def get_breadth(symbols, deadline: float = BREADTH_DEADLINE_SECONDS) -> dict:
+    """Advances, declines and unchanged over symbols, against the previous close.
+
+    Symbols are downloaded in concurrent bulk chunks; chunks that miss the
+    deadline are left out and ``coverage`` reports the share of symbols
+    counted. The result is cached for the current minute, except a partial
+    one, which is recomputed (usually from the by then cached chunks).
+    """
+    symbols = normalize_symbols(symbols)
+    minute = int(time.time() // 60)
+    key = ("breadth", tuple(symbols), minute)
+    result = market_cache.get_or_load("quote", key, lambda: _compute_breadth(symbols, deadline), ttl=60)
+    if not result["complete"]:
+        market_cache.invalidate("quote", key)
+    return result
+
+
+def get_index_constituents(index_symbol: str = "^NSEI") -> list:
+    """Index components from yfinance info, falling back to the static NIFTY 50 list"""
+    try:
+        components = get_fundamentals(index_symbol).get("components") or []
+    except Exception as e:
+        logging.error(f"Error fetching components of {index_symbol}: {str(e)}")
+        components = []
+    if not components and index_symbol == "^NSEI":
+        components = list(NIFTY50_SYMBOLS)
+    return normalize_symbols(components)
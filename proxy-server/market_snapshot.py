@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# Rebuild cadence while NSE is open and while it is closed
+OPEN_REFRESH_SECONDS = float(os.environ.get("MARKET_SNAPSHOT_OPEN_SECONDS", "15"))
+CLOSED_REFRESH_SECONDS = float(os.environ.get("MARKET_SNAPSHOT_CLOSED_SECONDS", "600"))
+
+# How often the refresher wakes up to check the clock and market status
+TICK_SECONDS = 5
+
+
+def freeze(value):
+    """Read-only deep view of snapshot data: dicts become mappingproxies and lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """One published market view; ``data`` is shared by all readers, so it is frozen (see freeze)"""
+    data: MappingProxyType
+    version: int
+    built_at: float
+    market_open: bool
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.built_at
+
+
+class MarketSnapshotService:
+    """Keeps a precomputed market snapshot fresh in a background thread.
+
+    ``build`` produces the snapshot data (e.g. get_market_activity) and
+    ``is_open`` tells whether the market is trading, which picks the refresh
+    cadence; the snapshot is also rebuilt as soon as the market opens or
+    closes. Readers get the latest published snapshot without doing any
+    work. Without a running refresher (e.g. the CLI), ``latest()`` rebuilds
+    inline once the snapshot is older than the current cadence.
+    """
+
+    def __init__(self, build, is_open, open_interval: float = OPEN_REFRESH_SECONDS,
+                 closed_interval: float = CLOSED_REFRESH_SECONDS):
+        self.build = build
+        self.is_open = is_open
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_build_seconds = 0.0
+
+    def _interval(self, market_open: bool) -> float:
+        return self.open_interval if market_open else self.closed_interval
+
+    def refresh(self, only_if_due: bool = False):
+        """Build and publish a new snapshot; the previous one stays if the build fails"""
+        with self._refresh_lock:
+            if only_if_due and not self._due(self._snapshot):
+                return self._snapshot
+            market_open = self.is_open()
+            started = time.perf_counter()
+            try:
+                data = self.build()
+            except Exception as e:
+                logging.error(f"Error building market snapshot: {str(e)}")
+                data = None
+            self.last_build_seconds = time.perf_counter() - started
+            if not data:
+                self.failures += 1
+                return self._snapshot
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._snapshot = MarketSnapshot(freeze(data), version, time.time(), market_open)
+            self.refreshes += 1
+            return self._snapshot
+
+    def _due(self, snapshot) -> bool:
+        if snapshot is None:
+            return True
+        market_open = self.is_open()
+        return market_open != snapshot.market_open or snapshot.age_seconds >= self._interval(market_open)
+
+    def _run(self):
+        last_attempt = 0.0
+        while not self._stop.is_set():
+            # After a failed build, wait a full open-market interval before retrying
+            if self._due(self._snapshot) and time.monotonic() - last_attempt >= self.open_interval:
+                last_attempt = time.monotonic()
+                self.refresh()
+            self._stop.wait(min(self.open_interval, TICK_SECONDS))
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background refresher (idempotent)"""
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="market-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def current(self) -> MarketSnapshot:
+        """The last published snapshot (possibly None) without ever building one"""
+        return self._snapshot
+
+    def latest(self) -> MarketSnapshot:
+        """The current snapshot, or None if none could be built yet"""
+        snapshot = self._snapshot
+        if snapshot is None or (not self.running and self._due(snapshot)):
+            snapshot = self.refresh(only_if_due=True)
+        return snapshot
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "running": self.running,
+            "version": snapshot.version if snapshot else None,
+            "age_seconds": snapshot.age_seconds if snapshot else None,
+            "market_open": snapshot.market_open if snapshot else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_build_seconds": self.last_build_seconds,
+            "open_interval": self.open_interval,
+            "closed_interval": self.closed_interval,
+        }
@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+
+from classification_cache import CACHE_ENABLED, CachedClassifier
+from inference_batcher import MicroBatcher
+
+# Pipeline tasks that are the same pipeline under another name
+TASK_ALIASES = {
+    "sentiment-analysis": "text-classification",
+}
+
+# Model head (transformers class name) needed for each pipeline task
+MODEL_CLASSES = {
+    "text-classification": "AutoModelForSequenceClassification",
+    "question-answering": "AutoModelForQuestionAnswering",
+}
+
+# Pipelines that return a bare result (not a one-element list) for a single input
+BARE_RESULT_TASKS = {"question-answering"}
+
+# Guards the registries below and is only held briefly; loading a checkpoint takes its own lock,
+# so status and other lookups never wait for from_pretrained
+_lock = threading.RLock()
+_models = {}     # (checkpoint, model class name) -> {"model", "tokenizer", "tasks", "load_seconds"}
+_loading_locks = {}  # (checkpoint, model class name) -> Lock serializing that checkpoint's load
+_pipelines = {}  # (task, checkpoint, device) -> MicroBatcher
+_cached = {}     # (task, checkpoint, device) -> CachedClassifier over the same MicroBatcher
+
+
+def resolve_device(device):
+    """Map "auto" to cuda when available; torch is only imported when a model loads"""
+    if device == "auto":
+        import torch
+
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return device
+
+
+def _loading_lock(key: tuple) -> threading.Lock:
+    with _lock:
+        lock = _loading_locks.get(key)
+        if lock is None:
+            lock = _loading_locks[key] = threading.Lock()
+        return lock
+
+
+def _load_model(checkpoint: str, task: str) -> dict:
+    class_name = MODEL_CLASSES[task]
+    key = (checkpoint, class_name)
+    with _loading_lock(key):
+        with _lock:
+            entry = _models.get(key)
+        if entry is None:
+            import transformers
+
+            logging.info(f"Loading model {checkpoint} ({class_name})")
+            started = time.perf_counter()
+            model_class = getattr(transformers, class_name)
+            entry = {
+                "model": model_class.from_pretrained(checkpoint),
+                "tokenizer": transformers.AutoTokenizer.from_pretrained(checkpoint),
+                "tasks": set(),
+            }
+            entry["load_seconds"] = time.perf_counter() - started
+        with _lock:
+            entry["tasks"].add(task)
+            _models[key] = entry
+        return entry
+
+
+def _build_pipeline(task: str, checkpoint: str, device):
+    from transformers import pipeline
+
+    entry = _load_model(checkpoint, task)
+    device = resolve_device(device)
+    logging.info(f"Building {task} pipeline for {checkpoint} on {device or 'default device'}")
+    return pipeline(task, model=entry["model"], tokenizer=entry["tokenizer"], device=device)
+
+
+def get_pipeline(task: str, checkpoint: str, device=None, cache_results: bool = False,
+                 **batch_kwargs) -> MicroBatcher:
+    """Return the shared, micro-batched pipeline for a task and checkpoint.
+
+    Nothing is loaded here: the pipeline is built on first use or by
+    ``warm_up()``. Each distinct checkpoint is loaded once per process, and
+    tasks that resolve to the same pipeline (e.g. "sentiment-analysis" and
+    "text-classification") get the very same object back, so callers can
+    detect the overlap with ``is`` and reuse one forward pass.
+
+    With ``cache_results`` (text classification only) the pipeline is fronted
+    by the persistent classification cache, so texts seen before never reach
+    the model; the cached front is shared the same way.
+    """
+    task = TASK_ALIASES.get(task, task)
+    key = (task, checkpoint, str(device))
+    with _lock:
+        batcher = _pipelines.get(key)
+        if batcher is None:
+            if task not in BARE_RESULT_TASKS:
+                batch_kwargs.setdefault("truncation", True)
+            batcher = MicroBatcher(
+                None, f"{task}:{checkpoint}", wrap_single=task not in BARE_RESULT_TASKS,
+                loader=lambda: _build_pipeline(task, checkpoint, device), **batch_kwargs
+            )
+            _pipelines[key] = batcher
+        if not (cache_results and CACHE_ENABLED):
+            return batcher
+        if task != "text-classification":
+            raise ValueError(f"Result caching is only supported for text classification, not {task}")
+        if key not in _cached:
+            _cached[key] = CachedClassifier(batcher, checkpoint)
+        return _cached[key]
+
+
+def warm_up():
+    """Load every registered pipeline; meant to run in a background thread at startup"""
+    with _lock:
+        batchers = list(_pipelines.values())
+    for batcher in batchers:
+        try:
+            batcher.load()
+        except Exception as e:
+            logging.error(f"Error warming up {batcher.name}: {str(e)}")
+    logging.info("Model warm-up finished")
+
+
+def model_status() -> dict:
+    """Which registered pipelines are loaded, for readiness checks"""
+    with _lock:
+        batchers = list(_pipelines.values())
+    return {batcher.name: batcher.loaded for batcher in batchers}
+
+
+def _model_bytes(model) -> tuple:
+    parameters = sum(p.numel() for p in model.parameters())
+    size = sum(p.numel() * p.element_size() for p in model.parameters())
+    size += sum(b.numel() * b.element_size() for b in model.buffers())
+    return parameters, size
+
+
+def memory_report() -> dict:
+    """Resident parameter/buffer memory of every loaded model"""
+    with _lock:
+        models = [(key, dict(entry, tasks=set(entry["tasks"]))) for key, entry in _models.items()]
+        batchers = list(_pipelines.values())
+    report = {}
+    for (checkpoint, class_name), entry in models:
+        parameters, size = _model_bytes(entry["model"])
+        report[f"{checkpoint} ({class_name})"] = {
+            "checkpoint": checkpoint,
+            "model_class": class_name,
+            "parameters": parameters,
+            "bytes": size,
+            "mb": round(size / (1024 * 1024), 1),
+            "load_seconds": round(entry["load_seconds"], 2),
+            "tasks": sorted(entry["tasks"]),
+        }
+    return {
+        "models": report,
+        "total_mb": round(sum(m["bytes"] for m in report.values()) / (1024 * 1024), 1),
+        "pipelines": {batcher.name: batcher.stats() for batcher in batchers},
+    }
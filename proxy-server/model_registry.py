@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Where trained prediction models live; one directory per symbol, one sub-directory per version
+MODEL_DIR = os.environ.get(
+    "PREDICTION_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "models"),
+)
+MAX_MODEL_AGE_HOURS = float(os.environ.get("PREDICTION_MODEL_MAX_AGE_HOURS", "24"))
+# Retrain stale per-symbol models in the background of the serving process (off: the
+# offline train job owns all training; models that were never trained are never fit here)
+AUTO_REFRESH = os.environ.get("PREDICTION_MODEL_AUTO_REFRESH", "0") == "1"
+
+# Key used for a single model trained across several symbols
+SHARED_MODEL_KEY = "_shared"
+
+# How long a loaded model is trusted before the LATEST pointer is re-read from disk
+RELOAD_CHECK_SECONDS = 60
+
+
+class PredictionModelRegistry:
+    """Versioned on-disk store for the LSTM price prediction models.
+
+    Models are trained offline (see ``chatbot.py train``) and only loaded at
+    serve time, so a request never pays for ``fit``.  Each version directory
+    holds the Keras model, the fitted scaler (per-symbol models only) and a
+    ``metadata.json`` describing the training window.
+    """
+
+    def __init__(self, root: str = MODEL_DIR, max_age_hours: float = MAX_MODEL_AGE_HOURS,
+                 keep_versions: int = 3):
+        self.root = root
+        self.max_age = timedelta(hours=max_age_hours)
+        self.keep_versions = keep_versions
+        self._loaded = {}  # key -> {"version", "model", "scaler", "metadata", "checked_at"}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refreshing = set()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-refresh")
+
+    def _key_dir(self, key: str) -> str:
+        return os.path.join(self.root, key.replace('.', '_'))
+
+    def latest_version(self, key: str):
+        """Return the latest saved version number for a key, or None"""
+        try:
+            with open(os.path.join(self._key_dir(key), "LATEST")) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def get_metadata(self, key: str, version: int = None):
+        """Read the metadata of a saved model version (latest by default)"""
+        if version is None:
+            version = self.latest_version(key)
+        if version is None:
+            return None
+        try:
+            with open(os.path.join(self._key_dir(key), f"v{version}", "metadata.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error reading model metadata for {key} v{version}: {str(e)}")
+            return None
+
+    def save(self, key: str, model, scaler, metadata: dict) -> dict:
+        """Persist a trained model as a new version and point LATEST at it"""
+        key_dir = self._key_dir(key)
+        os.makedirs(key_dir, exist_ok=True)
+        with self._lock:
+            version = (self.latest_version(key) or 0) + 1
+            tmp_dir = os.path.join(key_dir, f".v{version}.tmp")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+
+            model.save(os.path.join(tmp_dir, "model.keras"))
+            if scaler is not None:
+                with open(os.path.join(tmp_dir, "scaler.pkl"), "wb") as f:
+                    pickle.dump(scaler, f)
+
+            metadata = dict(metadata, key=key, version=version,
+                            trained_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                            has_scaler=scaler is not None)
+            with open(os.path.join(tmp_dir, "metadata.json"), "w") as f:
+                json.dump(metadata, f, indent=2, default=str)
+
+            # Publish atomically so readers never see a half-written version
+            os.replace(tmp_dir, os.path.join(key_dir, f"v{version}"))
+            latest_tmp = os.path.join(key_dir, "LATEST.tmp")
+            with open(latest_tmp, "w") as f:
+                f.write(str(version))
+            os.replace(latest_tmp, os.path.join(key_dir, "LATEST"))
+
+            self._prune(key_dir, version)
+            self._loaded.pop(key, None)
+
+        logging.info(f"Saved prediction model {key} v{version}")
+        return metadata
+
+    def _prune(self, key_dir: str, latest: int):
+        for name in os.listdir(key_dir):
+            if name.startswith("v") and name[1:].isdigit() and int(name[1:]) <= latest - self.keep_versions:
+                shutil.rmtree(os.path.join(key_dir, name), ignore_errors=True)
+
+    def train(self, key: str, X, y, scaler, build_model, training_window: dict,
+              epochs: int = 10, batch_size: int = 32) -> dict:
+        """Fit a fresh model on prepared sequences and save it as a new version"""
+        model = build_model()
+        if model is None:
+            raise RuntimeError("Prediction model could not be built")
+        history = model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=0)
+        losses = history.history.get("loss", [])
+        metadata = {
+            "training_window": training_window,
+            "samples": int(len(X)),
+            "sequence_length": int(X.shape[1]),
+            "features": int(X.shape[2]),
+            "epochs": epochs,
+            "batch_size": batch_size,
+            "final_loss": float(losses[-1]) if losses else None,
+        }
+        return self.save(key, model, scaler, metadata)
+
+    def load(self, key: str, fallback_to_shared: bool = True):
+        """Return (model, scaler, metadata) for a key, or None if nothing is trained.
+
+        Loaded models are kept in memory and only swapped when a newer version
+        has been published.
+        """
+        entry = self._load_key(key)
+        if entry is None and fallback_to_shared and key != SHARED_MODEL_KEY:
+            entry = self._load_key(SHARED_MODEL_KEY)
+        if entry is None:
+            return None
+        return entry["model"], entry["scaler"], entry["metadata"]
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _load_key(self, key: str):
+        now = time.monotonic()
+        entry = self._loaded.get(key)
+        if entry is not None and now - entry["checked_at"] < RELOAD_CHECK_SECONDS:
+            return entry
+
+        version = self.latest_version(key)
+        if version is None:
+            return None
+        if entry is not None and entry["version"] == version:
+            entry["checked_at"] = now
+            return entry
+
+        # Loads of one key are serialized; other keys stay available while a slow load runs
+        with self._key_lock(key):
+            entry = self._loaded.get(key)
+            if entry is not None and entry["version"] == version:
+                return entry
+            try:
+                from tensorflow.keras.models import load_model
+
+                version_dir = os.path.join(self._key_dir(key), f"v{version}")
+                model = load_model(os.path.join(version_dir, "model.keras"))
+                scaler = None
+                scaler_path = os.path.join(version_dir, "scaler.pkl")
+                if os.path.exists(scaler_path):
+                    with open(scaler_path, "rb") as f:
+                        scaler = pickle.load(f)
+                entry = {
+                    "version": version,
+                    "model": model,
+                    "scaler": scaler,
+                    "metadata": self.get_metadata(key, version) or {},
+                    "checked_at": now,
+                }
+                self._loaded[key] = entry
+                logging.info(f"Loaded prediction model {key} v{version}")
+                return entry
+            except Exception as e:
+                logging.error(f"Error loading prediction model {key} v{version}: {str(e)}")
+                return None
+
+    def is_stale(self, metadata: dict) -> bool:
+        """Check whether a model is older than the configured maximum age"""
+        try:
+            trained_at = datetime.strptime(metadata["trained_at"], "%Y-%m-%d %H:%M:%S")
+        except (KeyError, TypeError, ValueError):
+            return True
+        return datetime.now() - trained_at > self.max_age
+
+    def schedule_refresh(self, key: str, refresh_fn) -> bool:
+        """Retrain an existing model in the background; at most one pending refresh per key"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                refresh_fn(key)
+            except Exception as e:
+                logging.error(f"Error refreshing prediction model {key}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_executor.submit(run)
+        return True
+
+    def status(self) -> dict:
+        """Summarize every trained model on disk"""
+        models = {}
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                metadata = self.get_metadata(name)
+                if metadata:
+                    models[name] = {
+                        "version": metadata.get("version"),
+                        "trained_at": metadata.get("trained_at"),
+                        "training_window": metadata.get("training_window"),
+                        "stale": self.is_stale(metadata),
+                        "loaded": name in self._loaded,
+                    }
+        return models
@@ -0,0 +1,217 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import in_context, span
+
+# Pages fetched at once, across all searches and per search
+NEWS_PAGE_WORKERS = int(os.environ.get("NEWS_PAGE_WORKERS", "8"))
+NEWS_PAGE_CONCURRENCY = int(os.environ.get("NEWS_PAGE_CONCURRENCY", "3"))
+NEWS_MAX_PAGES = int(os.environ.get("NEWS_MAX_PAGES", "10"))
+
+# "provider" takes news from the market data provider (Google News when live, recordings
+# when replaying); "google" always scrapes Google News; "local" serves the JSON feed at NEWS_LOCAL_PATH
+NEWS_SOURCE = os.environ.get("NEWS_SOURCE", "provider")
+NEWS_LOCAL_PATH = os.environ.get("NEWS_LOCAL_PATH", "")
+
+_page_executor = ThreadPoolExecutor(max_workers=NEWS_PAGE_WORKERS, thread_name_prefix="news-page")
+
+
+class NewsSource(ABC):
+    """Where articles come from: ``search(query)`` returns a NewsSearch for that query.
+
+    Options are hints a source may ignore: ``region`` (e.g. "IN") and
+    ``today_only``.
+    """
+    name = "news"
+
+    @abstractmethod
+    def search(self, query: str, **options) -> "NewsSearch":
+        ...
+
+
+class NewsSearch(ABC):
+    """Paged results of one query; ``page(number)`` (1-based) must be safe to call from several threads"""
+
+    @abstractmethod
+    def page(self, number: int) -> list:
+        ...
+
+
+class GoogleNewsSource(NewsSource):
+    name = "google"
+
+    def __init__(self, lang: str = "en"):
+        self.lang = lang
+
+    def search(self, query: str, region: str = None, today_only: bool = False) -> "NewsSearch":
+        return _GoogleNewsSearch(query, self.lang, region, today_only)
+
+
+class _GoogleNewsSearch(NewsSearch):
+    def __init__(self, query: str, lang: str, region: str = None, today_only: bool = False):
+        self.query = query
+        self.lang = lang
+        self.region = region
+        self.today_only = today_only
+        self._seed = None
+        self._lock = threading.Lock()
+
+    def page(self, number: int) -> list:
+        from GoogleNews import GoogleNews
+
+        with self._lock:
+            if self._seed is None:
+                # search() stores the encoded query and scrapes the first page
+                googlenews = GoogleNews(lang=self.lang, region=self.region) if self.region else GoogleNews(lang=self.lang)
+                if self.today_only:
+                    googlenews.set_time_range('1d', '1d')
+                googlenews.search(self.query)
+                self._seed = googlenews
+                if number == 1:
+                    return list(googlenews.result())
+        if number == 1:
+            return list(self._seed.result())
+        # GoogleNews accumulates results on the instance, so each page gets its own copy
+        googlenews = copy.copy(self._seed)
+        googlenews.clear()
+        googlenews.get_page(number)
+        return list(googlenews.result())
+
+
+class LocalNewsSource(NewsSource):
+    """Stand-in feed for tests and benchmarks.
+
+    Serves a fixed list of articles (or a JSON file holding one): a query
+    matches articles whose title or description contains all of its words,
+    in pages of ``page_size``, each after ``latency`` seconds to mimic a
+    scrape.
+    """
+    name = "local"
+
+    def __init__(self, articles: list = None, path: str = None, page_size: int = 10, latency: float = 0.0):
+        if articles is None:
+            with open(path, encoding="utf-8") as f:
+                articles = json.load(f)
+        self.articles = articles
+        self.page_size = page_size
+        self.latency = latency
+        self.pages_served = 0
+
+    def search(self, query: str, **options) -> "NewsSearch":
+        words = query.lower().split()
+        matches = [
+            article for article in self.articles
+            if all(w in f"{article.get('title', '')} {article.get('desc', '')}".lower() for w in words)
+        ]
+        return _LocalNewsSearch(self, matches)
+
+
+class _LocalNewsSearch(NewsSearch):
+    def __init__(self, source: LocalNewsSource, matches: list):
+        self.source = source
+        self.matches = matches
+
+    def page(self, number: int) -> list:
+        if self.source.latency:
+            time.sleep(self.source.latency)
+        self.source.pages_served += 1
+        start = (number - 1) * self.source.page_size
+        return [dict(article) for article in self.matches[start:start + self.source.page_size]]
+
+
+def article_key(article: dict):
+    """Identity of a news article across pages and searches: its link, else its title and description"""
+    return article.get("link") or (article.get("title", ""), article.get("desc", ""))
+
+
+def fetch_news(source: NewsSource, query: str, max_articles: int, max_pages: int = NEWS_MAX_PAGES,
+               concurrency: int = NEWS_PAGE_CONCURRENCY, **options) -> list:
+    """Up to max_articles distinct articles for a query.
+
+    The first page is fetched alone, since it usually fills the quota. After
+    that up to ``concurrency`` further pages are in flight at once and their
+    results are taken in page order, deduplicated by link (else title and
+    description). Once the quota is met, or a page comes back empty, pages
+    that have not started are cancelled and no more are requested. Options
+    go to ``source.search``.
+    """
+    search = source.search(query, **options)
+    articles = {}
+
+    def fetch_page(number):
+        with span("upstream", "news_page"):
+            return search.page(number)
+    fetch_page = in_context(fetch_page)
+
+    def add(page_results):
+        for article in page_results:
+            articles.setdefault(article_key(article), article)
+        return len(articles) >= max_articles
+
+    logging.info(f"Fetching up to {max_articles} articles for query: '{query}'")
+    first_page = fetch_page(1)
+    if add(first_page) or not first_page or max_pages < 2:
+        return list(articles.values())[:max_articles]
+
+    next_page = 2
+    in_flight = []
+    while next_page <= max_pages and len(in_flight) < concurrency:
+        in_flight.append((next_page, _page_executor.submit(fetch_page, next_page)))
+        next_page += 1
+    try:
+        while in_flight:
+            number, future = in_flight.pop(0)
+            try:
+                page_results = future.result()
+            except Exception as e:
+                logging.error(f"Error fetching news page {number} for query '{query}': {str(e)}")
+                break
+            if not page_results:
+                logging.info(f"No more results found after page {number - 1}")
+                break
+            if add(page_results):
+                break
+            if next_page <= max_pages:
+                in_flight.append((next_page, _page_executor.submit(fetch_page, next_page)))
+                next_page += 1
+    finally:
+        # Pages already being scraped finish in the background; their results are dropped
+        for _, future in in_flight:
+            future.cancel()
+
+    logging.info(f"Successfully fetched {min(len(articles), max_articles)} articles")
+    return list(articles.values())[:max_articles]
+
+
+def _default_source() -> NewsSource:
+    if NEWS_SOURCE == "local":
+        return LocalNewsSource(path=NEWS_LOCAL_PATH)
+    if NEWS_SOURCE == "provider":
+        from data_providers import get_provider
+        return get_provider().news_source()
+    if NEWS_SOURCE != "google":
+        logging.error(f"Unknown NEWS_SOURCE {NEWS_SOURCE!r}, using Google News")
+    return GoogleNewsSource()
+
+
+_news_source = None
+
+
+def get_news_source() -> NewsSource:
+    global _news_source
+    if _news_source is None:
+        _news_source = _default_source()
+    return _news_source
+
+
+def set_news_source(source: NewsSource) -> NewsSource:
+    """Swap the process-wide news source (e.g. a LocalNewsSource in tests); returns the previous one"""
+    global _news_source
+    previous, _news_source = _news_source, source
+    return previous
@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from data_providers import get_provider
+
+# Daily OHLCV bars on disk: one directory per symbol, one memory-mappable .npy file per year
+PRICE_STORE_DIR = os.environ.get(
+    "PRICE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prices"),
+)
+PRICE_STORE_ENABLED = os.environ.get("PRICE_STORE_ENABLED", "1") == "1"
+# While the market is open, today's moving bar is re-downloaded at most this often
+PRICE_STORE_REFRESH_SECONDS = float(os.environ.get("PRICE_STORE_REFRESH_SECONDS", "900"))
+
+# NSE/BSE regular session; bars are indexed in exchange time, like yfinance returns them
+EXCHANGE_TZ = ZoneInfo("Asia/Kolkata")
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 30)
+
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+FRAME_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+
+def period_start(period: str, today: date = None):
+    """First calendar date covered by a yfinance period string, or None if unsupported (e.g. "max")"""
+    today = today or date.today()
+    if period == "ytd":
+        return date(today.year, 1, 1)
+    match = _PERIOD_PATTERN.match(period)
+    if not match:
+        return None
+    offset = pd.DateOffset(**{_PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+    return (pd.Timestamp(today) - offset).date()
+
+
+def market_session(now: datetime = None) -> tuple:
+    """(close of the latest session that has started, whether it is still open), in exchange time.
+
+    Weekends are skipped; exchange holidays are not known, so on a holiday
+    the store simply finds no new bar after the close.
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(EXCHANGE_TZ)
+    day = now.date()
+    if day.weekday() < 5 and now.time() >= MARKET_OPEN:
+        close = datetime.combine(day, MARKET_CLOSE, tzinfo=EXCHANGE_TZ)
+        return close, now < close
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=EXCHANGE_TZ), False
+
+
+class PriceStore:
+    """Local columnar store of daily bars that backs history() lookups.
+
+    Each symbol's bars are partitioned by year into structured ``.npy`` files
+    that are read memory-mapped. A read first syncs the symbol: only bars from
+    the last stored session onwards are downloaded (that session is fetched
+    again because it may have been stored mid-day), and older bars are only
+    downloaded when a longer period than ever before is requested. Once a
+    sync has run after the latest session's close, reads touch no network
+    until the next session; during a session the moving bar is refreshed
+    every PRICE_STORE_REFRESH_SECONDS. Prices are
+    split/dividend adjusted, so a new corporate action triggers a full reload
+    of the symbol.
+    """
+
+    def __init__(self, root: str = PRICE_STORE_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root, symbol.replace(os.sep, "_"))
+
+    def _meta_path(self, symbol: str) -> str:
+        return os.path.join(self._symbol_dir(symbol), "meta.json")
+
+    def get_metadata(self, symbol: str) -> dict:
+        """{"covered_from", "last_date", "synced_at"} for a stored symbol, or None"""
+        try:
+            with open(self._meta_path(symbol)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _years(self, symbol: str) -> list:
+        try:
+            names = os.listdir(self._symbol_dir(symbol))
+        except OSError:
+            return []
+        return sorted(int(name[:-4]) for name in names if name.endswith(".npy") and name[:-4].isdigit())
+
+    def read_bars(self, symbol: str, start: date = None) -> np.ndarray:
+        """Stored bars from start onwards as a BAR_DTYPE array.
+
+        Partitions are opened memory-mapped; a read within one year is a
+        zero-copy view of the file, longer reads concatenate the partitions.
+        """
+        parts = []
+        for year in self._years(symbol):
+            if start is not None and year < start.year:
+                continue
+            try:
+                bars = np.load(os.path.join(self._symbol_dir(symbol), f"{year}.npy"), mmap_mode="r")
+            except FileNotFoundError:
+                # A partition that a concurrent full reload no longer produces
+                continue
+            if start is not None and year == start.year:
+                bars = bars[np.searchsorted(bars["date"], np.datetime64(start, "D")):]
+            parts.append(bars)
+        if not parts:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _write_year(self, symbol: str, year: int, bars: np.ndarray):
+        path = os.path.join(self._symbol_dir(symbol), f"{year}.npy")
+        tmp_path = f"{path}.tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+        os.replace(tmp_path, path)
+
+    def _write_meta(self, symbol: str, covered_from: date, last_date: date):
+        path = self._meta_path(symbol)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({
+                "covered_from": covered_from.isoformat(),
+                "last_date": last_date.isoformat(),
+                "synced_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _download(self, symbol: str, start: date) -> pd.DataFrame:
+        hist = get_provider().history(symbol, interval="1d", start=start.isoformat())
+        if hist is None or hist.empty:
+            return pd.DataFrame()
+        return hist.dropna(subset=["Close"])
+
+    @staticmethod
+    def _to_bars(hist: pd.DataFrame) -> np.ndarray:
+        bars = np.empty(len(hist), dtype=BAR_DTYPE)
+        dates = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        bars["date"] = dates.to_numpy().astype("datetime64[D]")
+        for field, column in FRAME_COLUMNS.items():
+            bars[field] = hist[column].to_numpy(dtype=float)
+        return bars
+
+    def _replace_all(self, symbol: str, start: date):
+        hist = self._download(symbol, start)
+        if hist.empty:
+            return
+        bars = self._to_bars(hist)
+        os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+        # Each partition is swapped in whole (temp file + os.replace), so lock-free readers
+        # see either the old or the new file; years no longer covered go only afterwards
+        years = bars["date"].astype("datetime64[Y]").astype(int) + 1970
+        new_years = {int(year) for year in np.unique(years)}
+        for year in sorted(new_years):
+            self._write_year(symbol, year, bars[years == year])
+        for year in self._years(symbol):
+            if year not in new_years:
+                os.remove(os.path.join(self._symbol_dir(symbol), f"{year}.npy"))
+        self._write_meta(symbol, start, bars["date"][-1].astype(date))
+
+    def _append(self, symbol: str, hist: pd.DataFrame, meta: dict):
+        bars = self._to_bars(hist)
+        first_new = bars["date"][0]
+        years = bars["date"].astype("datetime64[Y]").astype(int) + 1970
+        for year in np.unique(years):
+            path = os.path.join(self._symbol_dir(symbol), f"{int(year)}.npy")
+            existing = np.load(path) if os.path.exists(path) else np.empty(0, dtype=BAR_DTYPE)
+            # New bars replace anything stored from the first re-downloaded session on
+            kept = existing[existing["date"] < first_new]
+            self._write_year(symbol, int(year), np.concatenate([kept, bars[years == year]]))
+        self._write_meta(symbol, date.fromisoformat(meta["covered_from"]), bars["date"][-1].astype(date))
+
+    @staticmethod
+    def _is_current(meta: dict, now: datetime = None) -> bool:
+        """Whether the stored bars already include the latest session (no download needed)"""
+        try:
+            synced_at = datetime.fromisoformat(meta["synced_at"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        if synced_at.tzinfo is None:
+            synced_at = synced_at.astimezone()  # Written in local time by older versions
+        now = now or datetime.now(timezone.utc)
+        close, is_open = market_session(now)
+        if is_open:
+            return (now - synced_at).total_seconds() < PRICE_STORE_REFRESH_SECONDS
+        return synced_at >= close
+
+    def sync(self, symbol: str, start: date):
+        """Bring the stored bars for symbol up to date and covering start"""
+        with self._lock(symbol):
+            meta = self.get_metadata(symbol)
+            if meta is None or start < date.fromisoformat(meta["covered_from"]):
+                self._replace_all(symbol, start)
+                return
+            if self._is_current(meta):
+                return
+
+            last_date = date.fromisoformat(meta["last_date"])
+            hist = self._download(symbol, last_date)
+            if hist.empty:
+                # Nothing new (e.g. a holiday): remember the check so the next read skips it
+                self._write_meta(symbol, date.fromisoformat(meta["covered_from"]), last_date)
+                return
+            corporate_actions = hist.reindex(columns=["Dividends", "Stock Splits"]).fillna(0)
+            if (corporate_actions.iloc[1:] != 0).any().any():
+                logging.info(f"Corporate action for {symbol}; reloading adjusted price history")
+                self._replace_all(symbol, date.fromisoformat(meta["covered_from"]))
+                return
+            self._append(symbol, hist, meta)
+
+    def history(self, symbol: str, period: str) -> pd.DataFrame:
+        """Daily OHLCV frame like Ticker.history(period=...), served from the local store"""
+        start = period_start(period)
+        if start is None:
+            raise ValueError(f"Unsupported period for the price store: {period}")
+        self.sync(symbol, start)
+        bars = self.read_bars(symbol, start)
+        frame = pd.DataFrame(
+            {column: bars[field] for field, column in FRAME_COLUMNS.items()},
+            index=pd.DatetimeIndex(bars["date"], name="Date").tz_localize(EXCHANGE_TZ),
+        )
+        return frame
+
+
+# Process-wide store used by market_data.get_history
+price_store = PriceStore()
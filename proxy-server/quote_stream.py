@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import math
+import os
+import time
+
+from market_data import display_symbol, get_quotes, normalize_symbols
+from worker_pools import io_executor
+
+# Upstream poll cadence; bulk quotes are cached for 15s, so polling faster gains nothing
+OPEN_POLL_SECONDS = float(os.environ.get("QUOTE_STREAM_OPEN_SECONDS", "15"))
+CLOSED_POLL_SECONDS = float(os.environ.get("QUOTE_STREAM_CLOSED_SECONDS", "120"))
+MAX_SYMBOLS_PER_SUBSCRIBER = int(os.environ.get("QUOTE_STREAM_MAX_SYMBOLS", "100"))
+
+QUOTE_FIELDS = (
+    "price", "previous_close", "change", "change_pct", "open", "day_change",
+    "day_change_pct", "high", "low", "volume",
+)
+
+
+def _clean(value):
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+def _quote_fields(quote: dict) -> dict:
+    fields = {name: _clean(float(quote[name])) for name in QUOTE_FIELDS}
+    fields["timestamp"] = quote["timestamp"].isoformat() if hasattr(quote["timestamp"], "isoformat") else str(quote["timestamp"])
+    return fields
+
+
+def parse_command(message) -> dict:
+    """Validate a client message: {"subscribe": [symbols], "unsubscribe": [symbols]}, both optional.
+
+    Returns {action: symbols} for the actions present, ignoring other fields;
+    raises ValueError for anything else (a string would otherwise be
+    subscribed letter by letter).
+    """
+    if not isinstance(message, dict):
+        raise ValueError('Expected an object such as {"subscribe": ["TCS", "INFY"]}')
+    command = {}
+    for action in ("subscribe", "unsubscribe"):
+        if action not in message:
+            continue
+        symbols = message[action]
+        if not isinstance(symbols, list) or not all(isinstance(symbol, str) for symbol in symbols):
+            raise ValueError(f'"{action}" must be a list of symbol strings')
+        command[action] = symbols
+    return command
+
+
+class Subscription:
+    """One client's symbol set plus the updates not yet sent to it.
+
+    Updates are merged into ``pending`` rather than queued, so a slow client
+    skips intermediate values instead of building up a backlog.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.symbols = set()
+        self.pending = {}
+        self.updated = asyncio.Event()
+
+    def push(self, quotes: dict):
+        for symbol, fields in quotes.items():
+            if symbol in self.symbols:
+                self.pending.setdefault(symbol, {}).update(fields)
+        if self.pending:
+            self.updated.set()
+
+    async def next_update(self, timeout: float = None) -> dict:
+        """Wait for changed fields ({symbol: {field: value}}); {} on timeout"""
+        try:
+            await asyncio.wait_for(self.updated.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self.updated.clear()
+        update, self.pending = self.pending, {}
+        return {display_symbol(symbol): fields for symbol, fields in update.items()}
+
+    def subscribe(self, symbols):
+        self.hub.subscribe(self, symbols)
+
+    def unsubscribe(self, symbols):
+        self.hub.unsubscribe(self, symbols)
+
+    def close(self):
+        self.hub.unsubscribe(self, list(self.symbols))
+
+
+class QuoteHub:
+    """Fans one upstream quote poll out to every streaming client.
+
+    The hub polls all subscribed symbols with a single bulk download per
+    cycle, however many clients watch them, compares each quote with the
+    last one published and pushes only the fields that changed. A new
+    subscriber first receives the full latest quote of its symbols. The poll
+    loop runs only while there are subscribers.
+    """
+
+    def __init__(self, is_open=None, open_interval: float = OPEN_POLL_SECONDS,
+                 closed_interval: float = CLOSED_POLL_SECONDS):
+        self.is_open = is_open or (lambda: True)
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self._subscribers = set()
+        self._refcounts = {}
+        self._latest = {}
+        self._task = None
+        self._wakeup = None
+        self.polls = 0
+        self.deltas_sent = 0
+        self.last_poll_seconds = 0.0
+
+    def open(self) -> Subscription:
+        subscription = Subscription(self)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def subscribe(self, subscription: Subscription, symbols):
+        new = [s for s in normalize_symbols(symbols) if s not in subscription.symbols]
+        allowed = MAX_SYMBOLS_PER_SUBSCRIBER - len(subscription.symbols)
+        if len(new) > allowed:
+            raise ValueError(f"At most {MAX_SYMBOLS_PER_SUBSCRIBER} symbols per subscription")
+        fetch_now = False
+        for symbol in new:
+            subscription.symbols.add(symbol)
+            self._refcounts[symbol] = self._refcounts.get(symbol, 0) + 1
+            if symbol in self._latest:
+                subscription.push({symbol: self._latest[symbol]})
+            else:
+                fetch_now = True
+        self._subscribers.add(subscription)
+        self._ensure_running()
+        if fetch_now and self._wakeup is not None:
+            self._wakeup.set()
+
+    def unsubscribe(self, subscription: Subscription, symbols):
+        for symbol in normalize_symbols(symbols):
+            if symbol not in subscription.symbols:
+                continue
+            subscription.symbols.discard(symbol)
+            subscription.pending.pop(symbol, None)
+            self._refcounts[symbol] -= 1
+            if self._refcounts[symbol] == 0:
+                del self._refcounts[symbol]
+                self._latest.pop(symbol, None)
+        if not subscription.symbols:
+            self._subscribers.discard(subscription)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._poll_loop())
+
+    async def _poll_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._refcounts:
+            symbols = sorted(self._refcounts)
+            started = time.perf_counter()
+            try:
+                quotes = await loop.run_in_executor(io_executor, get_quotes, symbols)
+                self._publish(quotes)
+            except Exception as e:
+                logging.error(f"Error polling quotes for {len(symbols)} symbols: {str(e)}")
+            self.polls += 1
+            self.last_poll_seconds = time.perf_counter() - started
+
+            interval = self.open_interval if self.is_open() else self.closed_interval
+            self._wakeup.clear()
+            try:
+                # A new symbol wakes the loop early so its first quote is not delayed
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _publish(self, quotes: dict):
+        changes = {}
+        for symbol, quote in quotes.items():
+            if symbol not in self._refcounts:
+                continue
+            fields = _quote_fields(quote)
+            previous = self._latest.get(symbol)
+            delta = fields if previous is None else {
+                name: value for name, value in fields.items() if previous.get(name) != value
+            }
+            if delta:
+                changes[symbol] = delta
+                self._latest[symbol] = fields
+        if not changes:
+            return
+        for subscription in list(self._subscribers):
+            subscription.push(changes)
+        self.deltas_sent += len(changes)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "symbols": len(self._refcounts),
+            "polling": self._task is not None and not self._task.done(),
+            "polls": self.polls,
+            "deltas_sent": self.deltas_sent,
+            "last_poll_seconds": self.last_poll_seconds,
+        }
@@ -0,0 +1,136 @@
+import json
+import math
+from datetime import date, datetime
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library encoder is used without it
+    orjson = None
+
+# How DataFrames are laid out in responses:
+#   "dict"    {column: {index: value}}, the same shape as DataFrame.to_dict()
+#   "split"   {"columns": [...], "index": [...], "data": [[row], ...]}
+#   "records" [{column: value}, ...]
+FRAME_LAYOUTS = ("dict", "split", "records")
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _key(label):
+    """JSON object key for an index/column label (timestamps become ISO strings)"""
+    if isinstance(label, (datetime, date)):
+        return label.isoformat()
+    if isinstance(label, np.generic):
+        return label.item()
+    if isinstance(label, tuple):
+        return str(label)
+    return label
+
+
+def _masked_values(values: np.ndarray) -> np.ndarray:
+    """Object array of plain Python values with NaN/inf (and NaT) replaced by None, in one pass"""
+    if values.dtype.kind in "fc":
+        result = values.astype(object)
+        result[~np.isfinite(values)] = None
+        return result
+    if values.dtype.kind in "iub":
+        return values.astype(object)
+    if values.dtype.kind == "M":
+        result = np.datetime_as_string(values, unit="s").astype(object)
+        result[np.isnat(values)] = None
+        return result
+    result = values.astype(object)
+    result[pd.isna(values)] = None
+    if values.dtype.kind == "O":
+        # Mixed columns can still hold infinite floats
+        infinite = np.frompyfunc(lambda v: isinstance(v, float) and math.isinf(v), 1, 1)(result).astype(bool)
+        result[infinite] = None
+    return result
+
+
+def _frame_payload(frame: pd.DataFrame, layout: str):
+    columns = [_key(c) for c in frame.columns]
+    index = [_key(i) for i in frame.index]
+    if frame.empty:
+        values = [[] for _ in index]
+    elif len(set(frame.dtypes)) == 1:
+        values = _masked_values(frame.to_numpy()).tolist()
+    else:
+        # Mask column by column so numeric columns keep the vectorized path
+        values = np.column_stack([_masked_values(frame[c].to_numpy()) for c in frame.columns]).tolist()
+    if layout == "split":
+        return {"columns": columns, "index": index, "data": values}
+    if layout == "records":
+        return [dict(zip(columns, row)) for row in values]
+    by_column = zip(*values) if values else ([] for _ in columns)
+    return {column: dict(zip(index, column_values)) for column, column_values in zip(columns, by_column)}
+
+
+def _series_payload(series: pd.Series, layout: str):
+    index = [_key(i) for i in series.index]
+    values = _masked_values(series.to_numpy()).tolist()
+    if layout == "split":
+        return {"name": _key(series.name), "index": index, "data": values}
+    if layout == "records":
+        return [{"index": i, "value": v} for i, v in zip(index, values)]
+    return dict(zip(index, values))
+
+
+def _convert(value, layout: str):
+    """Plain-Python form of one value the JSON backends cannot handle natively"""
+    if isinstance(value, pd.DataFrame):
+        return _frame_payload(value, layout)
+    if isinstance(value, pd.Series):
+        return _series_payload(value, layout)
+    if isinstance(value, np.ndarray):
+        return _masked_values(value).tolist()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return _prepare(value.item(), layout)
+    if isinstance(value, (set, frozenset, tuple)):
+        return [_prepare(v, layout) for v in value]
+    if isinstance(value, MappingProxyType):
+        return _prepare(dict(value), layout)
+    if value is pd.NaT:
+        return None
+    return str(value)
+
+
+def _prepare(value, layout: str):
+    """Full recursive conversion, used by the standard library backend and for unusual dict keys"""
+    if isinstance(value, dict):
+        return {_key(k): _prepare(v, layout) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_prepare(v, layout) for v in value]
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    return _prepare(_convert(value, layout), layout)
+
+
+def encode(content, layout: str = "dict") -> bytes:
+    """Serialize a response payload to JSON bytes.
+
+    NumPy arrays and scalars and pandas objects are handled natively; NaN and
+    infinity become null, timestamps ISO strings. DataFrames use the given
+    layout (see FRAME_LAYOUTS).
+    """
+    if layout not in FRAME_LAYOUTS:
+        raise ValueError(f"Unknown frame layout: {layout}")
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=lambda v: _convert(v, layout), option=_ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. pandas Timestamps as dict keys, which orjson does not accept
+            return orjson.dumps(_prepare(content, layout), option=_ORJSON_OPTIONS)
+    return json.dumps(
+        _prepare(content, layout), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
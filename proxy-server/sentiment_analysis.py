@@ -1,97 +1,46 @@
 import logging
-import streamlit as st
+import math
+import sys
+from collections import Counter
 import pandas as pd
-import torch
 import numpy as np
-import matplotlib.pyplot as plt
-from GoogleNews import GoogleNews
-from transformers import pipeline
 from datetime import datetime, timedelta
-import matplotlib
-import yfinance as yf
-import io
+from functools import partial
 import base64
-from PIL import Image
-matplotlib.use('Agg')
+from chart_service import chart_service
+from market_cache import market_cache
+from market_data import get_history
+from model_manager import get_pipeline
+from news_sources import article_key, fetch_news, get_news_source
+from symbol_resolver import symbol_resolver
+from worker_pools import run_all
 
 # Set up logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-# Initialize sentiment analysis model
+# Sentiment analysis model: registered here, loaded on first use (or by the server's warm-up).
+# Shared per process; concurrent requests are micro-batched into one forward pass,
+# and articles classified before are answered from the persistent classification cache.
 SENTIMENT_ANALYSIS_MODEL = "mrm8488/distilroberta-finetuned-financial-news-sentiment-analysis"
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-logging.info(f"Using device: {DEVICE}")
-logging.info("Initializing sentiment analysis model...")
-sentiment_analyzer = pipeline(
-    "sentiment-analysis", model=SENTIMENT_ANALYSIS_MODEL, device=DEVICE
-)
-logging.info("Model initialized successfully")
-
-# Indian stock ticker mapping
-COMMON_TICKERS = {
-    "reliance": "RELIANCE.NS",
-    "tcs": "TCS.NS",
-    "infosys": "INFY.NS",
-    "hdfc bank": "HDFCBANK.NS",
-    "icici bank": "ICICIBANK.NS",
-    "hdfc": "HDFC.NS",
-    "sbi": "SBIN.NS",
-    "kotak bank": "KOTAKBANK.NS",
-    "axis bank": "AXISBANK.NS",
-    "wipro": "WIPRO.NS",
-    "tech mahindra": "TECHM.NS",
-    "asian paints": "ASIANPAINT.NS",
-    "bajaj auto": "BAJAJ-AUTO.NS",
-    "bharti airtel": "BHARTIARTL.NS",
-    "hindalco": "HINDALCO.NS",
-    "itc": "ITC.NS",
-    "larsen": "LT.NS",
-    "l&t": "LT.NS",
-    "larsen and toubro": "LT.NS",
-    "maruti": "MARUTI.NS",
-    "nestle": "NESTLEIND.NS",
-    "ongc": "ONGC.NS",
-    "power grid": "POWERGRID.NS",
-    "sun pharma": "SUNPHARMA.NS",
-    "tata motors": "TATAMOTORS.NS",
-    "tata steel": "TATASTEEL.NS",
-    "ultracemco": "ULTRACEMCO.NS",
-    "upl": "UPL.NS",
-    "zeel": "ZEEL.NS",
-    "zee": "ZEEL.NS",
-    "zee entertainment": "ZEEL.NS"
-}
+DEVICE = "auto"  # cuda when available
+sentiment_analyzer = get_pipeline("sentiment-analysis", SENTIMENT_ANALYSIS_MODEL, device=DEVICE,
+                                  cache_results=True)
 
 def fetch_articles(query, max_articles=10):
     try:
-        logging.info(f"Fetching up to {max_articles} articles for query: '{query}'")
-        googlenews = GoogleNews(lang="en")
-        googlenews.search(query)
-        
-        articles = googlenews.result()
-        
-        page = 2
-        while len(articles) < max_articles and page <= 10:
-            logging.info(f"Fetched {len(articles)} articles so far. Getting page {page}...")
-            googlenews.get_page(page)
-            page_results = googlenews.result()
-            
-            if not page_results:
-                logging.info(f"No more results found after page {page-1}")
-                break
-                
-            articles.extend(page_results)
-            page += 1
-            
-        articles = articles[:max_articles]
-        
-        logging.info(f"Successfully fetched {len(articles)} articles")
-        return articles
+        source = get_news_source()
+        articles = market_cache.get_or_load(
+            "news", ("articles", source.name, query, max_articles),
+            lambda: fetch_news(source, query, max_articles),
+        )
+        # Callers annotate the article dicts, so hand out copies of the cached ones
+        return [dict(article) for article in articles]
     except Exception as e:
         logging.error(f"Error while searching articles for query: '{query}'. Error: {e}")
-        st.error(f"Unable to search articles for query: '{query}'. Try again later...")
+        if "streamlit" in sys.modules:
+            sys.modules["streamlit"].error(f"Unable to search articles for query: '{query}'. Try again later...")
         return []
 
 def analyze_article_sentiment(article):
@@ -100,6 +49,111 @@ def analyze_article_sentiment(article):
     article["sentiment"] = sentiment
     return article
 
+def analyze_articles_sentiment(articles):
+    """Classify a list of articles in a single batch"""
+    if not articles:
+        return []
+    logging.info(f"Analyzing sentiment for {len(articles)} articles")
+    sentiments = sentiment_analyzer([article["desc"] for article in articles])
+    for article, sentiment in zip(articles, sentiments):
+        article["sentiment"] = sentiment
+    return articles
+
+# Below this many articles scoring runs as a plain per-article loop: a request scores
+# about ten, where building pandas columns costs more than it saves
+COLUMNAR_MIN_ARTICLES = 256
+
+# Article date formats (GoogleNews first). Offsets are parsed but ignored: ages are
+# measured in wall-clock hours, as calculate_time_weight always has.
+ARTICLE_DATE_FORMATS = [
+    '%a, %d %b %Y %H:%M:%S %z',  # 기본 GoogleNews 형식
+    '%Y-%m-%d %H:%M:%S',
+    '%a, %d %b %Y %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%a %b %d, %Y',
+    '%d %b %Y'
+]
+_TZ_SUFFIX = r"\s*(?:[+-]\d{2}:?\d{2}|Z)$"
+
+# Date "shape" (ASCII letters -> a, digits -> 0) -> matching format, or None when no format fits
+_date_format_cache = {}
+
+_SHAPE_TABLE = str.maketrans(
+    "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ", "0" * 10 + "a" * 52
+)
+
+def _date_shape(date_str):
+    return date_str.translate(_SHAPE_TABLE)
+
+def detect_date_format(date_str):
+    """Format of an article date string, found once per date shape and then cached"""
+    shape = _date_shape(date_str)
+    if shape not in _date_format_cache:
+        detected = None
+        for format_str in ARTICLE_DATE_FORMATS:
+            try:
+                datetime.strptime(date_str, format_str)
+                detected = format_str
+                break
+            except ValueError:
+                continue
+        _date_format_cache[shape] = detected
+    return _date_format_cache[shape]
+
+def parse_article_dates(date_strs):
+    """Wall-clock datetime64 array for article date strings (NaT where unparseable)"""
+    dates = pd.Series([d if isinstance(d, str) else "" for d in date_strs], dtype=object)
+    parsed = pd.Series(pd.NaT, index=dates.index, dtype="datetime64[us]")
+    formats = dates.map(detect_date_format)
+    for format_str in formats.dropna().unique():
+        selected = dates[formats == format_str]
+        if "%z" in format_str:
+            selected = selected.str.replace(_TZ_SUFFIX, "", regex=True)
+            format_str = format_str.replace("%z", "").rstrip()
+        parsed[selected.index] = pd.to_datetime(selected, format=format_str, errors="coerce").astype("datetime64[us]")
+    return parsed.to_numpy()
+
+def _weight_for_hours(hours_diff):
+    if hours_diff is None:
+        return 0.01
+    if hours_diff < 1:
+        return 0.24
+    if hours_diff < 24:
+        return max(0.01, 0.24 - (hours_diff - 1) * 0.01)
+    return 0.01
+
+def _parse_article_date(date_str):
+    """parse_article_dates for one string, as a naive wall-clock datetime (None if unparseable)"""
+    format_str = detect_date_format(date_str) if isinstance(date_str, str) else None
+    if format_str is None:
+        return None
+    try:
+        return datetime.strptime(date_str, format_str).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+def time_weights(date_strs, now=None):
+    """calculate_time_weight for many dates at once (NumPy array of weights)"""
+    if len(date_strs) < COLUMNAR_MIN_ARTICLES:
+        now = now or datetime.now()
+        parsed = [_parse_article_date(d) for d in date_strs]
+        unparsed = parsed.count(None)
+        weights = np.array([
+            _weight_for_hours(None if p is None else (now - p).total_seconds() / 3600) for p in parsed
+        ])
+    else:
+        parsed = parse_article_dates(date_strs)
+        unparsed = int(np.isnat(parsed).sum())
+        hours_diff = (np.datetime64(now or datetime.now(), "us") - parsed) / np.timedelta64(1, "h")
+        # NaT gives NaN hours, which fails both comparisons and gets the minimum weight
+        weights = np.where(
+            hours_diff < 1, 0.24,
+            np.where(hours_diff < 24, np.maximum(0.01, 0.24 - (hours_diff - 1) * 0.01), 0.01),
+        )
+    if unparsed:
+        logging.warning(f"Could not parse {unparsed} of {len(date_strs)} article dates, using default 24h ago")
+    return weights
+
 def calculate_time_weight(article_date_str):
     """
     기사 시간 기준으로 가중치 계산 
@@ -109,48 +163,18 @@ def calculate_time_weight(article_date_str):
     - 24시간 이상이면 1%로 고정
     """
     try:
-        # 기사 날짜 문자열 파싱 (다양한 형식 처리)
-        date_formats = [
-            '%a, %d %b %Y %H:%M:%S %z',  # 기본 GoogleNews 형식
-            '%Y-%m-%d %H:%M:%S',
-            '%a, %d %b %Y %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S%z',
-            '%a %b %d, %Y',
-            '%d %b %Y'
-        ]
-        
-        parsed_date = None
-        for format_str in date_formats:
-            try:
-                parsed_date = datetime.strptime(article_date_str, format_str)
-                break
-            except ValueError:
-                continue
-        
-        # 어떤 형식으로도 파싱할 수 없으면 현재 시간 기준 24시간 전으로 가정
-        if parsed_date is None:
-            logging.warning(f"Could not parse date: {article_date_str}, using default 24h ago")
-            return 0.01  # 최소 가중치 1%
-            
-        # 현재 시간과의 차이 계산 (시간 단위)
-        now = datetime.now()
-        if parsed_date.tzinfo is not None:
-            now = now.replace(tzinfo=parsed_date.tzinfo)
-            
-        hours_diff = (now - parsed_date).total_seconds() / 3600
-        
-        # 24시간 이내인 경우만 고려
-        if hours_diff < 1:  # 1시간 이내
-            return 0.24  # 24% 가중치
-        elif hours_diff < 24:  # 1~23시간
-            # 1시간당 1%씩 감소 (1시간 = 24%, 2시간 = 23%, ...)
-            return max(0.01, 0.24 - ((hours_diff - 1) * 0.01))
-        else:
-            return 0.01  # 24시간 이상 지난 기사는 1% 가중치
+        return float(time_weights([article_date_str])[0])
     except Exception as e:
         logging.error(f"Error calculating time weight: {e}")
         return 0.01  # 오류 발생 시 최소 가중치 적용
 
+# Base score per sentiment label; other labels score 0
+BASE_SCORES = {
+    'positive': 3,
+    'neutral': 0,
+    'negative': -3
+}
+
 def calculate_sentiment_score(sentiment_label, time_weight):
     """
     감성 레이블에 따른 기본 점수 계산 및 시간 가중치 적용
@@ -163,11 +187,7 @@ def calculate_sentiment_score(sentiment_label, time_weight):
     - 1시간 내 긍정 기사: 3점 + (3 * 24%) = 3 + 0.72 = 3.72점
     - 10시간 전 부정 기사: -3점 + (-3 * 15%) = -3 - 0.45 = -3.45점
     """
-    base_score = {
-        'positive': 3,
-        'neutral': 0,
-        'negative': -3
-    }.get(sentiment_label, 0)
+    base_score = BASE_SCORES.get(sentiment_label, 0)
     
     # 가중치를 적용한 추가 점수 계산
     weighted_addition = base_score * time_weight
@@ -180,9 +200,6 @@ def get_stock_ticker(asset_name):
     """
     logging.info(f"Identifying ticker for: {asset_name}")
     
-    # Convert to lowercase for mapping check
-    asset_lower = asset_name.lower().strip()
-    
     # Check if input is already a ticker symbol
     if asset_name.isupper() and 2 <= len(asset_name) <= 6:
         # Add .NS suffix for Indian stocks if not present
@@ -193,140 +210,175 @@ def get_stock_ticker(asset_name):
         logging.info(f"Input appears to be a ticker symbol: {ticker}")
         return ticker
     
-    # Check common tickers mapping
-    if asset_lower in COMMON_TICKERS:
-        ticker = COMMON_TICKERS[asset_lower]
-        logging.info(f"Found ticker in common tickers map: {ticker}")
+    # Company names and aliases come from the shared offline symbol index
+    ticker = symbol_resolver.resolve(asset_name)
+    if ticker:
+        logging.info(f"Found ticker in symbol index: {ticker}")
         return ticker
     
-    # Try searching by company name
-    try:
-        search_results = yf.Ticker(asset_name)
-        info = search_results.info
-        if info and 'symbol' in info:
-            ticker = info['symbol']
-            # Add .NS suffix for Indian stocks if not present
-            if not ticker.endswith('.NS'):
-                ticker = f"{ticker}.NS"
-            logging.info(f"Found ticker from search: {ticker}")
-            return ticker
-    except Exception as e:
-        logging.debug(f"Search failed: {e}")
-    
     logging.warning(f"Could not identify valid ticker for: {asset_name}")
     return None
 
+def stock_chart_image(ticker, period="1mo"):
+    """Price chart (chart_service.ChartImage) of a ticker with its 20-day MA and volume"""
+    logging.info(f"Fetching stock data for {ticker}")
+    hist = get_history(ticker, period=period)
+    if hist is None or len(hist) == 0:
+        logging.warning(f"No stock data found for ticker: {ticker}")
+        return None
+    volume = None
+    if 'Volume' in hist.columns and not hist['Volume'].isna().all():
+        volume = hist['Volume'].to_numpy(dtype=float)
+    # Exchange wall-clock times as datetime64: a tz-aware index would become an object array
+    dates = hist.index.tz_localize(None) if getattr(hist.index, "tz", None) is not None else hist.index
+    return chart_service.render(
+        "stock",
+        ticker=ticker,
+        dates=dates.to_numpy(),
+        close=hist['Close'].to_numpy(dtype=float),
+        volume=volume,
+    )
+
 def create_stock_chart(ticker, period="1mo"):
     """
-    Create stock price chart
+    Create stock price chart (PNG bytes)
     """
     try:
-        logging.info(f"Fetching stock data for {ticker}")
-        stock = yf.Ticker(ticker)
-        
-        # Get historical data
-        hist = stock.history(period=period)
-        
-        if len(hist) == 0:
-            logging.warning(f"No stock data found for ticker: {ticker}")
-            return None
-            
-        # Create the plot
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Plot closing price
-        ax.plot(hist.index, hist['Close'], label='Close Price', color='blue')
-        
-        # Add 20-day moving average if enough data
-        if len(hist) > 20:
-            hist['MA20'] = hist['Close'].rolling(window=20).mean()
-            ax.plot(hist.index, hist['MA20'], label='20-day MA', color='orange')
-        
-        # Add volume subplot if available
-        if 'Volume' in hist.columns and not hist['Volume'].isna().all():
-            ax2 = ax.twinx()
-            ax2.bar(hist.index, hist['Volume'], alpha=0.3, color='gray', label='Volume')
-            ax2.set_ylabel('Volume')
-            
-            # Add legend for both plots
-            lines, labels = ax.get_legend_handles_labels()
-            lines2, labels2 = ax2.get_legend_handles_labels()
-            ax.legend(lines + lines2, labels + labels2, loc='upper left')
-        else:
-            ax.legend(loc='upper left')
-        
-        # Style the plot
-        ax.set_title(f"{ticker} Stock Price")
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Price')
-        ax.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        # Save the figure
-        chart_path = f"stock_chart_{ticker.replace('-', '_').replace('.', '_')}.png"
-        plt.savefig(chart_path)
-        plt.close()
-        
-        logging.info(f"Stock chart created: {chart_path}")
-        return chart_path
+        chart = stock_chart_image(ticker, period)
+        return chart.data if chart else None
     except Exception as e:
         logging.error(f"Error creating stock chart for {ticker}: {e}")
         return None
 
 def sentiment_bar(positive, neutral, negative):
-    fig, ax = plt.subplots(figsize=(5, 0.5))
-    ax.barh([0], positive, color='#28a745', label='Positive')
-    ax.barh([0], neutral, left=positive, color='#6c757d', label='Neutral')
-    ax.barh([0], negative, left=positive+neutral, color='#dc3545', label='Negative')
-    ax.set_xlim(0, 100)
-    ax.axis('off')
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0)
-    plt.close(fig)
-    buf.seek(0)
-    img = Image.open(buf)
-    return img
+    """Positive/neutral/negative split as a horizontal bar (PNG bytes)"""
+    return chart_service.render(
+        "sentiment_bar", positive=float(positive), neutral=float(neutral), negative=float(negative)
+    ).data
 
-def analyze_asset_sentiment(asset_name):
+def score_frame(analyzed_articles, now=None):
+    """Columnar scores of classified articles: label, time_weight, base_score, weighted_addition, total_score"""
+    labels = pd.Series([a["sentiment"]["label"] for a in analyzed_articles], dtype=object)
+    time_weight = time_weights([a.get("date", "") for a in analyzed_articles], now)
+    base_score = labels.map(BASE_SCORES).fillna(0).astype(int).to_numpy()
+    weighted_addition = base_score * time_weight
+    return pd.DataFrame({
+        "label": labels,
+        "time_weight": time_weight,
+        "base_score": base_score,
+        "weighted_addition": weighted_addition,
+        "total_score": base_score + weighted_addition,
+    })
+
+_SCORE_COLUMNS = ("time_weight", "base_score", "weighted_addition", "total_score")
+
+def _apply_scores(analyzed_articles, scores):
+    for article, values in zip(analyzed_articles, zip(*(scores[c].tolist() for c in _SCORE_COLUMNS))):
+        article.update(zip(_SCORE_COLUMNS, values))
+    return analyzed_articles
+
+def _score_each(analyzed_articles, now=None):
+    """score_frame's values written straight onto a small batch of articles"""
+    weights = time_weights([a.get("date", "") for a in analyzed_articles], now).tolist()
+    for article, time_weight in zip(analyzed_articles, weights):
+        base_score = BASE_SCORES.get(article["sentiment"]["label"], 0)
+        weighted_addition = base_score * time_weight
+        article.update(zip(_SCORE_COLUMNS, (time_weight, base_score, weighted_addition, base_score + weighted_addition)))
+    return analyzed_articles
+
+def score_articles(analyzed_articles):
+    """Add time weight and base/weighted/total scores to classified articles"""
+    if len(analyzed_articles) < COLUMNAR_MIN_ARTICLES:
+        return _score_each(analyzed_articles)
+    return _apply_scores(analyzed_articles, score_frame(analyzed_articles))
+
+def _summary(total_articles, counts, score_sum):
+    positive_count = int(counts.get("positive", 0))
+    neutral_count = int(counts.get("neutral", 0))
+    negative_count = int(counts.get("negative", 0))
+    avg_sentiment_score = float(score_sum / total_articles) if total_articles > 0 else 0
+    return {
+        "total_articles": total_articles,
+        "positive_count": positive_count,
+        "neutral_count": neutral_count,
+        "negative_count": negative_count,
+        "positive_pct": (positive_count / total_articles) * 100 if total_articles > 0 else 0,
+        "neutral_pct": (neutral_count / total_articles) * 100 if total_articles > 0 else 0,
+        "negative_pct": (negative_count / total_articles) * 100 if total_articles > 0 else 0,
+        "avg_sentiment_score": avg_sentiment_score,
+        "label": "positive" if avg_sentiment_score > 1 else "neutral" if avg_sentiment_score > -1 else "negative",
+    }
+
+def summarize_scores(scores):
+    """Counts, percentages and average score from a score_frame()"""
+    return _summary(len(scores), scores["label"].value_counts(), scores["total_score"].sum())
+
+def summarize_sentiment(analyzed_articles):
+    """Counts, percentages and average score of scored articles"""
+    return _summary(
+        len(analyzed_articles),
+        Counter(a["sentiment"]["label"] for a in analyzed_articles),
+        math.fsum(a["total_score"] for a in analyzed_articles),
+    )
+
+def score_and_summarize(analyzed_articles):
+    """Score classified articles in place and summarize them (one columnar pass for large batches)"""
+    if len(analyzed_articles) < COLUMNAR_MIN_ARTICLES:
+        _score_each(analyzed_articles)
+        return analyzed_articles, summarize_sentiment(analyzed_articles)
+    scores = score_frame(analyzed_articles)
+    _apply_scores(analyzed_articles, scores)
+    return analyzed_articles, summarize_scores(scores)
+
+def analyze_asset_sentiment_data(asset_name, max_articles=10):
+    """Headless sentiment analysis: scored articles and aggregates, no charts or files.
+
+    Returns {"asset", "articles", "summary"}; articles are newest first and
+    carry sentiment, time_weight, base_score and total_score, and summary is
+    summarize_sentiment() over all of them.
+    """
     logging.info(f"Starting sentiment analysis for asset: {asset_name}")
-    articles = fetch_articles(asset_name, max_articles=10)
-    analyzed_articles = [analyze_article_sentiment(article) for article in articles]
-    for article in analyzed_articles:
-        time_weight = calculate_time_weight(article["date"])
-        article["time_weight"] = time_weight
-        sentiment_label = article["sentiment"]["label"]
-        base_score, weighted_addition = calculate_sentiment_score(sentiment_label, time_weight)
-        article["base_score"] = base_score
-        article["weighted_addition"] = weighted_addition
-        article["total_score"] = base_score + weighted_addition
-    # Sentiment summary
-    total_articles = len(analyzed_articles)
-    positive_count = sum(1 for a in analyzed_articles if a["sentiment"]["label"] == "positive")
-    neutral_count = sum(1 for a in analyzed_articles if a["sentiment"]["label"] == "neutral")
-    negative_count = sum(1 for a in analyzed_articles if a["sentiment"]["label"] == "negative")
-    positive_pct = (positive_count / total_articles) * 100 if total_articles > 0 else 0
-    neutral_pct = (neutral_count / total_articles) * 100 if total_articles > 0 else 0
-    negative_pct = (negative_count / total_articles) * 100 if total_articles > 0 else 0
-    avg_sentiment_score = sum(a["total_score"] for a in analyzed_articles) / total_articles if total_articles > 0 else 0
-    # Horizontal bar image
-    sentiment_bar_img = sentiment_bar(positive_pct, neutral_pct, negative_pct)
-    # Compose summary text
-    summary = f"""
-    **News Sentiment:** {'🟢 Positive' if avg_sentiment_score > 1 else '⚪ Neutral' if avg_sentiment_score > -1 else '🔴 Negative'}  
-    Positive {positive_pct:.0f}% | Neutral {neutral_pct:.0f}% | Negative {negative_pct:.0f}%
+    articles = fetch_articles(asset_name, max_articles=max_articles)
+    analyzed_articles, summary = score_and_summarize(analyze_articles_sentiment(articles))
+    return {
+        "asset": asset_name,
+        "articles": sorted(analyzed_articles, key=lambda x: x.get("date", ""), reverse=True),
+        "summary": summary,
+    }
+
+def render_sentiment_charts(data):
+    """Optional rendering stage for analyze_asset_sentiment_data() results.
+
+    Returns (sentiment bar PNG, summary/gauge PNG, stock chart PNG, ticker).
+    Charts come from the content-addressed chart service, so unchanged news
+    is not redrawn.
     """
+    stats = data["summary"]
+    # Horizontal bar image
+    sentiment_bar_img = sentiment_bar(stats["positive_pct"], stats["neutral_pct"], stats["negative_pct"])
     # Compose gauge (reuse existing gauge image)
-    sentiment_summary = create_sentiment_summary(analyzed_articles, asset_name)
+    sentiment_summary = create_sentiment_summary(data["articles"], data["asset"], stats)
     # Stock chart
     stock_chart = None
-    ticker = get_stock_ticker(asset_name)
+    ticker = get_stock_ticker(data["asset"])
     if ticker:
         stock_chart = create_stock_chart(ticker)
+    return sentiment_bar_img, sentiment_summary, stock_chart, ticker
+
+def analyze_asset_sentiment(asset_name):
+    """Sentiment analysis with charts, as shown by the Streamlit app"""
+    data = analyze_asset_sentiment_data(asset_name)
+    stats = data["summary"]
+    avg_sentiment_score = stats["avg_sentiment_score"]
+    sentiment_bar_img, sentiment_summary, stock_chart, ticker = render_sentiment_charts(data)
+    # Compose summary text
+    summary = f"""
+    **News Sentiment:** {'🟢 Positive' if avg_sentiment_score > 1 else '⚪ Neutral' if avg_sentiment_score > -1 else '🔴 Negative'}  
+    Positive {stats["positive_pct"]:.0f}% | Neutral {stats["neutral_pct"]:.0f}% | Negative {stats["negative_pct"]:.0f}%
+    """
     # Return: table, summary markdown, gauge image, chart, ticker
     return (
-        convert_to_dataframe(analyzed_articles),
+        convert_to_dataframe(data["articles"]),
         summary,
         sentiment_bar_img,
         sentiment_summary,
@@ -334,119 +386,90 @@ def analyze_asset_sentiment(asset_name):
         ticker
     )
 
-def create_sentiment_summary(analyzed_articles, asset_name):
-    """
-    Create sentiment analysis summary with market sentiment card and sentiment gauge
+def analyze_assets_sentiment_batch(asset_names, max_articles=10, include_articles=False):
+    """News sentiment for many assets at once.
+
+    News for every asset is fetched concurrently on the shared io pool,
+    articles returned for several assets are classified only once, and all
+    unique articles go through the model in one batched pass. Returns {asset: summary} with the
+    summarize_sentiment fields (plus the scored articles when
+    include_articles is set); no charts are drawn.
     """
-    total_articles = len(analyzed_articles)
-    positive_count = sum(1 for a in analyzed_articles if a["sentiment"]["label"] == "positive")
-    neutral_count = sum(1 for a in analyzed_articles if a["sentiment"]["label"] == "neutral")
-    negative_count = sum(1 for a in analyzed_articles if a["sentiment"]["label"] == "negative")
-    
-    # Calculate percentages
-    positive_pct = (positive_count / total_articles) * 100 if total_articles > 0 else 0
-    neutral_pct = (neutral_count / total_articles) * 100 if total_articles > 0 else 0
-    negative_pct = (negative_count / total_articles) * 100 if total_articles > 0 else 0
+    asset_names = list(dict.fromkeys(name.strip() for name in asset_names if name and name.strip()))
+    if not asset_names:
+        return {}
     
-    # Calculate weighted sentiment score
-    weighted_score_sum = sum(a["total_score"] for a in analyzed_articles)
-    avg_sentiment_score = weighted_score_sum / total_articles if total_articles > 0 else 0
+    fetched = dict(zip(asset_names, run_all("io", [partial(fetch_articles, name, max_articles) for name in asset_names])))
     
-    # Create figure with two subplots
-    fig = plt.figure(figsize=(15, 6))
-    gs = fig.add_gridspec(1, 2, width_ratios=[1, 1])
+    # One classification per distinct article, however many assets it was found for
+    unique = {}
+    for articles in fetched.values():
+        for article in articles:
+            unique.setdefault(article_key(article), article)
+    logging.info(f"Batch sentiment: {sum(len(a) for a in fetched.values())} articles for "
+                 f"{len(asset_names)} assets, {len(unique)} unique")
+    classified = analyze_articles_sentiment(list(unique.values()))
+    sentiments = {key: article["sentiment"] for key, article in zip(unique, classified)}
     
-    # 1. Market Sentiment Card (Pie Chart)
-    ax1 = fig.add_subplot(gs[0, 0])
-    labels = ['Positive', 'Neutral', 'Negative']
-    sizes = [positive_pct, neutral_pct, negative_pct]
-    colors = ['green', 'gray', 'red']
-    
-    ax1.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-    ax1.axis('equal')
-    ax1.set_title('Market Sentiment Distribution')
-    
-    # Add summary text
-    summary_text = f"""
-    Total Articles: {total_articles}
-    Positive: {positive_count} ({positive_pct:.1f}%)
-    Neutral: {neutral_count} ({neutral_pct:.1f}%)
-    Negative: {negative_count} ({negative_pct:.1f}%)
+    results = {}
+    for name, articles in fetched.items():
+        for article in articles:
+            article["sentiment"] = sentiments[article_key(article)]
+        articles, summary = score_and_summarize(articles)
+        if include_articles:
+            summary["articles"] = articles
+        results[name] = summary
+    return results
+
+def create_sentiment_summary(analyzed_articles, asset_name, stats=None):
     """
-    plt.figtext(0.25, 0.01, summary_text, ha='center', fontsize=10, 
-                bbox={"facecolor":"lightgray", "alpha":0.3, "pad":5})
-    
-    # 2. Sentiment Gauge
-    ax2 = fig.add_subplot(gs[0, 1])
-    
-    # Create gauge chart
-    gauge_min = -3  # Most negative
-    gauge_max = 3   # Most positive
-    gauge_value = avg_sentiment_score
-    
-    # Normalize value to 0-1 range for gauge
-    normalized_value = (gauge_value - gauge_min) / (gauge_max - gauge_min)
+    Create sentiment analysis summary with market sentiment card and sentiment gauge (PNG bytes)
     
-    # Create gauge
-    gauge = plt.Circle((0.5, 0.5), 0.4, transform=ax2.transAxes, fill=False)
-    ax2.add_patch(gauge)
-    
-    # Add gauge needle
-    angle = normalized_value * 180  # Convert to degrees
-    rad = np.radians(angle)
-    x = 0.5 + 0.35 * np.cos(rad)
-    y = 0.5 + 0.35 * np.sin(rad)
-    ax2.plot([0.5, x], [0.5, y], 'r-', linewidth=2)
-    
-    # Add gauge labels
-    ax2.text(0.5, 0.9, 'Bullish', ha='center', va='center')
-    ax2.text(0.1, 0.5, 'Bearish', ha='center', va='center')
-    ax2.text(0.5, 0.1, 'Neutral', ha='center', va='center')
-    
-    # Add current value
-    sentiment_label = "Bullish" if gauge_value > 1 else "Bearish" if gauge_value < -1 else "Neutral"
-    ax2.text(0.5, 0.5, f'{gauge_value:.2f}\n({sentiment_label})', 
-             ha='center', va='center', fontsize=12)
-    
-    ax2.set_xlim(0, 1)
-    ax2.set_ylim(0, 1)
-    ax2.axis('off')
-    ax2.set_title('Sentiment Gauge')
-    
-    plt.tight_layout()
-    
-    # Save the figure
-    fig_path = f"sentiment_summary_{asset_name.replace(' ', '_')}.png"
-    plt.savefig(fig_path)
-    plt.close()
-    
-    return fig_path
+    stats: summarize_sentiment() of the articles, when the caller already has it
+    """
+    if stats is None:
+        stats = summarize_sentiment(analyzed_articles)
+    return chart_service.render(
+        "sentiment_summary",
+        total_articles=stats["total_articles"],
+        positive_count=stats["positive_count"],
+        neutral_count=stats["neutral_count"],
+        negative_count=stats["negative_count"],
+        positive_pct=stats["positive_pct"],
+        neutral_pct=stats["neutral_pct"],
+        negative_pct=stats["negative_pct"],
+        avg_sentiment_score=stats["avg_sentiment_score"],
+    ).data
+
+# Sentiment as plain text with emoji
+SENTIMENT_BADGES = {
+    "positive": "🟢 Positive",
+    "neutral": "⚪ Neutral",
+    "negative": "🔴 Negative",
+}
 
 def convert_to_dataframe(analyzed_articles):
     # Sort articles by date in descending order (newest first) and take top 10
     sorted_articles = sorted(analyzed_articles, key=lambda x: x.get("date", ""), reverse=True)[:10]
     
-    df = pd.DataFrame(sorted_articles)
-    # Sentiment as plain text with emoji
-    def sentiment_badge(sentiment):
-        if sentiment == "positive":
-            return "🟢 Positive"
-        elif sentiment == "neutral":
-            return "⚪ Neutral"
-        elif sentiment == "negative":
-            return "🔴 Negative"
-        return sentiment
-    df["Sentiment"] = df["sentiment"].apply(lambda x: sentiment_badge(x["label"]))
-    # Title as plain text (no HTML)
-    df["Title"] = df["title"]
-    df["Description"] = df["desc"]
-    df["Date"] = df["date"]
-    df["Base Score"] = df["base_score"].apply(lambda x: f"{x:+.2f}")
-    df["Weight"] = df["time_weight"].apply(lambda x: f"{x*10:.1f}x")
-    df["Total Score"] = df["total_score"].apply(lambda x: f"{x:+.2f}")
-    return df[["Sentiment", "Title", "Description", "Date", "Base Score", "Weight", "Total Score"]]
+    # At most ten rows: format them in Python and build the frame once
+    rows = [
+        (
+            SENTIMENT_BADGES.get(a["sentiment"]["label"], a["sentiment"]["label"]),
+            a["title"],  # Title as plain text (no HTML)
+            a["desc"],
+            a["date"],
+            f"{a['base_score']:+.2f}",
+            f"{a['time_weight'] * 10:.1f}x",
+            f"{a['total_score']:+.2f}",
+        )
+        for a in sorted_articles
+    ]
+    return pd.DataFrame(rows, columns=["Sentiment", "Title", "Description", "Date", "Base Score", "Weight", "Total Score"])
 
 def main():
+    import streamlit as st
+    
     st.title("Indian Stock Market Sentiment Analysis")
     st.write("Enter a stock symbol or company name to analyze market sentiment from recent news articles!")
     
@@ -0,0 +1,516 @@
+import csv
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+
+from market_data import NIFTY50_SYMBOLS, normalize_symbol
+
+# Symbol master files: NSE's EQUITY_L.csv, BSE's scrip list (the "List of Scrips" CSV export),
+# or CSV/JSON with symbol and name fields. Every CSV/JSON under SYMBOL_MASTER_DIR is loaded,
+# plus any extra paths in SYMBOL_MASTER_PATHS (separated by os.pathsep).
+SYMBOL_MASTER_DIR = os.environ.get(
+    "SYMBOL_MASTER_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols"),
+)
+SYMBOL_MASTER_PATHS = os.environ.get("SYMBOL_MASTER_PATHS", "")
+# Where `python symbol_resolver.py` downloads NSE's equity list from (into SYMBOL_MASTER_DIR)
+NSE_EQUITY_LIST_URL = os.environ.get(
+    "NSE_EQUITY_LIST_URL", "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
+)
+
+# Fuzzy matching: similarity (0-1) a candidate needs, and candidates scored per query phrase
+FUZZY_THRESHOLD = float(os.environ.get("SYMBOL_FUZZY_THRESHOLD", "0.8"))
+FUZZY_CANDIDATES = int(os.environ.get("SYMBOL_FUZZY_CANDIDATES", "8"))
+# Queries that resolved to nothing are remembered, so they skip the fuzzy search next time
+NEGATIVE_CACHE_SIZE = int(os.environ.get("SYMBOL_NEGATIVE_CACHE_SIZE", "10000"))
+NEGATIVE_CACHE_TTL = float(os.environ.get("SYMBOL_NEGATIVE_CACHE_TTL", "3600"))
+
+# Hand-picked aliases; they win over names from the master files
+BUILTIN_ALIASES = {
+    "reliance": "RELIANCE",
+    "reliance industries": "RELIANCE",
+    "ril": "RELIANCE",
+    "tcs": "TCS",
+    "tata consultancy": "TCS",
+    "tata consultancy services": "TCS",
+    "infosys": "INFY",
+    "infy": "INFY",
+    "hdfc bank": "HDFCBANK",
+    "hdfc": "HDFCBANK",
+    "icici bank": "ICICIBANK",
+    "icici": "ICICIBANK",
+    "wipro": "WIPRO",
+    "tech mahindra": "TECHM",
+    "tata motors": "TATAMOTORS",
+    "tatamotors": "TATAMOTORS",
+    "tata steel": "TATASTEEL",
+    "tatasteel": "TATASTEEL",
+    "bharti airtel": "BHARTIARTL",
+    "airtel": "BHARTIARTL",
+    "sbi": "SBIN",
+    "state bank": "SBIN",
+    "state bank of india": "SBIN",
+    "axis bank": "AXISBANK",
+    "axis": "AXISBANK",
+    "kotak bank": "KOTAKBANK",
+    "kotak": "KOTAKBANK",
+    "asian paints": "ASIANPAINT",
+    "asian": "ASIANPAINT",
+    "bajaj auto": "BAJAJ-AUTO",
+    "bajaj": "BAJAJ-AUTO",
+    "hindalco": "HINDALCO",
+    "itc": "ITC",
+    "larsen": "LT",
+    "l&t": "LT",
+    "larsen and toubro": "LT",
+    "m&m": "M&M",
+    "mahindra": "M&M",
+    "maruti": "MARUTI",
+    "maruti suzuki": "MARUTI",
+    "nestle": "NESTLEIND",
+    "nestle india": "NESTLEIND",
+    "ongc": "ONGC",
+    "oil and natural gas": "ONGC",
+    "power grid": "POWERGRID",
+    "sun pharma": "SUNPHARMA",
+    "sun": "SUNPHARMA",
+    "titan": "TITAN",
+    "ultracemco": "ULTRACEMCO",
+    "ultra cement": "ULTRACEMCO",
+    "upl": "UPL",
+    "zeel": "ZEEL",
+    "zee": "ZEEL",
+    "zee entertainment": "ZEEL",
+    "tata power": "TATAPOWER",
+    "tatapower": "TATAPOWER",
+}
+
+# Company names of the NIFTY 50, so they resolve without a symbol master file.
+# The first is the listed name (suffixes are dropped as for master files), the rest common short forms.
+NIFTY50_NAMES = {
+    "ADANIENT": ("Adani Enterprises Limited",),
+    "ADANIPORTS": ("Adani Ports and Special Economic Zone Limited", "Adani Ports"),
+    "APOLLOHOSP": ("Apollo Hospitals Enterprise Limited", "Apollo Hospitals"),
+    "ASIANPAINT": ("Asian Paints Limited",),
+    "AXISBANK": ("Axis Bank Limited",),
+    "BAJAJ-AUTO": ("Bajaj Auto Limited",),
+    "BAJFINANCE": ("Bajaj Finance Limited",),
+    "BAJAJFINSV": ("Bajaj Finserv Limited",),
+    "BEL": ("Bharat Electronics Limited",),
+    "BHARTIARTL": ("Bharti Airtel Limited",),
+    "CIPLA": ("Cipla Limited",),
+    "COALINDIA": ("Coal India Limited",),
+    "DRREDDY": ("Dr. Reddy's Laboratories Limited", "Dr Reddy", "Dr Reddys"),
+    "EICHERMOT": ("Eicher Motors Limited", "Eicher"),
+    "ETERNAL": ("Eternal Limited", "Zomato"),
+    "GRASIM": ("Grasim Industries Limited",),
+    "HCLTECH": ("HCL Technologies Limited", "HCL Tech"),
+    "HDFCBANK": ("HDFC Bank Limited",),
+    "HDFCLIFE": ("HDFC Life Insurance Company Limited", "HDFC Life"),
+    "HEROMOTOCO": ("Hero MotoCorp Limited",),
+    "HINDALCO": ("Hindalco Industries Limited",),
+    "HINDUNILVR": ("Hindustan Unilever Limited", "HUL"),
+    "ICICIBANK": ("ICICI Bank Limited",),
+    "INDUSINDBK": ("IndusInd Bank Limited",),
+    "INFY": ("Infosys Limited",),
+    "ITC": ("ITC Limited",),
+    "JIOFIN": ("Jio Financial Services Limited", "Jio Financial"),
+    "JSWSTEEL": ("JSW Steel Limited",),
+    "KOTAKBANK": ("Kotak Mahindra Bank Limited",),
+    "LT": ("Larsen & Toubro Limited",),
+    "M&M": ("Mahindra & Mahindra Limited",),
+    "MARUTI": ("Maruti Suzuki India Limited",),
+    "NESTLEIND": ("Nestle India Limited",),
+    "NTPC": ("NTPC Limited",),
+    "ONGC": ("Oil & Natural Gas Corporation Limited",),
+    "POWERGRID": ("Power Grid Corporation of India Limited",),
+    "RELIANCE": ("Reliance Industries Limited",),
+    "SBILIFE": ("SBI Life Insurance Company Limited", "SBI Life"),
+    "SBIN": ("State Bank of India",),
+    "SHRIRAMFIN": ("Shriram Finance Limited",),
+    "SUNPHARMA": ("Sun Pharmaceutical Industries Limited",),
+    "TATACONSUM": ("Tata Consumer Products Limited", "Tata Consumer"),
+    "TATAMOTORS": ("Tata Motors Limited",),
+    "TATASTEEL": ("Tata Steel Limited",),
+    "TCS": ("Tata Consultancy Services Limited",),
+    "TECHM": ("Tech Mahindra Limited",),
+    "TITAN": ("Titan Company Limited",),
+    "TRENT": ("Trent Limited",),
+    "ULTRACEMCO": ("UltraTech Cement Limited", "UltraTech"),
+    "WIPRO": ("Wipro Limited",),
+}
+
+# Words of a query that never name a company on their own
+STOPWORDS = frozenset("""
+a about after all an analysis and any are as at be best buy by can current day did do does down
+for from get give good has have how i in index is it latest me market my news now of on or outlook
+performance price prices query quote rate sell share shares should show stock stocks tell than that
+the this to today top trend up value was what when which will with week year
+""".split())
+
+# Corporate suffixes dropped from master-file names ("Titan Company Limited" -> "titan")
+NAME_SUFFIXES = frozenset(("limited", "ltd", "inc", "corporation", "corp", "company", "co", "plc"))
+
+_TOKEN = re.compile(r"[a-z0-9&]+")
+_WORD = re.compile(r"[A-Za-z0-9&]+")
+
+
+def tokenize(text: str) -> tuple:
+    """Lower-case word tokens; '&' is kept inside words so "l&t" and "m&m" stay whole"""
+    return tuple(_TOKEN.findall(text.lower()))
+
+
+def capitalized_tokens(text: str) -> set:
+    """Lower-cased tokens that the text writes in capitals ("IDEA" counts, "idea" and "Idea" do not)"""
+    return {word.lower() for word in _WORD.findall(text) if word.isupper()}
+
+
+def _trigrams(phrase: str) -> set:
+    padded = f" {phrase} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _AliasAutomaton:
+    """Aho-Corasick automaton over alias token sequences.
+
+    Working on words rather than characters keeps it small (one node per
+    distinct alias prefix) and makes every hit fall on word boundaries, so
+    "sun" matches "sun pharma" but not "sunday". One pass over a query finds
+    every alias it contains.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        # Alias id ending at each node, and the nearest shorter alias reachable through fail links
+        self.output = [None]
+        self.dict_link = [0]
+
+    def add(self, tokens: tuple, alias_id: int):
+        node = 0
+        for token in tokens:
+            next_node = self.goto[node].get(token)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][token] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.dict_link.append(0)
+            node = next_node
+        if self.output[node] is None:
+            self.output[node] = alias_id
+
+    def build(self):
+        """Compute fail and dictionary links breadth first, after all aliases are added"""
+        queue = list(self.goto[0].values())
+        for node in queue:
+            self.fail[node] = 0
+        for node in queue:
+            for token, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(token, 0)
+                self.fail[child] = target if target != child else 0
+                link = self.fail[child]
+                self.dict_link[child] = link if self.output[link] is not None else self.dict_link[link]
+                queue.append(child)
+
+    def matches(self, tokens: tuple):
+        """(end token index, alias id) for every alias occurring in tokens"""
+        node = 0
+        for index, token in enumerate(tokens):
+            while node and token not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(token, 0)
+            hit = node if self.output[node] is not None else self.dict_link[node]
+            while hit:
+                yield index, self.output[hit]
+                hit = self.dict_link[hit]
+
+    def __len__(self):
+        return len(self.goto)
+
+
+class SymbolResolver:
+    """Company names and aliases to Yahoo Finance tickers, entirely offline.
+
+    Lookups go, in order, through an Aho-Corasick match of every known alias
+    in the query (the longest alias wins), a cache of queries known to match
+    nothing, and a fuzzy search that takes candidates sharing the most
+    trigrams with the query's phrases and scores them by similarity. The
+    index is built on first use from BUILTIN_ALIASES, the NIFTY 50 symbols
+    and names, and the symbol master files; companies outside the NIFTY 50
+    resolve only if a master file lists them.
+
+    Bare symbols from master files match only when the query writes them in
+    capitals, and never fuzzily: many are ordinary words ("IDEA", "SUN"), and
+    a full master would otherwise find a ticker in most sentences.
+    """
+
+    def __init__(self, master_paths: list = None):
+        self.master_paths = master_paths
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._aliases = []  # alias id -> (phrase, ticker)
+        self._alias_ids = {}
+        self._capitals_only = set()  # alias ids that match only when written in capitals
+        self._automaton = _AliasAutomaton()
+        self._trigram_index = {}
+        self._negative = OrderedDict()
+        self.master_files = []
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def _default_master_paths(self) -> list:
+        paths = sorted(glob.glob(os.path.join(SYMBOL_MASTER_DIR, "*.csv")) +
+                       glob.glob(os.path.join(SYMBOL_MASTER_DIR, "*.json")))
+        return paths + [p for p in SYMBOL_MASTER_PATHS.split(os.pathsep) if p]
+
+    def _add(self, phrase_tokens: tuple, ticker: str, capitals_only: bool = False):
+        phrase = " ".join(phrase_tokens)
+        if not phrase or phrase in STOPWORDS:
+            return
+        alias_id = self._alias_ids.get(phrase)
+        if alias_id is not None:
+            # A name (or curated alias) equal to a capitals-only symbol makes it match in any case
+            if alias_id in self._capitals_only and not capitals_only:
+                self._capitals_only.discard(alias_id)
+                self._index_trigrams(phrase, alias_id)
+            return
+        alias_id = len(self._aliases)
+        self._aliases.append((phrase, ticker))
+        self._alias_ids[phrase] = alias_id
+        self._automaton.add(phrase_tokens, alias_id)
+        if capitals_only:
+            self._capitals_only.add(alias_id)
+        else:
+            self._index_trigrams(phrase, alias_id)
+
+    def _index_trigrams(self, phrase: str, alias_id: int):
+        for gram in _trigrams(phrase):
+            self._trigram_index.setdefault(gram, []).append(alias_id)
+
+    def _add_company(self, ticker: str, name: str = None, symbol_capitals_only: bool = False):
+        """Aliases of one listed company: its bare symbol, its name, and the name without suffixes"""
+        root = ticker.rsplit(".", 1)[0] if ticker.endswith((".NS", ".BO")) else ticker
+        self._add(tokenize(root), ticker, capitals_only=symbol_capitals_only)
+        if not name:
+            return
+        tokens = tokenize(name)
+        if tokens and tokens[0] == "the":
+            tokens = tokens[1:]
+        self._add(tokens, ticker)
+        while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+            tokens = tokens[:-1]
+        self._add(tokens, ticker)
+
+    def _build(self):
+        for alias, symbol in BUILTIN_ALIASES.items():
+            self._add(tokenize(alias), normalize_symbol(symbol))
+        for symbol in NIFTY50_SYMBOLS:
+            ticker = normalize_symbol(symbol)
+            self._add_company(ticker)
+            for name in NIFTY50_NAMES.get(symbol, ()):
+                self._add_company(ticker, name)
+
+        # NSE listings are added before BSE ones, so a company listed on both resolves to .NS
+        companies = []
+        for path in self.master_paths if self.master_paths is not None else self._default_master_paths():
+            try:
+                rows = load_symbol_master(path)
+            except Exception as e:
+                logging.error(f"Error loading symbol master {path}: {str(e)}")
+                continue
+            companies.extend(rows)
+            self.master_files.append({"path": path, "symbols": len(rows)})
+        if not self.master_files:
+            logging.warning(f"No symbol master files in {SYMBOL_MASTER_DIR}; only NIFTY 50 and built-in names "
+                            f"will resolve (python symbol_resolver.py downloads NSE's equity list)")
+        companies.sort(key=lambda row: row[0].endswith(".BO"))
+        for ticker, name in companies:
+            self._add_company(ticker, name, symbol_capitals_only=True)
+
+        self._automaton.build()
+        self._loaded = True
+        logging.info(f"Symbol index built: {len(self._aliases)} aliases from {len(self.master_files)} master files")
+
+    def load(self):
+        """Build the index now rather than on the first lookup"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._build()
+
+    def _exact(self, tokens: tuple, capitals: set):
+        best = None
+        for end, alias_id in self._automaton.matches(tokens):
+            phrase, ticker = self._aliases[alias_id]
+            if alias_id in self._capitals_only and not capitals.issuperset(phrase.split(" ")):
+                continue
+            length = phrase.count(" ") + 1
+            # Longest alias first, then the earliest one in the query
+            rank = (length, len(phrase), -(end - length))
+            if best is None or rank > best[0]:
+                best = (rank, ticker)
+        return best[1] if best else None
+
+    def _fuzzy(self, tokens: tuple):
+        words = [t for t in tokens if t not in STOPWORDS]
+        phrases = {
+            " ".join(words[start:start + size])
+            for size in (1, 2, 3) for start in range(len(words) - size + 1)
+        }
+        best_score, best_ticker = 0.0, None
+        for phrase in phrases:
+            if len(phrase) < 4:
+                continue
+            grams = _trigrams(phrase)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigram_index.get(gram, ()))
+            for alias_id, _ in shared.most_common(FUZZY_CANDIDATES):
+                alias, ticker = self._aliases[alias_id]
+                score = SequenceMatcher(None, phrase, alias).ratio()
+                if score > best_score:
+                    best_score, best_ticker = score, ticker
+        return best_ticker if best_score >= FUZZY_THRESHOLD else None
+
+    def _known_unknown(self, key: tuple) -> bool:
+        with self._lock:
+            stored = self._negative.get(key)
+            if stored is None:
+                return False
+            if time.monotonic() - stored > NEGATIVE_CACHE_TTL:
+                del self._negative[key]
+                return False
+            self._negative.move_to_end(key)
+            return True
+
+    def _remember_unknown(self, key: tuple):
+        with self._lock:
+            self._negative[key] = time.monotonic()
+            self._negative.move_to_end(key)
+            while len(self._negative) > NEGATIVE_CACHE_SIZE:
+                self._negative.popitem(last=False)
+
+    def resolve(self, text: str):
+        """Ticker (e.g. "RELIANCE.NS") of the company a text names, or None"""
+        self.load()
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        ticker = self._exact(tokens, capitalized_tokens(text) if self._capitals_only else set())
+        if ticker:
+            self.exact_hits += 1
+            return ticker
+        if self._known_unknown(tokens):
+            self.negative_hits += 1
+            return None
+        ticker = self._fuzzy(tokens)
+        if ticker:
+            self.fuzzy_hits += 1
+            return ticker
+        self.misses += 1
+        self._remember_unknown(tokens)
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            negative_entries = len(self._negative)
+        return {
+            "loaded": self._loaded,
+            "aliases": len(self._aliases),
+            "capitals_only_aliases": len(self._capitals_only),
+            "automaton_nodes": len(self._automaton),
+            "trigrams": len(self._trigram_index),
+            "master_files": list(self.master_files),
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "negative_entries": negative_entries,
+        }
+
+
+def _field(row: dict, *names):
+    for name in names:
+        value = row.get(name)
+        if value and value.strip():
+            return value.strip()
+    return None
+
+
+def load_symbol_master(path: str) -> list:
+    """(ticker, company name) pairs from a symbol master file.
+
+    Understands NSE's EQUITY_L.csv (SYMBOL, NAME OF COMPANY), BSE's scrip list
+    (Security Id, Security Name, Status; inactive scrips are skipped) and
+    generic CSV/JSON rows with symbol, name and optional exchange
+    ("NSE"/"BSE") fields. Symbols without an exchange suffix get .NS, or .BO
+    for BSE rows.
+    """
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+
+    companies = []
+    for row in rows:
+        # Header names vary in case and padding (NSE's file has " SERIES")
+        row = {str(key).strip().lower(): str(value) for key, value in row.items() if key is not None and value is not None}
+        status = _field(row, "status")
+        if status and status.lower() != "active":
+            continue
+        bse = "security id" in row or (_field(row, "exchange") or "").upper() == "BSE"
+        symbol = _field(row, "symbol", "security id", "ticker")
+        if not symbol:
+            continue
+        symbol = symbol.upper()
+        if not symbol.endswith((".NS", ".BO")):
+            symbol = f"{symbol}.BO" if bse else f"{symbol}.NS"
+        companies.append((symbol, _field(row, "name of company", "security name", "issuer name", "name")))
+    return companies
+
+
+def fetch_symbol_master(directory: str = SYMBOL_MASTER_DIR, url: str = NSE_EQUITY_LIST_URL) -> str:
+    """Download NSE's equity list (EQUITY_L.csv) into the symbol master directory; returns its path"""
+    import urllib.request
+
+    # NSE's archive refuses requests without a browser-like User-Agent
+    request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0", "Accept": "text/csv"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        data = response.read()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "EQUITY_L.csv")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    try:
+        # An error page instead of the CSV must not replace a good snapshot
+        if not load_symbol_master(tmp_path):
+            raise ValueError(f"No symbols in the file downloaded from {url}")
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return path
+
+
+symbol_resolver = SymbolResolver()
+
+
+if __name__ == "__main__":
+    master_path = fetch_symbol_master()
+    print(f"{len(load_symbol_master(master_path))} symbols written to {master_path}")
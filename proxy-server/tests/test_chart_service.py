@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from chart_service import chart_key
+
+
+def stock_params(index):
+    close = np.linspace(100.0, 120.0, len(index))
+    return {"ticker": "TCS.NS", "dates": index.to_numpy(), "close": close, "volume": close * 10}
+
+
+def test_equal_inputs_give_equal_keys():
+    index = pd.date_range("2024-01-01", periods=30, freq="B")
+    assert chart_key("stock", stock_params(index)) == chart_key("stock", stock_params(index.copy()))
+
+
+def test_tz_aware_dates_give_equal_keys():
+    # A tz-aware index converts to an object array of Timestamps
+    index = pd.date_range("2024-01-01", periods=30, freq="B", tz="Asia/Kolkata")
+    assert stock_params(index)["dates"].dtype == object
+    assert chart_key("stock", stock_params(index)) == chart_key("stock", stock_params(index.copy()))
+
+
+def test_different_inputs_give_different_keys():
+    index = pd.date_range("2024-01-01", periods=30, freq="B")
+    params = stock_params(index)
+    changed = dict(params, close=params["close"] + 1)
+    assert chart_key("stock", params) != chart_key("stock", changed)
+    assert chart_key("stock", params) != chart_key("sentiment_bar", params)
+    later = stock_params(index + pd.Timedelta(days=1))
+    assert chart_key("stock", params) != chart_key("stock", later)
@@ -0,0 +1,66 @@
+import pytest
+
+import data_providers
+from chatbot import IndianStockChatbot, format_ratio, format_volume
+from market_cache import market_cache
+from symbol_resolver import SymbolResolver
+from test_data_providers import FakeProvider
+
+
+@pytest.fixture(scope="module")
+def chatbot():
+    return IndianStockChatbot()
+
+
+@pytest.fixture
+def upstream():
+    provider = FakeProvider()
+    previous = data_providers.set_provider(provider)
+    market_cache.clear()
+    yield provider
+    data_providers.set_provider(previous)
+    market_cache.clear()
+
+
+def test_format_helpers():
+    assert format_ratio(None) == "N/A"
+    assert format_ratio(float("nan")) == "N/A"
+    assert format_ratio(30.456) == "30.46"
+    assert format_volume(1000.0) == "1,000"
+    assert format_volume(None) == "N/A"
+
+
+def test_portfolio_on_a_cold_cache(chatbot, upstream):
+    # Fundamentals are still being fetched in the background: P/E is shown as N/A
+    response = chatbot.process_query("show my portfolio")
+    assert response.startswith("Portfolio Analysis:")
+    assert "P/E Ratio: N/A" in response
+
+
+def test_watchlist_on_a_cold_cache(chatbot, upstream):
+    response = chatbot.process_query("show my watchlist")
+    assert response.startswith("Watchlist Analysis:")
+    assert "P/E Ratio: N/A" in response
+    assert "Volume: 1,000\n" in response
+
+
+@pytest.fixture
+def master_resolver(tmp_path, monkeypatch):
+    master = tmp_path / "EQUITY_L.csv"
+    master.write_text("SYMBOL,NAME OF COMPANY, SERIES\nZYDUSLIFE,Zydus Lifesciences Limited,EQ\n")
+    monkeypatch.setattr("chatbot.symbol_resolver", SymbolResolver(master_paths=[str(master)]))
+
+
+def test_master_file_symbols_resolve_from_chat(chatbot, master_resolver, monkeypatch):
+    requested = []
+    monkeypatch.setattr(chatbot, "classify_intent", lambda query: ("price_query", 0.95, "neutral"))
+    monkeypatch.setattr(chatbot, "get_stock_details", lambda symbol: requested.append(symbol))
+    chatbot.process_query("What is the ZYDUSLIFE share price")
+    assert requested == ["ZYDUSLIFE"]
+
+
+def test_master_file_symbols_resolve_for_trading_signals(chatbot, master_resolver, monkeypatch):
+    requested = []
+    monkeypatch.setattr(chatbot, "get_trading_signals", lambda symbol: requested.append(symbol))
+    chatbot.process_query("Any buy signal on ZYDUSLIFE?")
+    assert requested == ["ZYDUSLIFE"]
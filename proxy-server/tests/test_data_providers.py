@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import data_providers
+from data_providers import MarketDataProvider, RecordingProvider, ReplayProvider
+from market_cache import market_cache
+from market_data import get_history
+from news_sources import LocalNewsSource, fetch_news
+
+
+class FakeProvider(MarketDataProvider):
+    """Upstream stand-in that counts its calls"""
+    name = "fake"
+    # Tests never write to the on-disk price store
+    use_price_store = False
+
+    def __init__(self):
+        self.calls = []
+        self.news = LocalNewsSource([{"title": f"TCS wins order {i}", "desc": "", "link": f"https://news.example/{i}"}
+                                     for i in range(15)], page_size=10)
+
+    def _bars(self, symbol):
+        index = pd.date_range("2024-01-01", periods=20, freq="B")
+        close = pd.Series(range(100, 120), index=index, dtype=float)
+        return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000.0})
+
+    def download(self, symbols, period, interval):
+        self.calls.append(("download", tuple(symbols)))
+        return pd.concat({symbol: self._bars(symbol) for symbol in symbols}, axis=1).swaplevel(axis=1)
+
+    def history(self, symbol, period=None, interval="1d", start=None):
+        self.calls.append(("history", symbol, period, interval, start))
+        return self._bars(symbol)
+
+    def info(self, symbol):
+        self.calls.append(("info", symbol))
+        return {"symbol": symbol, "trailingPE": 30.5}
+
+    def ticker_attribute(self, symbol, attribute):
+        self.calls.append(("ticker_attribute", symbol, attribute))
+        return {"attribute": attribute}
+
+    def sector(self, sector_key, fields):
+        return {field: sector_key for field in fields}
+
+    def industry(self, industry_key, fields):
+        return {field: industry_key for field in fields}
+
+    def news_source(self):
+        return self.news
+
+
+@pytest.fixture
+def provider_slot():
+    previous = data_providers.set_provider(None)
+    market_cache.clear()
+    yield data_providers.set_provider
+    data_providers.set_provider(previous)
+    market_cache.clear()
+
+
+def test_incomplete_provider_cannot_be_instantiated():
+    class HistoryOnly(MarketDataProvider):
+        def history(self, symbol, period=None, interval="1d", start=None):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        HistoryOnly()
+
+
+def test_recorded_calls_replay_offline(provider_slot, tmp_path):
+    inner = FakeProvider()
+    provider_slot(RecordingProvider(inner, directory=str(tmp_path)))
+    recorded_history = get_history("TCS.NS", "1mo")
+    recorded_news = fetch_news(data_providers.get_provider().news_source(), "tcs", max_articles=12, concurrency=1)
+    # Recording asks upstream exactly what replay will ask, not the price store's start-date query
+    assert ("history", "TCS.NS", "1mo", "1d", None) in inner.calls
+
+    replay = ReplayProvider(directory=str(tmp_path), latency="0")
+    provider_slot(replay)
+    market_cache.clear()
+    pd.testing.assert_frame_equal(get_history("TCS.NS", "1mo"), recorded_history)
+    assert fetch_news(replay.news_source(), "tcs", max_articles=12, concurrency=1) == recorded_news
+    assert replay.misses == 0
+
+
+def test_replay_miss_raises_lookup_error(tmp_path):
+    replay = ReplayProvider(directory=str(tmp_path), latency="0")
+    with pytest.raises(LookupError):
+        replay.history("INFY.NS", "1mo")
+    assert replay.news_source().search("infy").page(1) == []
+    assert replay.misses == 2
+
+
+def test_replay_counts_concurrent_calls(tmp_path):
+    RecordingProvider(FakeProvider(), directory=str(tmp_path)).info("TCS.NS")
+    replay = ReplayProvider(directory=str(tmp_path), latency="0")
+
+    def call(i):
+        try:
+            replay.info("TCS.NS" if i % 2 else "INFY.NS")
+        except LookupError:
+            pass
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(call, range(2000)))
+    assert (replay.calls, replay.misses) == (2000, 1000)
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_providers
+from indicator_state import IndicatorStore
+from indicators import IncrementalIndicators, compute_indicators
+from market_cache import market_cache
+from test_data_providers import FakeProvider
+
+ta = pytest.importorskip("ta")
+
+NAMES = ("rsi", "macd", "macd_signal", "macd_histogram", "bb_upper", "bb_middle", "bb_lower")
+
+
+def synthetic_prices(bars, symbols=1, seed=0):
+    rng = np.random.default_rng(seed)
+    return 1000 * np.exp(np.cumsum(rng.normal(0, 0.015, size=(bars, symbols)), axis=0))
+
+
+def ta_indicators(prices):
+    """The reference values, from ta's default RSI(14), MACD(12, 26, 9) and Bollinger(20, 2)"""
+    close = pd.Series(prices)
+    macd = ta.trend.MACD(close)
+    bands = ta.volatility.BollingerBands(close)
+    return {
+        "rsi": ta.momentum.RSIIndicator(close).rsi().to_numpy(),
+        "macd": macd.macd().to_numpy(),
+        "macd_signal": macd.macd_signal().to_numpy(),
+        "macd_histogram": macd.macd_diff().to_numpy(),
+        "bb_upper": bands.bollinger_hband().to_numpy(),
+        "bb_middle": bands.bollinger_mavg().to_numpy(),
+        "bb_lower": bands.bollinger_lband().to_numpy(),
+    }
+
+
+def assert_matches(actual, expected, name):
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected), err_msg=f"{name} warm-up differs")
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-8, err_msg=name)
+
+
+def test_single_series_matches_ta():
+    prices = synthetic_prices(250)[:, 0]
+    results, expected = compute_indicators(prices), ta_indicators(prices)
+    for name in NAMES:
+        assert_matches(results[name], expected[name], name)
+
+
+def test_batch_matches_ta_per_symbol():
+    prices = synthetic_prices(250, symbols=5)
+    results = compute_indicators(prices)
+    for j in range(prices.shape[1]):
+        expected = ta_indicators(prices[:, j])
+        for name in NAMES:
+            assert_matches(results[name][:, j], expected[name], f"{name} (symbol {j})")
+
+
+def test_incremental_matches_ta_at_every_bar():
+    prices = synthetic_prices(120)[:, 0]
+    expected = ta_indicators(prices)
+    indicators = IncrementalIndicators()
+    for i, price in enumerate(prices):
+        values = indicators.update(price)
+        for name in NAMES:
+            assert_matches(np.array([values[name]]), expected[name][i:i + 1], f"{name} at bar {i}")
+
+
+def test_revised_bar_matches_ta_on_the_revised_series():
+    prices = synthetic_prices(80)[:, 0]
+    indicators = IncrementalIndicators()
+    indicators.seed(prices)
+    revised = prices.copy()
+    for new_price in (revised[-1] * 1.03, revised[-1] * 0.95):
+        revised[-1] = new_price
+        values = indicators.revise(new_price)
+        expected = ta_indicators(revised)
+        for name in NAMES:
+            assert_matches(np.array([values[name]]), expected[name][-1:], name)
+
+
+class MovingProvider(FakeProvider):
+    """Daily closes that the test can extend or revise"""
+
+    def __init__(self, prices):
+        super().__init__()
+        self.closes = pd.Series(prices, index=pd.bdate_range("2024-01-01", periods=len(prices)))
+
+    def _bars(self, symbol):
+        close = self.closes
+        return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000.0})
+
+    def download(self, symbols, period, interval):
+        recent = {symbol: self._bars(symbol).iloc[-5:] for symbol in symbols}
+        return pd.concat(recent, axis=1).swaplevel(axis=1)
+
+
+@pytest.fixture
+def moving_provider():
+    provider = MovingProvider(synthetic_prices(200)[:, 0])
+    previous = data_providers.set_provider(provider)
+    market_cache.clear()
+    yield provider
+    data_providers.set_provider(previous)
+    market_cache.clear()
+
+
+def test_indicator_store_matches_ta_as_bars_arrive(moving_provider):
+    store = IndicatorStore()
+
+    def check():
+        latest = store.latest("TEST")
+        expected = ta_indicators(moving_provider.closes.to_numpy())
+        for name in NAMES:
+            assert latest[name] == pytest.approx(expected[name][-1], abs=1e-8), name
+
+    check()
+    # Today's bar moves, then a new session starts
+    moving_provider.closes.iloc[-1] *= 1.02
+    market_cache.clear()
+    check()
+    next_day = moving_provider.closes.index[-1] + pd.offsets.BDay()
+    moving_provider.closes.loc[next_day] = moving_provider.closes.iloc[-1] * 0.99
+    market_cache.clear()
+    check()
+    assert store.stats()["seeds"] == 1
+    assert store.stats()["revisions"] == 1 and store.stats()["updates"] == 1
@@ -0,0 +1,179 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from market_cache import MarketDataCache, cached
+
+
+class Clock:
+    """Stands in for the time module so tests can move time forward"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("market_cache.time", clock)
+    return clock
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def counting_loader(value="value"):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return value
+    return loader, calls
+
+
+def test_hit_after_load(clock):
+    cache = MarketDataCache()
+    loader, calls = counting_loader()
+    assert cache.get_or_load("quote", "TCS", loader) == "value"
+    assert cache.get_or_load("quote", "TCS", loader) == "value"
+    assert len(calls) == 1
+    counters = cache.stats()["classes"]["quote"]
+    assert (counters["hits"], counters["misses"], counters["loads"]) == (1, 1, 1)
+
+
+def test_entries_expire_after_their_class_ttl(clock):
+    cache = MarketDataCache()
+    quote, quote_calls = counting_loader()
+    history, history_calls = counting_loader()
+    cache.get_or_load("quote", "TCS", quote)
+    cache.get_or_load("history", "TCS", history)
+
+    clock.now += 16  # past the 15s quote TTL, well within 15 minutes of history
+    cache.get_or_load("quote", "TCS", quote)
+    cache.get_or_load("history", "TCS", history)
+    assert (len(quote_calls), len(history_calls)) == (2, 1)
+    assert cache.peek("history", "TCS") == "value"
+
+    clock.now += 15 * 60
+    assert cache.peek("history", "TCS") is None
+
+
+def test_explicit_ttl_overrides_the_class(clock):
+    cache = MarketDataCache()
+    loader, calls = counting_loader()
+    cache.get_or_load("sector", "it", loader, ttl=5)
+    clock.now += 6
+    cache.get_or_load("sector", "it", loader)
+    assert len(calls) == 2
+
+
+def test_unknown_data_class_is_rejected():
+    with pytest.raises(ValueError):
+        MarketDataCache().get_or_load("bogus", "key", lambda: 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = MarketDataCache(max_entries=2)
+    cache.get_or_load("quote", "A", lambda: "a")
+    cache.get_or_load("quote", "B", lambda: "b")
+    cache.get_or_load("quote", "A", lambda: "a")  # A is now the most recently used
+    cache.get_or_load("quote", "C", lambda: "c")
+    assert cache.peek("quote", "B") is None
+    assert cache.peek("quote", "A") == "a"
+    assert cache.peek("quote", "C") == "c"
+    assert cache.stats()["classes"]["quote"]["evictions"] == 1
+
+
+def test_byte_budget_evicts_and_skips_oversized_values(clock):
+    cache = MarketDataCache(max_bytes=3000)
+    cache.get_or_load("news", "A", lambda: "a" * 1000)
+    cache.get_or_load("news", "B", lambda: "b" * 1000)
+    cache.get_or_load("news", "C", lambda: "c" * 1000)
+    assert cache.peek("news", "A") is None
+    assert cache.stats()["bytes"] <= 3000
+
+    # Returned to the caller, but never stored
+    assert cache.get_or_load("news", "huge", lambda: "x" * 5000) == "x" * 5000
+    assert cache.peek("news", "huge") is None
+
+
+def test_concurrent_misses_load_once():
+    cache = MarketDataCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        assert release.wait(5)
+        return {"price": 100.0}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_load, "quote", "TCS", slow_loader) for _ in range(8)]
+        assert started.wait(5)
+        # Let the other callers reach the in-flight load before it finishes
+        wait_until(lambda: cache.stats()["classes"]["quote"]["waits"] == 7)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_a_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = MarketDataCache()
+    started, release = threading.Event(), threading.Event()
+
+    def failing_loader():
+        started.set()
+        assert release.wait(5)
+        raise LookupError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.get_or_load, "quote", "TCS", failing_loader) for _ in range(4)]
+        assert started.wait(5)
+        wait_until(lambda: cache.stats()["classes"]["quote"]["waits"] == 3)
+        release.set()
+        for future in futures:
+            with pytest.raises(LookupError):
+                future.result(timeout=5)
+
+    assert cache.stats()["classes"]["quote"]["errors"] == 1
+    assert cache.get_or_load("quote", "TCS", lambda: "recovered") == "recovered"
+
+
+def test_invalidate_one_key_or_a_class(clock):
+    cache = MarketDataCache()
+    for key in ("A", "B"):
+        cache.get_or_load("quote", key, lambda: key)
+    cache.get_or_load("history", "A", lambda: "h")
+    cache.invalidate("quote", "A")
+    assert cache.peek("quote", "A") is None and cache.peek("quote", "B") == "B"
+    cache.invalidate("quote")
+    assert cache.peek("quote", "B") is None
+    assert cache.peek("history", "A") == "h"
+
+
+def test_cached_decorator_keys_on_arguments(clock):
+    cache = MarketDataCache()
+    calls = []
+
+    @cached("fundamentals", cache=cache)
+    def fundamentals(symbol, fields=("pe",)):
+        calls.append(symbol)
+        return {"symbol": symbol}
+
+    fundamentals("TCS")
+    fundamentals("TCS")
+    fundamentals("INFY")
+    fundamentals("TCS", fields=["pe", "pb"])
+    assert calls == ["TCS", "INFY", "TCS"]
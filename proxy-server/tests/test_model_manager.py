@@ -0,0 +1,58 @@
+import sys
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import model_manager
+
+
+class SlowModel:
+    """from_pretrained blocks until the test releases it"""
+    started = threading.Event()
+    release = threading.Event()
+
+    @classmethod
+    def from_pretrained(cls, checkpoint):
+        cls.started.set()
+        assert cls.release.wait(10)
+        return cls()
+
+    def parameters(self):
+        return []
+
+    def buffers(self):
+        return []
+
+
+@pytest.fixture
+def slow_transformers(monkeypatch):
+    fake = types.ModuleType("transformers")
+    fake.AutoModelForSequenceClassification = SlowModel
+    fake.AutoTokenizer = types.SimpleNamespace(from_pretrained=lambda checkpoint: object())
+    fake.pipeline = lambda task, model, tokenizer, device=None: (lambda inputs, **kwargs: inputs)
+    monkeypatch.setitem(sys.modules, "transformers", fake)
+    SlowModel.started.clear()
+    SlowModel.release.clear()
+    yield
+    SlowModel.release.set()
+
+
+def test_status_does_not_wait_for_a_loading_model(slow_transformers):
+    batcher = model_manager.get_pipeline("text-classification", "test/slow-checkpoint")
+    loader = threading.Thread(target=batcher.load, daemon=True)
+    loader.start()
+    assert SlowModel.started.wait(5)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        status = pool.submit(model_manager.model_status)
+        report = pool.submit(model_manager.memory_report)
+        assert status.result(timeout=2)[batcher.name] is False
+        assert "test/slow-checkpoint (AutoModelForSequenceClassification)" not in report.result(timeout=2)["models"]
+
+    SlowModel.release.set()
+    loader.join(5)
+    assert model_manager.model_status()[batcher.name] is True
+    report = model_manager.memory_report()["models"]
+    assert report["test/slow-checkpoint (AutoModelForSequenceClassification)"]["tasks"] == ["text-classification"]
@@ -0,0 +1,60 @@
+import pytest
+
+from news_sources import LocalNewsSource, NewsSearch, NewsSource, fetch_news
+
+
+def articles(count, prefix="Infosys results"):
+    return [{"title": f"{prefix} {i}", "desc": "quarterly update", "link": f"https://news.example/{prefix}/{i}"}
+            for i in range(count)]
+
+
+def test_incomplete_sources_cannot_be_instantiated():
+    class NoSearch(NewsSource):
+        pass
+
+    class NoPage(NewsSearch):
+        pass
+
+    with pytest.raises(TypeError):
+        NoSearch()
+    with pytest.raises(TypeError):
+        NoPage()
+
+
+def test_first_page_alone_when_it_fills_the_quota():
+    source = LocalNewsSource(articles(30), page_size=10)
+    found = fetch_news(source, "infosys", max_articles=10)
+    assert [a["title"] for a in found] == [f"Infosys results {i}" for i in range(10)]
+    assert source.pages_served == 1
+
+
+def test_duplicates_across_pages_are_dropped():
+    unique = articles(15)
+    # The same articles show up again on later pages
+    source = LocalNewsSource(unique[:10] + unique[5:10] + unique[10:], page_size=5)
+    found = fetch_news(source, "infosys", max_articles=15, concurrency=1)
+    assert [a["link"] for a in found] == [a["link"] for a in unique]
+    assert source.pages_served == 4
+
+
+def test_stops_once_the_quota_is_met():
+    source = LocalNewsSource(articles(100), page_size=10)
+    found = fetch_news(source, "infosys", max_articles=25, concurrency=1)
+    assert len(found) == 25
+    assert [a["title"] for a in found] == [f"Infosys results {i}" for i in range(25)]
+    # Pages 1-3 fill the quota; nothing beyond them is requested
+    assert source.pages_served == 3
+
+
+def test_stops_at_an_empty_page():
+    source = LocalNewsSource(articles(12), page_size=5)
+    found = fetch_news(source, "infosys", max_articles=50, max_pages=10, concurrency=1)
+    assert len(found) == 12
+    # Pages 1-3 hold articles and page 4 is empty
+    assert source.pages_served == 4
+
+
+def test_empty_first_page():
+    source = LocalNewsSource(articles(5, prefix="TCS order"), page_size=5)
+    assert fetch_news(source, "infosys", max_articles=10) == []
+    assert source.pages_served == 1
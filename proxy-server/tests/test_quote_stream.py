@@ -0,0 +1,22 @@
+import pytest
+
+from quote_stream import parse_command
+
+
+def test_valid_commands():
+    assert parse_command({"subscribe": ["TCS", "INFY"]}) == {"subscribe": ["TCS", "INFY"]}
+    assert parse_command({"unsubscribe": ["TCS"], "id": 7}) == {"unsubscribe": ["TCS"]}
+    assert parse_command({}) == {}
+
+
+@pytest.mark.parametrize("message", [
+    ["TCS"],
+    "subscribe TCS",
+    None,
+    {"subscribe": "TCS"},
+    {"subscribe": ["TCS", 5]},
+    {"unsubscribe": {"TCS": True}},
+])
+def test_malformed_commands_are_rejected(message):
+    with pytest.raises(ValueError):
+        parse_command(message)
@@ -0,0 +1,26 @@
+import threading
+
+import sentiment_analysis
+
+
+def test_batch_fetches_news_on_the_shared_io_pool(monkeypatch):
+    threads = {}
+
+    def fetch_articles(name, max_articles=10):
+        threads[name] = threading.current_thread().name
+        return [{"title": f"{name} order win", "desc": "", "date": "", "link": "https://news.example/shared"},
+                {"title": f"{name} results", "desc": "", "date": "", "link": f"https://news.example/{name}"}]
+
+    def classify(articles):
+        for article in articles:
+            article["sentiment"] = {"label": "positive", "score": 0.9}
+        return articles
+
+    monkeypatch.setattr(sentiment_analysis, "fetch_articles", fetch_articles)
+    monkeypatch.setattr(sentiment_analysis, "analyze_articles_sentiment", classify)
+    results = sentiment_analysis.analyze_assets_sentiment_batch(["TCS", "INFY", "ITC", "TCS"])
+
+    assert list(results) == ["TCS", "INFY", "ITC"]
+    assert all(summary["positive_count"] == 2 for summary in results.values())
+    # The caller runs the first fetch itself; the rest go to the shared pool (or back to the caller)
+    assert all(name == threads["TCS"] or name.startswith("api-io") for name in threads.values())
@@ -0,0 +1,47 @@
+import pytest
+
+from market_data import NIFTY50_SYMBOLS
+from symbol_resolver import NIFTY50_NAMES, SymbolResolver
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    master = tmp_path / "EQUITY_L.csv"
+    master.write_text(
+        "SYMBOL,NAME OF COMPANY, SERIES\n"
+        "IDEA,Vodafone Idea Limited,EQ\n"
+        "SUNTV,Sun TV Network Limited,EQ\n"
+        "TATAPOWER,The Tata Power Company Limited,EQ\n"
+        "ZYDUSLIFE,Zydus Lifesciences Limited,EQ\n"
+        "ITC,ITC Limited,EQ\n"
+    )
+    return SymbolResolver(master_paths=[str(master)])
+
+
+def test_every_nifty50_symbol_has_a_name():
+    assert set(NIFTY50_NAMES) == set(NIFTY50_SYMBOLS)
+
+
+@pytest.mark.parametrize("query, ticker", [
+    ("hindustan unilever results", "HINDUNILVR.NS"),
+    ("How is HUL doing?", "HINDUNILVR.NS"),
+    ("tatapower share price", "TATAPOWER.NS"),
+    ("kotak mahindra bank news", "KOTAKBANK.NS"),
+    ("dr reddys outlook", "DRREDDY.NS"),
+])
+def test_names_resolve_without_a_master_file(query, ticker):
+    assert SymbolResolver(master_paths=[]).resolve(query) == ticker
+
+
+def test_master_symbols_match_only_in_capitals(resolver):
+    assert resolver.resolve("IDEA share price") == "IDEA.NS"
+    assert resolver.resolve("what is a good idea for today") is None
+    assert resolver.resolve("zyduslife results") is None
+    assert resolver.resolve("ZYDUSLIFE results") == "ZYDUSLIFE.NS"
+
+
+def test_master_names_match_in_any_case(resolver):
+    assert resolver.resolve("vodafone idea results") == "IDEA.NS"
+    assert resolver.resolve("zydus lifesciences outlook") == "ZYDUSLIFE.NS"
+    # "ITC" is also the company's name, so the lower-case symbol still matches
+    assert resolver.resolve("itc dividend") == "ITC.NS"
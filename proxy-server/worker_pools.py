@@ -0,0 +1,147 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from fastapi import HTTPException
+
+from instrumentation import in_context
+
+# Network-bound work (yfinance, Google News) mostly waits on sockets, so it gets many threads;
+# CPU-bound work (transformer inference, indicator maths) gets roughly one thread per core.
+IO_WORKERS = int(os.environ.get("API_IO_WORKERS", "32"))
+CPU_WORKERS = int(os.environ.get("API_CPU_WORKERS", str(os.cpu_count() or 2)))
+
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="api-io")
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="api-cpu")
+
+POOLS = {
+    "io": io_executor,
+    "cpu": cpu_executor,
+}
+
+
+def run_all(pool: str, calls: list) -> list:
+    """Results of several callables, fanned out over a shared pool, in order.
+
+    Meant for work that already runs in a pool thread: the caller runs the
+    first call itself and takes back any call still queued when it gets to
+    it, so a saturated pool cannot deadlock on threads waiting for their own
+    sub-tasks. Exceptions propagate as from a plain call.
+    """
+    calls = [in_context(call) for call in calls]
+    futures = [POOLS[pool].submit(call) for call in calls[1:]]
+    results = [calls[0]()] if calls else []
+    for call, future in zip(calls[1:], futures):
+        results.append(call() if future.cancel() else future.result())
+    return results
+
+
+class EndpointLimiter:
+    """Caps how many requests of one endpoint run at once and tracks its queue.
+
+    Requests over the concurrency limit wait on the event loop (not in a
+    worker thread); once max_queue requests are already waiting, new ones are
+    rejected with 503 so a slow endpoint cannot pile up unbounded work.
+    """
+
+    def __init__(self, name: str, pool: str, max_concurrency: int, max_queue: int = None):
+        self.name = name
+        self.pool = pool
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue if max_queue is not None else max_concurrency * 4
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable in this endpoint's pool once a slot is free"""
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail=f"Too many pending {self.name} requests")
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        self.running += 1
+        loop = asyncio.get_running_loop()
+        try:
+            # in_context carries the request's trace into the worker thread
+            future = POOLS[self.pool].submit(in_context(partial(func, *args, **kwargs)))
+        except BaseException:
+            self._finish(None, started_at)
+            raise
+        # The slot is released when the work is done, not when the awaiting request goes away:
+        # a cancelled request's thread keeps running and must keep counting against the limit
+        future.add_done_callback(lambda done: self._finish_threadsafe(loop, done, started_at))
+        return await asyncio.wrap_future(future)
+
+    def _finish_threadsafe(self, loop, future, started_at: float):
+        try:
+            loop.call_soon_threadsafe(self._finish, future, started_at)
+        except RuntimeError:
+            # The event loop is already closed (shutdown); nobody is left waiting for the slot
+            pass
+
+    def _finish(self, future, started_at: float):
+        if future is None or future.cancelled() or future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self.running -= 1
+        self.total_run_seconds += time.perf_counter() - started_at
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "pool": self.pool,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.total_wait_seconds / finished * 1000 if finished else 0.0,
+            "avg_run_ms": self.total_run_seconds / finished * 1000 if finished else 0.0,
+        }
+
+
+_limiters = {}
+
+
+def endpoint_limiter(name: str, pool: str, max_concurrency: int, max_queue: int = None) -> EndpointLimiter:
+    """Create (or return the existing) limiter for an endpoint"""
+    if pool not in POOLS:
+        raise ValueError(f"Unknown worker pool: {pool}")
+    if name not in _limiters:
+        _limiters[name] = EndpointLimiter(name, pool, max_concurrency, max_queue)
+    return _limiters[name]
+
+
+def pool_stats() -> dict:
+    """Queue depth of each executor and per-endpoint limiter counters"""
+    return {
+        "pools": {
+            name: {
+                "max_workers": executor._max_workers,
+                "threads": len(executor._threads),
+                "queued": executor._work_queue.qsize(),
+            }
+            for name, executor in POOLS.items()
+        },
+        "endpoints": {name: limiter.stats() for name, limiter in _limiters.items()},
+    }